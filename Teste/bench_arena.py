@@ -0,0 +1,138 @@
+"""Object tree against the struct-of-arrays arena (ast_arena), built by
+the parser with arena=True: memory kept per node, peak RSS of parse +
+check + emit-c, and traversal speed.
+
+Usage: python Teste/bench_arena.py [nodes]
+"""
+import gc
+import io
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "Teste"))
+
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+from ast_arena import Arena
+from bench_memoria import nos, programa
+from gerador_codigo import CodeGenerator
+
+
+def _arvore(source):
+    return UChuckParser(lambda msg, x, y: None, engine="descent").parse(source)
+
+
+def _arena(source):
+    return UChuckParser(lambda msg, x, y: None, engine="descent").parse(source, arena=True)
+
+
+def _raiz(modo, source):
+    return _arvore(source) if modo == "tree" else _arena(source).root()
+
+
+def _pipeline(modo, n):
+    # Roda num processo próprio para medir o pico de RSS de um só modo
+    ast = _raiz(modo, programa(n))
+    Visitor().visit(ast)
+    gen = CodeGenerator()
+    gen.generate(ast)
+    gen.show(io.StringIO())
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _memoria(source):
+    resultado = {}
+    for modo in ("tree", "arena"):
+        gc.collect()
+        tracemalloc.start()
+        ast = _raiz(modo, source)
+        gc.collect()
+        parseado = tracemalloc.get_traced_memory()[0]
+        Visitor().visit(ast)
+        gc.collect()
+        resultado[modo] = parseado, tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del ast
+    return resultado
+
+
+def _percorre_arvore(ast):
+    total = 0
+    pilha = [ast]
+    while pilha:
+        no = pilha.pop()
+        total += 1
+        pilha.extend(filho for _, filho in no.children() if filho is not None)
+    return total
+
+
+def _percorre_linhas(arena):
+    first_child, next_sibling = arena.first_child, arena.next_sibling
+    total = 0
+    pilha = [0]
+    while pilha:
+        linha = pilha.pop()
+        total += 1
+        filho = first_child[linha]
+        while filho >= 0:
+            pilha.append(filho)
+            filho = next_sibling[filho]
+    return total
+
+
+def _melhor(funcao, *args, prepara=None):
+    # Menor tempo de 3; prepara, se houver, dá a cada vez o argumento
+    tempos = []
+    for _ in range(3):
+        if prepara is not None:
+            args = (prepara(),)
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main(args):
+    if args and args[0] == "--pipeline":
+        return _pipeline(args[1], int(args[2]))
+    n = int(args[0]) if args else 200_000
+    source = programa(n)
+    ast = _arvore(source)
+    arena = _arena(source)
+    n = nos(ast)
+    print("%d nodes (arena: %d rows)" % (n, len(arena)))
+
+    for modo, (parseado, analisado) in _memoria(source).items():
+        print("%-6s kept  %6.1f bytes/node after parse  %6.1f after check" % (
+            modo, parseado / n, analisado / n))
+    for modo in ("tree", "arena"):
+        saida = subprocess.run([sys.executable, __file__, "--pipeline", modo, str(n)],
+                               capture_output=True, text=True, check=True).stdout
+        print("%-6s peak RSS of parse + check + emit-c: %7.1f MB" % (
+            modo, int(saida.split()[-1]) / 1024))
+
+    # A primeira passada pelo arena faz as visões; as seguintes as reusam
+    copia = arena.dumps()
+    tempos = {
+        "tree parse": _melhor(_arvore, source),
+        "arena parse": _melhor(_arena, source),
+        "tree children()": _melhor(_percorre_arvore, ast),
+        "arena children(), 1st": _melhor(_percorre_arvore, prepara=lambda: Arena.loads(copia).root()),
+        "arena children()": _melhor(_percorre_arvore, arena.root()),
+        "arena rows": _melhor(_percorre_linhas, arena),
+        "tree Visitor": _melhor(lambda root: Visitor().visit(root), prepara=lambda: _arvore(source)),
+        "arena Visitor": _melhor(lambda root: Visitor().visit(root),
+                                 prepara=lambda: Arena.loads(copia).root()),
+    }
+    for nome, tempo in tempos.items():
+        print("%-24s %10.0f nodes/s" % (nome, n / tempo))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,45 @@
+"""Time of `compilador.py emit-c` without the AST cache (--no-cache) and
+with a warm cache, on a repo program and on a generated one.
+
+Usage: python Teste/bench_cache_ast.py [runs] [nodes]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "Teste"))
+
+from bench_memoria import programa
+
+
+def tempo_emit_c(arquivo, cache_dir, *opcoes):
+    # Um diretório só para as tabelas LALR, para não medir a construção delas
+    env = dict(os.environ, UCHUCK_CACHE_DIR=cache_dir)
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "compilador.py", "emit-c", arquivo, "-o", os.devnull]
+                   + list(opcoes), cwd=RAIZ, env=env, check=True, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - inicio
+
+
+def main(args):
+    execucoes = int(args[0]) if args else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        gerado = os.path.join(tmp, "gerado.uck")
+        with open(gerado, "w") as f:
+            f.write(programa(int(args[1]) if len(args) > 1 else 200_000))
+        for arquivo in (os.path.join(RAIZ, "program2.txt"), gerado):
+            cache_dir = tempfile.mkdtemp(dir=tmp)
+            tempo_emit_c(arquivo, cache_dir)
+            sem = statistics.median(tempo_emit_c(arquivo, cache_dir, "--no-cache")
+                                    for _ in range(execucoes))
+            com = statistics.median(tempo_emit_c(arquivo, cache_dir) for _ in range(execucoes))
+            print("%-14s sem cache %7.1f ms  cache quente %7.1f ms  (%.2fx)" % (
+                os.path.basename(arquivo), sem * 1000, com * 1000, sem / com))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,70 @@
+"""Checking many small files: one `compilador.py check` process per file
+against Visitor.check in a single process, in sequence and on a thread
+pool.
+
+Usage: python Teste/bench_diagnosticos.py [files]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+
+PROGRAMA = """0 => int i%d; 1.5 => float x;
+while (i%d < 10) { i%d + 1 => i%d; <<< x * 2.0, "linha" >>>; }
+%s"""
+
+
+def _arquivos(diretorio, n):
+    caminhos = []
+    for k in range(n):
+        # Um em cada quatro tem um erro semântico
+        erro = "<<< nada >>>;" if k % 4 == 0 else ""
+        caminho = os.path.join(diretorio, "p%d.chuck" % k)
+        with open(caminho, "w") as f:
+            f.write(PROGRAMA % (k, k, k, k, erro))
+        caminhos.append(caminho)
+    return caminhos
+
+
+def _checa(caminho):
+    with open(caminho) as f:
+        ast = UChuckParser(lambda msg, x, y: None).parse(f.read())
+    return Visitor().check(ast)
+
+
+def main(args):
+    n = int(args[0]) if args else 200
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminhos = _arquivos(diretorio, n)
+        compilador = os.path.join(RAIZ, "compilador.py")
+        inicio = time.perf_counter()
+        for caminho in caminhos:
+            subprocess.run([sys.executable, compilador, "check", "--no-cache", caminho],
+                           capture_output=True)
+        processos = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        erros = sum(bool(_checa(caminho)) for caminho in caminhos)
+        sequencia = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(4) as pool:
+            assert sum(bool(d) for d in pool.map(_checa, caminhos)) == erros
+        threads = time.perf_counter() - inicio
+
+    print("%d files, %d with errors" % (n, erros))
+    for nome, tempo in (("process per file", processos), ("one process", sequencia),
+                        ("thread pool (4)", threads)):
+        print("%-18s %8.1f files/s" % (nome, n / tempo))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
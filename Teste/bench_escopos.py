@@ -0,0 +1,86 @@
+"""Lookup in the scope stack of SymbolTable against a chain of one table
+per block (each lookup walks the parents), and the semantic analysis of
+generated programs with deeply nested blocks.
+
+Usage: python Teste/bench_escopos.py [uses per program]
+"""
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_semantico import SymbolTable, Visitor
+from analisador_sintatico import UChuckParser
+
+PROFUNDIDADES = (1, 10, 100, 500)
+
+
+class _Encadeada:
+    # Tabela por bloco com ponteiro para o pai
+    def __init__(self, parent=None):
+        self.symbols = {}
+        self.parent = parent
+
+    def add(self, name, value):
+        self.symbols[name] = value
+
+    def lookup(self, name):
+        table = self
+        while table is not None:
+            value = table.symbols.get(name)
+            if value is not None:
+                return value
+            table = table.parent
+        return None
+
+
+def programa(profundidade, usos):
+    # Cada bloco declara uma variável; o mais interno usa a de fora
+    linhas = ["0 => int v_0;"]
+    for k in range(1, profundidade + 1):
+        linhas.append("{ %d => int v_%d;" % (k, k))
+    linhas.extend(["v_0 + v_%d => v_0;" % profundidade] * usos)
+    linhas.append("}" * profundidade)
+    return "\n".join(linhas) + "\n"
+
+
+def _melhor(funcao, *args):
+    tempos = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def _buscas(table, vezes):
+    lookup = table.lookup
+    for _ in range(vezes):
+        lookup("v_0")
+
+
+def main(args):
+    usos = int(args[0]) if args else 20_000
+    parser = UChuckParser(lambda msg, x, y: None)
+    print("%6s %14s %14s %12s" % ("depth", "stack lookup", "chain lookup", "Visitor"))
+    for profundidade in PROFUNDIDADES:
+        pilha = SymbolTable()
+        cadeia = _Encadeada()
+        pilha.add("v_0", 0)
+        cadeia.add("v_0", 0)
+        for k in range(1, profundidade + 1):
+            pilha.push_scope()
+            pilha.add("v_%d" % k, k)
+            cadeia = _Encadeada(cadeia)
+            cadeia.add("v_%d" % k, k)
+        source = programa(profundidade, usos)
+        analise = _melhor(lambda: Visitor().visit(parser.parse(source))) - _melhor(parser.parse, source)
+        print("%6d %11.0f ns %11.0f ns %10.3f s" % (
+            profundidade, _melhor(_buscas, pilha, usos) / usos * 1e9,
+            _melhor(_buscas, cadeia, usos) / usos * 1e9, analise))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
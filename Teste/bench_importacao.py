@@ -0,0 +1,42 @@
+"""Time to import analisador_sintatico without, with a cold and with a
+warm cache of the LALR tables.
+
+Usage: python Teste/bench_importacao.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def tempo_importacao(cache_dir):
+    env = dict(os.environ, UCHUCK_CACHE_DIR=cache_dir)
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import analisador_sintatico"],
+                   cwd=RAIZ, env=env, check=True, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - inicio
+
+
+def main(args):
+    execucoes = int(args[0]) if args else 10
+    tempos = {"sem cache": [], "cache frio": [], "cache quente": []}
+    with tempfile.TemporaryDirectory() as quente:
+        tempo_importacao(quente)
+        for _ in range(execucoes):
+            tempos["sem cache"].append(tempo_importacao(""))
+            with tempfile.TemporaryDirectory() as frio:
+                tempos["cache frio"].append(tempo_importacao(frio))
+            tempos["cache quente"].append(tempo_importacao(quente))
+    # O tempo inclui a partida do interpretador
+    base = statistics.median(tempos["sem cache"])
+    for nome, valores in tempos.items():
+        mediana = statistics.median(valores)
+        print("%-12s %7.1f ms  (%.2fx)" % (nome, mediana * 1000, base / mediana))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
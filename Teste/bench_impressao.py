@@ -0,0 +1,56 @@
+"""Time of the AST printers (Node.show, represent_node, write_json,
+write_ndjson) on a generated program, and whether they handle a deep
+"a + a + ... + a" chain.
+
+Usage: python Teste/bench_impressao.py [nodes] [terms]
+"""
+import io
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "Teste"))
+
+import ast_alguma
+from analisador_sintatico import UChuckParser
+from ast_alguma import represent_node
+from bench_memoria import nos, programa
+
+
+def _impressoras():
+    impressoras = {"show": lambda ast: ast.show(buf=io.StringIO(), showcoord=True),
+                   "represent_node": represent_node}
+    # As exportações JSON não existem em versões antigas
+    for nome in ("write_json", "write_ndjson"):
+        if hasattr(ast_alguma, nome):
+            funcao = getattr(ast_alguma, nome)
+            impressoras[nome] = lambda ast, funcao=funcao: funcao(ast, io.StringIO())
+    return impressoras
+
+
+def main(args):
+    parser = UChuckParser(lambda msg, x, y: None, engine="descent")
+    ast = parser.parse(programa(int(args[0]) if args else 200_000))
+    total = nos(ast)
+    termos = int(args[1]) if len(args) > 1 else 2_000
+    cadeia = parser.parse("1 => int a;\n<<< " + " + ".join(["a"] * termos) + " >>>;")
+    print("%d nodes; chain of %d terms" % (total, termos))
+    for nome, funcao in _impressoras().items():
+        melhor = None
+        for _ in range(3):
+            inicio = time.perf_counter()
+            funcao(ast)
+            tempo = time.perf_counter() - inicio
+            melhor = tempo if melhor is None else min(melhor, tempo)
+        try:
+            funcao(cadeia)
+            profundo = "ok"
+        except RecursionError:
+            profundo = "RecursionError"
+        print("%-15s %9.0f nodes/s  chain: %s" % (nome, total / melhor, profundo))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
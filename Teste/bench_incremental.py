@@ -0,0 +1,94 @@
+"""Latency of a single-statement edit against program size: check and C
+generation of the whole program against IncrementalCompiler.update.
+Both parse the whole source; the parse time is left out of the first
+two columns and shown apart.
+
+Usage: python Teste/bench_incremental.py [sizes...]
+"""
+import io
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+from compilacao_incremental import IncrementalCompiler
+from gerador_codigo import CodeGenerator
+
+TAMANHOS = (500, 2_000, 5_000)
+
+
+def programa(comandos, valor=1):
+    linhas = ["0 => int soma; 1.5 => float fator;"]
+    for n in range(comandos):
+        if n == comandos // 2:
+            linhas.append("soma + %d => soma;" % valor)
+        elif n % 3 == 0:
+            linhas.append("while (soma < %d) { soma + 1 => soma; <<< soma * 2, \"passo\" >>>; }" % n)
+        elif n % 3 == 1:
+            linhas.append("{ %d => int v; fator * 2.0 => fator; <<< v + soma >>>; }" % n)
+        else:
+            linhas.append("if (soma % 2 == 0) <<< fator >>>; else soma - 1 => soma;")
+    return "\n".join(linhas) + "\n"
+
+
+def _completo(parser, source):
+    ast = parser.parse(source)
+    inicio = time.perf_counter()
+    Visitor().check(ast)
+    gen = CodeGenerator()
+    gen.generate(ast)
+    gen.show(io.StringIO())
+    return time.perf_counter() - inicio
+
+
+def _melhor(funcao, *args):
+    tempos = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+class _Cronometro:
+    # Mede o parse feito dentro de update
+    def __init__(self, parse):
+        self.parse = parse
+        self.tempo = 0
+
+    def __call__(self, source):
+        inicio = time.perf_counter()
+        try:
+            return self.parse(source)
+        finally:
+            self.tempo = time.perf_counter() - inicio
+
+
+def main(args):
+    tamanhos = [int(a) for a in args] or TAMANHOS
+    parser = UChuckParser(lambda msg, x, y: None, engine="descent")
+    print("%8s %10s %12s %10s" % ("stmts", "full", "incremental", "parse"))
+    for n in tamanhos:
+        versoes = [programa(n, valor) for valor in range(1, 5)]
+        completo = min(_completo(parser, versoes[0]) for _ in range(3))
+        parse = _melhor(parser.parse, versoes[0])
+
+        compiler = IncrementalCompiler(lambda msg, x, y: None, engine="descent")
+        compiler.update(versoes[0])
+        compiler.parser.parse = cronometro = _Cronometro(compiler.parser.parse)
+        tempos = []
+        for source in versoes[1:]:
+            inicio = time.perf_counter()
+            compiler.update(source)
+            compiler.show(io.StringIO())
+            tempos.append(time.perf_counter() - inicio - cronometro.tempo)
+            assert compiler.rechecked == 1
+        print("%8d %8.1f ms %9.1f ms %7.1f ms" % (n, completo * 1e3, min(tempos) * 1e3, parse * 1e3))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,46 @@
+"""Tokens per second of the lexer engines on the programs of the repo,
+making sly Tokens (tokenize) and filling a TokenBuffer (tokenize_compact).
+
+Usage: python Teste/bench_lexico.py [repetitions]
+"""
+import glob
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_lexico import UChuckLexer
+
+
+def corpus(repeticoes):
+    arquivos = sorted(glob.glob(os.path.join(RAIZ, "program*.txt"))
+                      + glob.glob(os.path.join(RAIZ, "Teste", "*.chuck")))
+    return "\n".join(open(arquivo).read() for arquivo in arquivos) * repeticoes
+
+
+def main(args):
+    source = corpus(int(args[0]) if args else 200)
+    caminhos = {
+        "tokenize": lambda lexer: sum(1 for _ in lexer.tokenize(source)),
+        "compact": lambda lexer: len(lexer.tokenize_compact(source)),
+    }
+    melhor = {}
+    for _ in range(5):
+        for engine in ("sly", "dfa"):
+            lexer = UChuckLexer(lambda msg, x, y: None, engine=engine)
+            for caminho, medir in caminhos.items():
+                inicio = time.perf_counter()
+                n = medir(lexer)
+                tempo = time.perf_counter() - inicio
+                chave = (engine, caminho)
+                melhor[chave] = min(melhor.get(chave, tempo), tempo)
+    for (engine, caminho), tempo in melhor.items():
+        print("%-4s %-9s %9d tokens  %10.0f tokens/s" % (engine, caminho, n, n / tempo))
+    for caminho in caminhos:
+        print("dfa/sly %-9s %.2fx" % (caminho, melhor["sly", caminho] / melhor["dfa", caminho]))
+    print("dfa compact/sly tokenize: %.2fx" % (melhor["sly", "tokenize"] / melhor["dfa", "compact"]))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,61 @@
+"""Bytes per AST node of a generated program, after parsing and after
+the semantic analysis (which annotates the nodes).
+
+Usage: python Teste/bench_memoria.py [nodes]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+
+CABECALHO = '0 => int a; 0.5 => float f; "s" => string s;\n'
+BLOCO = """while (a < 10) { a + 1 => a; if (a == 5) break; else continue; }
+f * 2.0 - f => f; s + "x" => s; -a => a; <<< a, f, s >>>;
+"""
+
+
+def programa(nos_desejados):
+    # Cada bloco tem o mesmo número de nós
+    um = nos(UChuckParser().parse(CABECALHO + BLOCO)) - nos(UChuckParser().parse(CABECALHO))
+    return CABECALHO + BLOCO * max(1, nos_desejados // um)
+
+
+def nos(node):
+    total = 0
+    pilha = [node]
+    while pilha:
+        atual = pilha.pop()
+        total += 1
+        pilha.extend(filho for _, filho in atual.children() if filho is not None)
+    return total
+
+
+def main(args):
+    source = programa(int(args[0]) if args else 1_000_000)
+    for engine in ("lalr", "descent"):
+        gc.collect()
+        tracemalloc.start()
+        parser = UChuckParser(engine=engine)
+        ast = parser.parse(source)
+        # Descarta o parser (o sly guarda dicionários por parse)
+        del parser
+        gc.collect()
+        parseado = tracemalloc.get_traced_memory()[0]
+        Visitor().visit(ast)
+        gc.collect()
+        analisado = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        n = nos(ast)
+        print("%-7s %9d nodes  parse %6.1f bytes/node  check %6.1f bytes/node" % (
+            engine, n, parseado / n, analisado / n))
+        del ast
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,52 @@
+"""Memory of the AST and time of the semantic analysis on a generated
+program with long identifiers and repeated literals.
+
+Usage: python Teste/bench_nomes.py [statements]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+
+VARIAVEIS = 50
+
+
+def programa(comandos):
+    linhas = ["0 => int contador_%d;" % n for n in range(VARIAVEIS)]
+    for n in range(comandos):
+        a, b, c = n % VARIAVEIS, (n * 7) % VARIAVEIS, (n * 13) % VARIAVEIS
+        linhas.append("contador_%d + contador_%d * 100 => contador_%d; <<< contador_%d, \"total\" >>>;"
+                      % (a, b, c, a))
+    return "\n".join(linhas) + "\n"
+
+
+def main(args):
+    source = programa(int(args[0]) if args else 50_000)
+    parser = UChuckParser(lambda msg, x, y: None, engine="descent")
+    gc.collect()
+    tracemalloc.start()
+    ast = parser.parse(source)
+    gc.collect()
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("AST: %.1f MB" % (memoria / 1e6))
+
+    melhor = None
+    for _ in range(5):
+        ast = parser.parse(source)
+        inicio = time.perf_counter()
+        Visitor().visit(ast)
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    print("Visitor: %.3f s" % melhor)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
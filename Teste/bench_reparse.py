@@ -0,0 +1,76 @@
+"""Latency of a one-character edit against program size: a full parse
+against UChuckParser.reparse, and a whole IncrementalCompiler step with
+update (full parse) against edit (reparse), C output included.
+
+Usage: python Teste/bench_reparse.py [sizes...]
+"""
+import io
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "Teste"))
+
+from analisador_sintatico import UChuckParser
+from bench_incremental import programa
+from compilacao_incremental import IncrementalCompiler
+
+TAMANHOS = (500, 2_000, 5_000)
+
+
+def _quieto(msg, x, y):
+    pass
+
+
+def _edicoes(source, vezes=4):
+    # Troca o valor do comando do meio do programa: (offset, apagados, inserido)
+    offset = source.index("soma + 1 => soma;\n")
+    return [(offset + 7, 1, str(valor)) for valor in range(2, 2 + vezes)]
+
+
+def main(args):
+    tamanhos = [int(a) for a in args] or TAMANHOS
+    print("%8s %10s %10s %12s %10s" % ("stmts", "parse", "reparse", "update", "edit"))
+    for n in tamanhos:
+        source = programa(n)
+        edicoes = _edicoes(source)
+
+        parser = UChuckParser(_quieto, engine="descent")
+        ast = parser.parse(source)
+        parse = reparse = float("inf")
+        texto = source
+        for offset, apagados, inserido in edicoes:
+            novo = texto[:offset] + inserido + texto[offset + apagados:]
+            inicio = time.perf_counter()
+            UChuckParser(_quieto, engine="descent").parse(novo)
+            parse = min(parse, time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            ast = parser.reparse(ast, texto, offset, apagados, inserido)
+            reparse = min(reparse, time.perf_counter() - inicio)
+            texto = novo
+
+        tempos = {}
+        for metodo in ("update", "edit"):
+            compiler = IncrementalCompiler(_quieto, engine="descent")
+            compiler.update(source)
+            texto = source
+            melhor = float("inf")
+            for offset, apagados, inserido in edicoes:
+                texto = texto[:offset] + inserido + texto[offset + apagados:]
+                inicio = time.perf_counter()
+                if metodo == "update":
+                    compiler.update(texto)
+                else:
+                    compiler.edit(offset, apagados, inserido)
+                compiler.show(io.StringIO())
+                melhor = min(melhor, time.perf_counter() - inicio)
+                assert compiler.rechecked == 1
+            tempos[metodo] = melhor
+        print("%8d %7.1f ms %7.1f ms %9.1f ms %7.1f ms" % (
+            n, parse * 1e3, reparse * 1e3, tempos["update"] * 1e3, tempos["edit"] * 1e3))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,51 @@
+"""Nodes per second of the parser engines on the programs of the repo,
+parsing the text (lexer included) and ready tokens (only the parser).
+
+Usage: python Teste/bench_sintatico.py [repetitions]
+"""
+import glob
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_lexico import UChuckLexer
+from analisador_sintatico import UChuckParser
+
+
+def corpus(repeticoes):
+    arquivos = sorted(glob.glob(os.path.join(RAIZ, "program*.txt"))
+                      + glob.glob(os.path.join(RAIZ, "Teste", "*.chuck")))
+    return "\n".join(open(arquivo).read() for arquivo in arquivos) * repeticoes
+
+
+def nos(node):
+    return 1 + sum(nos(filho) for _, filho in node.children() if filho is not None)
+
+
+def main(args):
+    source = corpus(int(args[0]) if args else 200)
+    entradas = {"text": source,
+                "tokens": UChuckLexer(lambda msg, x, y: None).tokenize_compact(source)}
+    melhor = {}
+    for _ in range(5):
+        for entrada, valor in entradas.items():
+            for engine in ("lalr", "descent"):
+                parser = UChuckParser(lambda msg, x, y: None, engine=engine)
+                inicio = time.perf_counter()
+                ast = parser.parse(valor)
+                tempo = time.perf_counter() - inicio
+                chave = (entrada, engine)
+                melhor[chave] = min(melhor.get(chave, tempo), tempo)
+    n = nos(ast)
+    for (entrada, engine), tempo in melhor.items():
+        print("%-6s %-7s %9d nodes  %10.0f nodes/s" % (entrada, engine, n, n / tempo))
+    for entrada in entradas:
+        print("%-6s descent/lalr: %.2fx" % (
+            entrada, melhor[entrada, "lalr"] / melhor[entrada, "descent"]))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
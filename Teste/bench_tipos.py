@@ -0,0 +1,57 @@
+"""Checks per second of the semantic analysis on expression-heavy
+programs (int, float and string arithmetic and comparisons).
+
+Usage: python Teste/bench_tipos.py [statements]
+"""
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+from ast_alguma import BinaryOp, Node, UnaryOp
+
+EXPRESSOES = (
+    "(i + j * 3 - -k) % 7 / (j + 1) => i;",
+    "x * 2.5 + y / 3.0 - -x => y;",
+    "(i < j) && (k >= i) || !(i == k) => k;",
+    "(x <= y) + (x != y) => j;",
+    "s + \"abc\" + s => s;",
+)
+
+
+def programa(comandos):
+    linhas = ["1 => int i; 2 => int j; 3 => int k;",
+              "1.0 => float x; 2.0 => float y;", "\"s\" => string s;"]
+    linhas.extend(EXPRESSOES[n % len(EXPRESSOES)] for n in range(comandos))
+    return "\n".join(linhas) + "\n"
+
+
+def operacoes(ast):
+    total = 0
+    pilha = [ast]
+    while pilha:
+        no = pilha.pop()
+        total += isinstance(no, (BinaryOp, UnaryOp))
+        pilha.extend(filho for _, filho in no.children() if isinstance(filho, Node))
+    return total
+
+
+def main(args):
+    source = programa(int(args[0]) if args else 20_000)
+    parser = UChuckParser(lambda msg, x, y: None, engine="descent")
+    n = operacoes(parser.parse(source))
+    tempos = []
+    for _ in range(5):
+        ast = parser.parse(source)
+        inicio = time.perf_counter()
+        Visitor().visit(ast)
+        tempos.append(time.perf_counter() - inicio)
+    print("%d operators: %.0f checks/s" % (n, n / min(tempos)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
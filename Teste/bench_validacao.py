@@ -0,0 +1,41 @@
+"""Time of UChuckParser.validate against a full parse (both engines).
+
+Usage: python Teste/bench_validacao.py [repetitions]
+"""
+import glob
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analisador_sintatico import UChuckParser
+
+
+def corpus(repeticoes):
+    arquivos = sorted(glob.glob(os.path.join(RAIZ, "program*.txt"))
+                      + glob.glob(os.path.join(RAIZ, "Teste", "*.chuck")))
+    return "\n".join(open(arquivo).read() for arquivo in arquivos) * repeticoes
+
+
+def main(args):
+    source = corpus(int(args[0]) if args else 200)
+    lalr = UChuckParser(lambda msg, x, y: None)
+    descent = UChuckParser(lambda msg, x, y: None, engine="descent")
+    modos = {"parse (lalr)": lalr.parse,
+             "parse (descent)": descent.parse,
+             "validate": lalr.validate}
+    melhor = {}
+    for _ in range(5):
+        for modo, funcao in modos.items():
+            inicio = time.perf_counter()
+            funcao(source)
+            tempo = time.perf_counter() - inicio
+            melhor[modo] = min(melhor.get(modo, tempo), tempo)
+    for modo, tempo in melhor.items():
+        print("%-16s %8.3f s  %6.2fx" % (modo, tempo, melhor["parse (lalr)"] / tempo))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
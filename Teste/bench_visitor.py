@@ -0,0 +1,56 @@
+"""Nodes per second of the semantic analyzer and the code generator on a
+generated program, and the longest "a + a + ... + a" chain they handle.
+
+Usage: python Teste/bench_visitor.py [nodes]
+"""
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "Teste"))
+
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+from bench_memoria import nos, programa
+from gerador_codigo import CodeGenerator
+
+
+def _melhor(funcao, repeticoes=5):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor
+
+
+def _cadeia(termos):
+    return "1 => int a;\n<<< " + " + ".join(["a"] * termos) + " >>>;"
+
+
+def main(args):
+    parser = UChuckParser(lambda msg, x, y: None, engine="descent")
+    ast = parser.parse(programa(int(args[0]) if args else 200_000))
+    total = nos(ast)
+    print("%d nodes" % total)
+    for nome, funcao in (("Visitor", lambda: Visitor().visit(ast)),
+                         ("CodeGenerator", lambda: CodeGenerator().generate(ast))):
+        print("%-14s %8.0f nodes/s" % (nome, total / _melhor(funcao)))
+
+    termos = 1000
+    while termos <= 64000:
+        ast = parser.parse(_cadeia(termos))
+        try:
+            Visitor().visit(ast)
+            CodeGenerator().generate(ast)
+        except RecursionError:
+            break
+        termos *= 2
+    print("longest chain: %s terms" % (termos // 2 if termos > 64000 else "< %d" % termos))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
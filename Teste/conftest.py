@@ -0,0 +1,7 @@
+import os
+import pytest
+
+# Testes que comparam tempos medidos. A razão entre os tempos varia com a
+# carga da máquina, então só rodam com UCHUCK_TESTE_GRANDE=1
+medicao = pytest.mark.skipif(not os.environ.get("UCHUCK_TESTE_GRANDE"),
+                             reason="medição de tempo; use UCHUCK_TESTE_GRANDE=1")
@@ -0,0 +1,64 @@
+import pytest
+import ast_alguma
+from analisador_semantico import IntType, SymbolTable, Visitor
+from analisador_sintatico import UChuckParser
+from ast_alguma import ID, IfStatement, Location, Node, WhileStatement
+
+SOURCE = """0 => int a;
+while (a < 3) { if (a == 1) break; a + 1 => a; }
+<<< a >>>;"""
+
+
+def _nos(ast):
+    pilha = [ast]
+    while pilha:
+        no = pilha.pop()
+        yield no
+        pilha.extend(filho for _, filho in no.children() if isinstance(filho, Node))
+
+
+def test_nos_sem_dicionario():
+    for no in _nos(UChuckParser().parse(SOURCE)):
+        assert not hasattr(no, "__dict__")
+    for cls in vars(ast_alguma).values():
+        if isinstance(cls, type) and issubclass(cls, Node):
+            assert "__dict__" not in dir(cls)
+
+
+def test_anotacoes_em_slots():
+    ast = UChuckParser().parse(SOURCE)
+    Visitor().visit(ast)
+    assert isinstance(ast.symtab, SymbolTable)
+    loop = ast.stmts[1]
+    brk = loop.body.stmts[0].consequence
+    assert brk.loop is loop
+    local = next(no for no in _nos(ast) if isinstance(no, Location))
+    assert local.uchuck_type is IntType
+    assert local.defn is ast.stmts[0].expression.location
+    assert local.gen_location is None
+
+
+def test_attrs_compativel():
+    ast = UChuckParser().parse(SOURCE)
+    Visitor().visit(ast)
+    local = next(no for no in _nos(ast) if isinstance(no, Location))
+    assert local.attrs["uchuck_type"] is IntType
+    assert local.attrs.get("gen_location") is None
+    assert set(local.attrs) == {"uchuck_type", "defn"}
+    local.attrs["gen_location"] = "a"
+    assert local.gen_location == "a"
+    del local.attrs["gen_location"]
+    assert "gen_location" not in local.attrs
+    with pytest.raises(KeyError):
+        local.attrs["outro"] = 1
+    with pytest.raises(KeyError):
+        ID("a").attrs["loop"] = WhileStatement(None, None)
+    with pytest.raises(AttributeError):
+        ID("a").outro
+
+
+def test_nomes_antigos_dos_campos():
+    no = IfStatement("c", "s", "e")
+    assert (no.condition, no.if_body, no.else_body) == ("c", "s", "e")
+    assert (no.test, no.consequence, no.alternative) == ("c", "s", "e")
+    assert WhileStatement("c", "b").condition == "c"
@@ -0,0 +1,87 @@
+import contextlib
+import glob
+import io
+import os
+from analisador_semantico import IntType, Visitor
+from analisador_sintatico import UChuckParser
+from ast_alguma import Coord, ExpressionAsStatement, Location, Node, Program
+from ast_arena import Arena, NodeView
+from gerador_codigo import CodeGenerator
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMAS = sorted(glob.glob(os.path.join(RAIZ, "program*.txt"))
+                   + glob.glob(os.path.join(RAIZ, "Teste", "*.chuck")))
+
+
+def _compila(ast):
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        ast.show(buf=saida, showcoord=True)
+        try:
+            Visitor().visit(ast)
+            gen = CodeGenerator()
+            gen.generate(ast)
+            gen.show(saida)
+        except SystemExit:
+            print("SystemExit")
+    return saida.getvalue()
+
+
+def test_arena_igual_a_arvore():
+    for arquivo in PROGRAMAS:
+        source = open(arquivo).read()
+        arena = Arena.from_tree(UChuckParser().parse(source))
+        assert _compila(arena.root()) == _compila(UChuckParser().parse(source)), arquivo
+
+
+def _colunas(arena):
+    # Colunas do arena com os valores no lugar dos índices dos pools
+    return (list(arena.kind), list(arena.first_child), list(arena.next_sibling), list(arena.position),
+            [arena.symbols[s] if type(arena.node(n)).__name__ in ("BinaryOp", "UnaryOp", "Literal") else None
+             for n, s in enumerate(arena.symbol)],
+            [arena.values[v] if v >= 0 else None for v in arena.value])
+
+
+def test_arena_direto_do_parser():
+    fontes = [open(arquivo).read() for arquivo in PROGRAMAS]
+    # Com recuperação de erros (o "descent" passa para o LALR)
+    fontes += ["<<< 1 >>>;\n1 1 ;\n<<< 2 >>>;\n", "1 => int a; <<< a, 2, -a + 3 >>>;"]
+    for engine in ("lalr", "descent"):
+        for source in fontes:
+            saida = io.StringIO()
+            with contextlib.redirect_stdout(saida):
+                ast = UChuckParser(engine=engine).parse(source)
+                arena = UChuckParser(engine=engine).parse(source, arena=True)
+            assert isinstance(arena, Arena)
+            assert _colunas(arena) == _colunas(Arena.from_tree(ast))
+            assert _compila(arena.root()) == _compila(ast)
+
+
+def test_linhas_em_pre_ordem():
+    ast = UChuckParser().parse(open(PROGRAMAS[0]).read())
+    arena = Arena.from_tree(ast)
+    ordem = []
+    pilha = [ast]
+    while pilha:
+        no = pilha.pop()
+        ordem.append(type(no).__name__)
+        pilha.extend(reversed([filho for _, filho in no.children() if filho is not None]))
+    assert [type(arena.node(linha)).__name__ for linha in range(len(arena))] == ordem
+
+
+def test_anotacoes_e_coordenadas():
+    ast = UChuckParser().parse("0 => int a; a => a; ;")
+    ast.stmts[1].coord = Coord(9, 9)
+    arena = Arena.from_tree(ast)
+    raiz = arena.root()
+    assert isinstance(raiz, Node) and type(raiz).__name__ == "Program"
+    Visitor().visit(raiz)
+    local = raiz.stmts[1].expression.expression
+    assert isinstance(local, NodeView) and local.uchuck_type is IntType
+    assert local.defn == raiz.stmts[0].expression.location
+    assert local.attrs["uchuck_type"] is IntType
+    assert str(raiz.stmts[1].coord) == "@ 9:9"
+    assert str(local.coord) == "@ 1:13"
+    # Filho ausente no meio da árvore
+    assert raiz.stmts[2].expression is None
+    assert Arena.from_tree(Program([ExpressionAsStatement(None), Location("b")])).root().stmts[1].name == "b"
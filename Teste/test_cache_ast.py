@@ -0,0 +1,108 @@
+import io
+import os
+import subprocess
+import sys
+from analisador_semantico import IntType, Visitor
+from analisador_sintatico import UChuckParser
+from cache_ast import ASTCache, source_key
+from gerador_codigo import CodeGenerator
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMA = os.path.join(RAIZ, "program2.txt")
+
+
+def _checada(source):
+    ast = UChuckParser().parse(source)
+    Visitor().visit(ast)
+    return ast
+
+
+def _compila(ast):
+    saida = io.StringIO()
+    ast.show(buf=saida, showcoord=True)
+    gen = CodeGenerator()
+    gen.generate(ast)
+    gen.show(saida)
+    return saida.getvalue()
+
+
+def test_ida_e_volta(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    for arquivo in (PROGRAMA, os.path.join(RAIZ, "program7.txt")):
+        source = open(arquivo).read()
+        assert cache.get(source) is None
+        cache.put(source, _checada(source))
+        assert _compila(cache.get(source)) == _compila(_checada(source))
+    source = "0 => int a; a => a;"
+    cache.put(source, _checada(source))
+    ast = cache.get(source)
+    decl = ast.stmts[0].expression.location
+    assert decl.uchuck_type is IntType
+    assert ast.stmts[1].expression.location.defn is decl
+    assert cache.get(source + "\n") is None
+
+
+def test_entrada_ilegivel(tmp_path):
+    source = "1 => int a; <<< a >>>;"
+    cache = ASTCache(str(tmp_path))
+    cache.put(source, _checada(source))
+    with open(cache.path(source_key(source)), "r+b") as f:
+        f.seek(70)
+        f.write(b"\xff\xff\xff")
+    assert cache.get(source) is None
+
+
+def test_remove_as_menos_usadas(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    fontes = ["%d => int a; <<< a >>>;" % n for n in range(4)]
+    for n, source in enumerate(fontes):
+        cache.put(source, _checada(source))
+        os.utime(cache.path(source_key(source)), (n, n))
+    tamanho = os.path.getsize(cache.path(source_key(fontes[0])))
+    # Ler a mais antiga a torna a mais recente
+    assert cache.get(fontes[0]) is not None
+    cache.max_bytes = 2 * tamanho
+    cache.evict()
+    restantes = [source for source in fontes if cache.get(source) is not None]
+    assert restantes == [fontes[0], fontes[3]]
+
+
+def test_remove_temporarios_abandonados(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    abandonado = tmp_path / "abandonado.tmp"
+    abandonado.write_bytes(b"x")
+    os.utime(abandonado, (0, 0))
+    escrevendo = tmp_path / "escrevendo.tmp"
+    escrevendo.write_bytes(b"x")
+    source = "1 => int a;"
+    cache.put(source, _checada(source))
+    assert not abandonado.exists() and escrevendo.exists()
+    assert cache.get(source) is not None
+
+
+def _emit_c(cache_dir, fonte, *opcoes):
+    codigo = ("import sys, compilador\n"
+              "status = compilador.main(%r)\n"
+              "print(status, 'analisador_sintatico' in sys.modules)" % (
+                  ["emit-c", fonte] + list(opcoes),))
+    env = dict(os.environ, UCHUCK_CACHE_DIR=cache_dir)
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=env,
+                           capture_output=True, text=True, check=True).stdout
+    return saida.rsplit("\n", 2)[-2], saida.rsplit("\n", 2)[0]
+
+
+def test_compilador_pula_as_fases(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    assert _emit_c(cache_dir, PROGRAMA)[0] == "0 True"
+    status, c = _emit_c(cache_dir, PROGRAMA)
+    assert status == "0 False"
+    assert c == _emit_c(cache_dir, PROGRAMA, "--no-cache")[1]
+
+
+def test_com_erros_nao_entra_no_cache(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    for n, texto in enumerate(("1 => int a; @ <<< a >>>;\n", "1 => int a; <<< a >>>; 3 4 5;\n")):
+        fonte = tmp_path / ("erro%d.uck" % n)
+        fonte.write_text(texto)
+        _emit_c(cache_dir, str(fonte))
+        assert _emit_c(cache_dir, str(fonte))[0].endswith("True")
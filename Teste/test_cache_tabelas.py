@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import types
+import analisador_sintatico
+from analisador_sintatico import UChuckParser, grammar_key, tables_path, load_tables, save_tables
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_tabelas_salvas_e_lidas(tmp_path):
+    path = tables_path(UChuckParser, str(tmp_path))
+    save_tables(UChuckParser, path)
+    tabela = load_tables(UChuckParser, path)
+    original = UChuckParser._lrtable
+    assert tabela.lr_action == original.lr_action
+    assert tabela.lr_goto == original.lr_goto
+    assert tabela.defaulted_states == original.defaulted_states
+    assert tabela.sr_conflicts == original.sr_conflicts
+
+
+def test_chave_depende_da_gramatica():
+    copia = types.SimpleNamespace(
+        _grammar=UChuckParser._grammar, tokens=UChuckParser.tokens,
+        precedence=UChuckParser.precedence)
+    assert grammar_key(copia) == grammar_key(UChuckParser)
+    copia.precedence = UChuckParser.precedence[1:]
+    assert grammar_key(copia) != grammar_key(UChuckParser)
+    copia.precedence = UChuckParser.precedence
+    copia.tokens = UChuckParser.tokens[1:]
+    assert grammar_key(copia) != grammar_key(UChuckParser)
+
+
+def test_cache_invalido_ignorado(tmp_path):
+    path = tables_path(UChuckParser, str(tmp_path))
+    with open(path, "wb") as f:
+        f.write(b"lixo")
+    assert load_tables(UChuckParser, path) is None
+    assert load_tables(UChuckParser, str(tmp_path / "nao-existe")) is None
+
+
+def test_cache_desligado(monkeypatch):
+    monkeypatch.setattr(analisador_sintatico, "CACHE_DIR", "")
+    assert tables_path(UChuckParser) is None
+
+
+def _importa(cache_dir, codigo=""):
+    env = dict(os.environ, UCHUCK_CACHE_DIR=str(cache_dir))
+    return subprocess.run(
+        [sys.executable, "-c", codigo + "import analisador_sintatico as a\n"
+         "print(a.UChuckParser().parse('1 => int a; <<< a >>>;'))"],
+        cwd=RAIZ, env=env, capture_output=True, text=True, check=True)
+
+
+def test_importacao_usa_cache(tmp_path):
+    primeira = _importa(tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+    # Com o cache pronto as tabelas não são construídas de novo
+    segunda = _importa(tmp_path, "import sly.yacc\nsly.yacc.LRTable.__init__ = None\n")
+    assert segunda.stdout == primeira.stdout
+    assert segunda.stderr == primeira.stderr
+
+
+def test_outra_versao_do_sly_sem_cache(tmp_path):
+    # Numa versão do sly não conferida a classe é construída sem o cache
+    primeira = _importa(tmp_path)
+    os.remove(os.path.join(tmp_path, os.listdir(tmp_path)[0]))
+    outra = _importa(tmp_path, "import sly\nsly.__version__ = '9.9'\n")
+    assert outra.stdout == primeira.stdout
+    assert os.listdir(tmp_path) == []
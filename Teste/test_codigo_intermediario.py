@@ -0,0 +1,116 @@
+import io
+import pytest
+from analisador_semantico import IntType, Visitor
+from analisador_sintatico import UChuckParser
+from ast_alguma import Location
+from codigo_intermediario import BinOp, Const, Instruction, Label, Move, Temp, Var
+from gerador_codigo import CEmitter, CodeGenerator
+
+SOURCE = """0 => int a;
+while (a < 3) { a + 1 => a; if (a == 2) break; }
+"s" + "!" => string s;
+<<< a, -2.5, s, "\\n" >>>;
+"""
+
+
+OPERACOES = {'+': int.__add__, '*': int.__mul__}
+
+
+def _gerador(source):
+    ast = UChuckParser().parse(source)
+    Visitor().visit(ast)
+    gen = CodeGenerator()
+    gen.generate(ast)
+    return gen
+
+
+def test_dump():
+    saida = io.StringIO()
+    _gerador(SOURCE).show_ir(saida)
+    assert saida.getvalue() == """function main() -> int
+    var int a
+    temp int _t1
+    temp int _t2
+    temp int _t3
+    var string s
+    temp string _t4
+    temp string _t5
+    temp string _t6
+    temp int _t7
+    temp float _t8
+    a = move int 0
+  L1:
+    _t1 = lt int a, 3
+    if_false _t1 goto L2
+    _t2 = add int a, 1
+    a = move int _t2
+    _t3 = eq int a, 2
+    if_false _t3 goto L3
+    goto L2
+    goto L4
+  L3:
+  L4:
+    goto L1
+  L2:
+    _t4 = const string "s"
+    _t5 = const string "!"
+    _t6 = concat string _t4, _t5 (length _t7)
+    s = move string _t6
+    print int a
+    _t8 = neg float 2.5
+    print float _t8
+    print string s
+    print_newline
+    return 0
+"""
+
+
+def test_instrucoes_com_slots():
+    gen = _gerador(SOURCE)
+    for instruction in gen.code[0].code:
+        assert isinstance(instruction, Instruction)
+        assert not hasattr(instruction, "__dict__")
+    assert Var("a", IntType) == Var("a", IntType)
+    temps = [op for op in gen.code[0].locals if isinstance(op, Temp)]
+    assert all(op.dest in temps for op in gen.code[0].code if op.dest.__class__ is Temp)
+
+
+def test_otimizacao_antes_do_c():
+    # Uma passada sobre o IR muda o C gerado: dobra as constantes
+    ast = UChuckParser().parse("2 * 3 + 1 => int a; <<< a >>>;")
+    Visitor().visit(ast)
+    gen = CodeGenerator()
+    gen.visit(ast)
+    code = gen.code[0]
+    valores = {}
+    for i, instruction in enumerate(code.code):
+        if isinstance(instruction, BinOp):
+            left, right = (valores.get(op, op) for op in instruction.uses())
+            if isinstance(left, Const) and isinstance(right, Const):
+                valor = Const(str(OPERACOES[instruction.op](int(left.value), int(right.value))), IntType)
+                valores[instruction.dest] = valor
+                code.code[i] = None
+        elif isinstance(instruction, Move):
+            instruction.src = valores.get(instruction.src, instruction.src)
+    code.code = [instruction for instruction in code.code if instruction is not None]
+    code.locals = [op for op in code.locals if op not in valores]
+    function = CEmitter().lower(code)
+    assert function.locals == ["int a;"]
+    assert function.statements == ["a = 7;", 'printf("%d\\n", a);', "return 0;"]
+
+
+def test_c_do_ir():
+    gen = _gerador(SOURCE)
+    statements = gen.function.statements
+    assert "_t7 = strlen(_t4) + strlen(_t5);" in statements
+    assert "L3: ;" in statements and "L1:" in statements
+    assert "s = strcpy(realloc(s, strlen(_t6)+1), _t6);" in statements
+    assert gen.function.locals[:2] == ["int a;", "int _t1;"]
+    assert "char* s = NULL;" in gen.function.locals
+    assert Label("L9").empty is False
+
+
+def test_tipo_sem_c():
+    gen = CodeGenerator()
+    with pytest.raises(RuntimeError):
+        gen.irtype(Location("x"))
@@ -0,0 +1,118 @@
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+import compilador
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMA = os.path.join(RAIZ, "program1.txt")
+
+
+def _modulos_carregados(*args):
+    codigo = ("import sys, compilador\n"
+              "compilador.main(%r)\n"
+              "print(sorted(m for m in ('analisador_lexico', 'analisador_sintatico', "
+              "'analisador_semantico', 'gerador_codigo') if m in sys.modules))" % (list(args),))
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ,
+                           capture_output=True, text=True, check=True).stdout
+    return saida.splitlines()[-1]
+
+
+def test_subcomandos_carregam_so_o_necessario(tmp_path):
+    saida = str(tmp_path / "saida")
+    assert _modulos_carregados("lex", PROGRAMA, "-o", saida) == "['analisador_lexico']"
+    assert _modulos_carregados("parse", PROGRAMA, "-o", saida) == \
+        "['analisador_lexico', 'analisador_sintatico']"
+    assert _modulos_carregados("emit-c", PROGRAMA, "-o", saida, "--no-cache") == \
+        "['analisador_lexico', 'analisador_semantico', 'analisador_sintatico', 'gerador_codigo']"
+
+
+def test_lex_e_parse(capsys, tmp_path):
+    assert compilador.main(["lex", PROGRAMA]) == 0
+    tokens = capsys.readouterr().out
+    assert tokens.startswith("Token(type=")
+    saida = tmp_path / "tokens.txt"
+    assert compilador.main(["lex", PROGRAMA, "-o", str(saida)]) == 0
+    assert saida.read_text() == tokens
+
+    assert compilador.main(["parse", PROGRAMA]) == 0
+    arvore = capsys.readouterr().out
+    assert arvore.startswith("Program:")
+    assert compilador.main(["parse", PROGRAMA, "--parser", "descent"]) == 0
+    assert capsys.readouterr().out == arvore
+
+
+def test_parse_validate(tmp_path, capsys):
+    assert compilador.main(["parse", "--validate", PROGRAMA]) == 0
+    assert capsys.readouterr().out == ""
+    fonte = tmp_path / "erro.uck"
+    fonte.write_text("a;\nb c d;\n")
+    assert compilador.main(["parse", "--validate", str(fonte)]) == 1
+    assert capsys.readouterr().out == "%s:2:5: Syntax error near the symbol d\n" % fonte
+
+
+def test_emit_c_igual_ao_gerador(tmp_path):
+    from analisador_sintatico import UChuckParser
+    from analisador_semantico import Visitor
+    from gerador_codigo import CodeGenerator
+    import io
+    with open(PROGRAMA) as f:
+        ast = UChuckParser().parse(f.read())
+    Visitor().visit(ast)
+    gen = CodeGenerator()
+    gen.generate(ast)
+    esperado = io.StringIO()
+    gen.show(esperado)
+
+    saida = tmp_path / "out.c"
+    assert compilador.main(["emit-c", PROGRAMA, "-o", str(saida)]) == 0
+    assert saida.read_text() == esperado.getvalue()
+
+
+def test_emit_ir(tmp_path):
+    saida = tmp_path / "out.ir"
+    assert compilador.main(["emit-ir", PROGRAMA, "-o", str(saida), "--no-cache"]) == 0
+    codigo = saida.read_text()
+    assert codigo.startswith("function main() -> int\n")
+    assert codigo.endswith("    return 0\n")
+
+
+def test_check_com_erro_semantico(capsys):
+    assert compilador.main(["check", PROGRAMA]) == 0
+    with pytest.raises(SystemExit) as exc:
+        compilador.main(["check", os.path.join(RAIZ, "program3.txt")])
+    assert exc.value.code == 1
+    assert "SemanticError" in capsys.readouterr().out
+
+
+def test_erro_lexico_muda_status(tmp_path, capsys):
+    fonte = tmp_path / "erro.uck"
+    fonte.write_text("1 => int a; @ <<< a >>>;\n")
+    assert compilador.main(["parse", str(fonte)]) == 1
+    assert "Lexical error: Illegal character '@' at 1:13" in capsys.readouterr().out
+
+
+def test_erro_de_sintaxe_muda_status(tmp_path, capsys):
+    # A recuperação do sly descarta a primeira instrução: nem a árvore
+    # nem o C desse programa podem sair
+    fonte = tmp_path / "sintaxe.uck"
+    fonte.write_text("<<< 1 >>>;\n1 1 ;\n<<< 2 >>>;\n")
+    for argumentos in (["parse", str(fonte)], ["emit-c", str(fonte), "--no-cache"]):
+        assert compilador.main(argumentos) == 1
+        saida = capsys.readouterr().out
+        assert "Error at line 2" in saida
+        assert "ExpressionAsStatement" not in saida and "printf" not in saida
+    fonte.write_text("1 => int a;\n1 1 ;\n<<< a >>>;\n")
+    for argumentos in (["check", str(fonte)], ["check", str(fonte), "--no-cache"]):
+        assert compilador.main(argumentos) == 1
+        assert "SemanticError" not in capsys.readouterr().out
+
+
+@pytest.mark.skipif(shutil.which(os.environ.get("CC", "cc")) is None,
+                    reason="sem compilador C")
+def test_build(tmp_path):
+    executavel = str(tmp_path / "programa")
+    assert compilador.main(["build", PROGRAMA, "-o", executavel]) == 0
+    saida = subprocess.run([executavel], capture_output=True, text=True).stdout
+    assert saida.split()[:4] == ["1", "2", "6", "24"]
@@ -0,0 +1,41 @@
+from analisador_sintatico import UChuckParser
+from ast_alguma import Coord, ID, Node
+
+SOURCE = """"linha
+quebrada" => string s;
+1 => int a;
+  a + 1 => a;"""
+
+
+def _nos(ast):
+    pilha = [ast]
+    while pilha:
+        no = pilha.pop()
+        yield no
+        pilha.extend(filho for _, filho in no.children() if isinstance(filho, Node))
+
+
+def test_coord_construida_da_posicao():
+    for engine in ("lalr", "descent"):
+        ast = UChuckParser(engine=engine).parse(SOURCE)
+        coords = {type(no).__name__ + str(no.coord) for no in _nos(ast)}
+        # O lexer não conta a quebra de linha dentro da string, mas a
+        # coluna vem do offset no texto
+        assert "Literal@ 1:1" in coords
+        assert "Type@ 1:14" in coords
+        assert "Literal@ 2:1" in coords
+        assert "Location@ 3:12" in coords
+        for no in _nos(ast):
+            if no.lines is not None:
+                assert isinstance(no.position, int)
+
+
+def test_coord_atribuida_e_mantida():
+    no = ID("a", Coord(4, 2))
+    assert no.lines is None
+    assert str(no.coord) == "@ 4:2"
+    ast = UChuckParser().parse("a => a;")
+    no = ast.stmts[0].expression.location
+    no.coord = Coord(7)
+    assert no.lines is None
+    assert str(no.coord) == "@ 7"
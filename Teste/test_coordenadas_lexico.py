@@ -0,0 +1,36 @@
+from analisador_lexico import UChuckLexer
+
+SOURCE = """/* comentario
+de bloco */ 1 => int a;   // linha
+"string com
+quebra" => string s;
+<<< a, s >>>; /**/ a + 1 => a;
+
+
+while (a < 3) { a + 1 => a; }"""
+
+
+def _coluna_referencia(text, index):
+    return index - text.rfind('\n', 0, index)
+
+
+def test_find_column_igual_a_busca_reversa():
+    lexer = UChuckLexer(lambda msg, x, y: None)
+    tokens = list(lexer.tokenize(SOURCE))
+    assert tokens
+    for tok in tokens:
+        assert lexer.find_column(tok) == _coluna_referencia(SOURCE, tok.index)
+
+
+def test_find_column_com_indice_inicial():
+    lexer = UChuckLexer(lambda msg, x, y: None)
+    inicio = SOURCE.index('<<<')
+    for tok in lexer.tokenize(SOURCE, lineno=5, index=inicio):
+        assert lexer.find_column(tok) == _coluna_referencia(SOURCE, tok.index)
+
+
+def test_coluna_em_linha_longa():
+    source = "a + 1 => a; " * 20000
+    lexer = UChuckLexer(lambda msg, x, y: None)
+    ultimo = list(lexer.tokenize(source))[-1]
+    assert lexer.find_column(ultimo) == len(source) - 1
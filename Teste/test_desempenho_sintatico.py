@@ -0,0 +1,68 @@
+import time
+from types import SimpleNamespace
+from analisador_sintatico import UChuckParser
+from ast_alguma import ExprList
+from conftest import medicao
+
+# Tamanhos usados no teste de escala. O caso de 1M de comandos demora
+# alguns minutos
+TAMANHOS = [10_000, 100_000, 1_000_000]
+
+
+def _acao(nome, regra):
+    # O decorador do sly encadeia as ações de mesmo nome por next_func
+    func = getattr(UChuckParser, nome)
+    while regra not in func.rules:
+        func = func.next_func
+    return func
+
+
+# As ações acrescentam o item na lista que já existe; copiar a lista a
+# cada redução deixaria o parse quadrático
+def test_statement_list_acrescenta_na_mesma_lista():
+    stmts = ["s1"]
+    p = SimpleNamespace(statement_list=stmts, statement="s2")
+    assert _acao("statement_list", "statement_list statement")(UChuckParser(), p) is stmts
+    assert stmts == ["s1", "s2"]
+
+
+def test_expr_list_acrescenta_na_mesma_lista():
+    lista = ExprList(["a", "b"])
+    exprs = lista.exprs
+    p = SimpleNamespace(expression0=lista, expression1="c")
+    assert _acao("expression", "expression COMMA expression")(UChuckParser(), p) is lista
+    assert lista.exprs is exprs
+    assert exprs == ["a", "b", "c"]
+
+
+def _tempo_por_item(parser, source, n):
+    inicio = time.perf_counter()
+    ast = parser.parse(source)
+    return ast, (time.perf_counter() - inicio) / n
+
+
+@medicao
+def test_statement_list_escala_linear():
+    parser = UChuckParser()
+    tempos = []
+    for n in TAMANHOS:
+        ast, tempo = _tempo_por_item(parser, "a + 1 => a;\n" * n, n)
+        assert len(ast.stmts) == n
+        tempos.append(tempo)
+    # Com custo linear o tempo por comando fica praticamente constante;
+    # com custo quadrático ele cresce junto com n (10x a cada tamanho)
+    for menor, maior in zip(tempos, tempos[1:]):
+        assert maior < 3 * menor
+
+
+@medicao
+def test_expr_list_escala_linear():
+    parser = UChuckParser()
+    tempos = []
+    for n in TAMANHOS:
+        source = "<<< " + ", ".join(["a"] * n) + " >>>;"
+        ast, tempo = _tempo_por_item(parser, source, n)
+        assert len(ast.stmts[0].expression.expr.exprs) == n
+        tempos.append(tempo)
+    for menor, maior in zip(tempos, tempos[1:]):
+        assert maior < 3 * menor
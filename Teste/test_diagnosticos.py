@@ -0,0 +1,46 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOURCE = """<<< b >>>;
+b + 1 => int c;
+-(1 + "x") => int d;
+break;
+0 => int a; 0 => int a;
+if (1.0) { a + "s" => a; }
+<<< c + 1.5 >>>;"""
+
+
+def _check(source):
+    return Visitor().check(UChuckParser().parse(source))
+
+
+def test_coleta_todos_os_erros():
+    diagnostics = _check(SOURCE)
+    assert [(d.code, d.coord.line, d.coord.column) for d in diagnostics] == [
+        (1, 1, 5), (1, 2, 1), (3, 3, 3), (5, 4, 1), (9, 5, 18), (6, 6, 1), (3, 6, 12), (3, 7, 5)]
+    assert str(diagnostics[2]) == (
+        "SemanticError: Binary operator '+' does not have matching LHS/RHS types @ 3:3")
+
+
+def test_primeiro_erro_igual_ao_fatal(capsys):
+    with pytest.raises(SystemExit):
+        Visitor().visit(UChuckParser().parse(SOURCE))
+    assert capsys.readouterr().out == "%s\n" % _check(SOURCE)[0]
+
+
+def test_programas_em_threads():
+    sources = []
+    for nome in sorted(os.listdir(RAIZ)):
+        if nome.startswith("program") and nome.endswith(".txt"):
+            with open(os.path.join(RAIZ, nome)) as f:
+                sources.append(f.read())
+    esperado = [[str(d) for d in _check(source)] for source in sources]
+    assert [] in esperado and any(esperado)
+    with ThreadPoolExecutor(4) as pool:
+        resultado = list(pool.map(lambda s: [str(d) for d in _check(s)], sources * 4))
+    assert resultado == esperado * 4
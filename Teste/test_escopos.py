@@ -0,0 +1,55 @@
+import io
+import pytest
+from analisador_semantico import SymbolTable, Visitor
+from analisador_sintatico import UChuckParser
+from gerador_codigo import CodeGenerator
+
+SOMBRA = """1 => int a;
+{ 2 => int a; { "x" => string a; <<< a >>>; } a + 1 => a; }
+{ 3.5 => float a; }
+0 => int a_2;
+<<< a, a_2 >>>;"""
+
+
+def _checa(source):
+    ast = UChuckParser().parse(source)
+    Visitor().visit(ast)
+    return ast
+
+
+def test_pilha_de_escopos():
+    table = SymbolTable()
+    table.add("a", 1)
+    table.push_scope()
+    assert table.lookup("a") == 1 and not table.in_scope("a")
+    table.add("a", 2)
+    table.add("b", 3)
+    assert table.lookup("a") == 2 and table.in_scope("a")
+    table.pop_scope()
+    assert table.lookup("a") == 1 and table.lookup("b") is None
+    assert table.symbols == {"a": [1]}
+
+
+def test_sombra_em_bloco():
+    ast = _checa(SOMBRA)
+    gen = CodeGenerator()
+    gen.generate(ast)
+    saida = io.StringIO()
+    gen.show(saida)
+    c = saida.getvalue()
+    # Cada declaração vira uma variável distinta no C
+    for decl in ("int a;", "int a_2;", "char* a_3 = NULL;", "double a_4;", "int a_2_2;"):
+        assert c.count(decl) == 1
+    assert "printf(\"%d\\n\", a);" in c and "printf(\"%d\\n\", a_2_2);" in c
+
+
+@pytest.mark.parametrize("source", [
+    "0 => int a; 1 => int a;",
+    "{ 0 => int a; 1 => int a; }",
+    "{ 0 => int a; } <<< a >>>;",
+    "while (1) { } break;",
+])
+def test_erros_de_escopo(source, capsys):
+    with pytest.raises(SystemExit):
+        _checa(source)
+    assert "SemanticError" in capsys.readouterr().out
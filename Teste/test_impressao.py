@@ -0,0 +1,157 @@
+import glob
+import io
+import json
+import os
+import random
+import compilador
+from analisador_sintatico import UChuckParser, build_tree
+from analisador_semantico import Visitor
+from ast_alguma import Node, represent_node, write_json, write_ndjson
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMAS = sorted(glob.glob(os.path.join(RAIZ, "program*.txt"))
+                   + glob.glob(os.path.join(RAIZ, "Teste", "*.chuck")))
+CADEIA = "1 => int a;\n<<< " + " + ".join(["a"] * 3000) + " >>>;"
+
+
+def _show_recursivo(node, buf, offset=0):
+    # A versão recursiva de Node.show, como referência
+    label = node.__repr__()
+    coord = node.coord
+    if coord and node.__class__.__name__ not in {"ExpressionAsStatement", "VarDecl"}:
+        label += f" @ {coord.line}:{coord.column}"
+    print(" " * offset + label, file=buf)
+    for child_name, child in node.children():
+        if child is not None:
+            _show_recursivo(child, buf, offset + 4)
+        else:
+            print(" " * (offset + 4) + f"{child_name}: None", file=buf)
+
+
+def _build_tree_recursivo(node):
+    if isinstance(node, list):
+        if not node:
+            return
+        node = tuple(node)
+    if not isinstance(node, tuple):
+        yield " " + str(node)
+        return
+    values = [_build_tree_recursivo(n) for n in node]
+    prefixos = [('──', '  ')] if len(values) == 1 else (
+        [('┬─', '│ ')] + [('├─', '│ ')] * (len(values) - 2) + [('└─', '  ')])
+    for (first, other), linhas in zip(prefixos, values):
+        for n, linha in enumerate(linhas):
+            yield (other if n else first) + linha
+
+
+def _aleatoria(r, profundidade):
+    k = r.random()
+    if profundidade > 5 or k < 0.3:
+        return r.choice(["x", 1, 2.5, None])
+    if k < 0.4:
+        return [_aleatoria(r, profundidade + 1) for _ in range(r.randrange(0, 4))]
+    return tuple(_aleatoria(r, profundidade + 1) for _ in range(r.randrange(1, 5)))
+
+
+def test_show_igual_ao_recursivo():
+    for arquivo in PROGRAMAS:
+        ast = UChuckParser().parse(open(arquivo).read())
+        esperado, saida = io.StringIO(), io.StringIO()
+        _show_recursivo(ast, esperado)
+        ast.show(buf=saida, showcoord=True)
+        assert saida.getvalue() == esperado.getvalue(), arquivo
+
+
+def test_build_tree_igual_ao_recursivo():
+    r = random.Random(3)
+    for _ in range(300):
+        arvore = _aleatoria(r, 0)
+        assert build_tree(arvore) == "\n".join(_build_tree_recursivo(arvore))
+
+
+def test_represent_node():
+    ast = UChuckParser().parse("-a => b;")
+    assert represent_node(ast.stmts) == (
+        "[\n"
+        "ExpressionAsStatement(\n"
+        "        expression=ChuckOp(\n"
+        "                       expression=UnaryOp(\n"
+        "                                      op='-',\n"
+        "                                      operand=Location(\n"
+        "                                                  name='a',\n"
+        "                                                  coord=@ 1:2\n"
+        "                                              ),\n"
+        "                                      coord=@ 1:2\n"
+        "                                  ),\n"
+        "                       location=Location(\n"
+        "                                    name='b',\n"
+        "                                    coord=@ 1:7\n"
+        "                                ),\n"
+        "                       coord=@ 1:1\n"
+        "                   ),\n"
+        "        coord=@ 1:1\n"
+        "    )\n"
+        "]")
+
+
+def test_represent_node_nomes_dos_campos():
+    texto = represent_node(UChuckParser().parse("if (a) b; else c; while (d) e;"))
+    for nome in ("condition=", "if_body=", "else_body="):
+        assert nome in texto
+    for nome in ("test=", "consequence=", "alternative="):
+        assert nome not in texto
+
+
+def test_arvores_profundas():
+    ast = UChuckParser().parse(CADEIA)
+    saida = io.StringIO()
+    ast.show(buf=saida)
+    assert saida.getvalue().count("Location: a") == 3000
+    assert represent_node(ast).count("name='a'") == 3001
+    saida = io.StringIO()
+    write_json(ast, saida)
+    assert saida.getvalue().count('"name":"a"') == 3001
+    arvore = "x"
+    for _ in range(3000):
+        arvore = (arvore, "y")
+    assert build_tree(arvore).count(" y") == 3000
+
+
+def _nos(ast):
+    pilha = [ast]
+    while pilha:
+        no = pilha.pop()
+        yield no
+        pilha.extend(reversed([filho for _, filho in no.children() if isinstance(filho, Node)]))
+
+
+def test_json_e_ndjson():
+    ast = UChuckParser().parse(open(PROGRAMAS[0]).read())
+    Visitor().visit(ast)
+    saida = io.StringIO()
+    write_json(ast, saida)
+    documento = json.loads(saida.getvalue())
+    assert documento["node"] == "Program" and documento["coord"] is None
+    primeiro = documento["stmts"][0]["expression"]
+    assert primeiro["node"] == "ChuckOp" and primeiro["uchuck_type"] == "int"
+    assert primeiro["location"]["dtype"] == {
+        "node": "Type", "coord": [2, 6], "uchuck_type": "int", "typename": "int"}
+
+    saida = io.StringIO()
+    write_ndjson(ast, saida)
+    linhas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    nos = list(_nos(ast))
+    assert sorted(linha["node"] for linha in linhas) == sorted(type(no).__name__ for no in nos)
+    assert [linha["id"] for linha in linhas] == list(range(len(nos)))
+    assert linhas[0]["parent"] is None
+    assert all(linha["parent"] < linha["id"] for linha in linhas[1:])
+    assert linhas[1]["field"] == "stmts" and linhas[1]["index"] == 0
+
+
+def test_parse_format(tmp_path, capsys):
+    programa = os.path.join(RAIZ, "program1.txt")
+    assert compilador.main(["parse", programa, "--format", "json"]) == 0
+    assert json.loads(capsys.readouterr().out)["node"] == "Program"
+    assert compilador.main(["parse", programa, "--format", "ndjson"]) == 0
+    linhas = capsys.readouterr().out.splitlines()
+    assert json.loads(linhas[-1])["parent"] is not None
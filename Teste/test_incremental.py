@@ -0,0 +1,75 @@
+import io
+import os
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+from compilacao_incremental import IncrementalCompiler
+from gerador_codigo import CodeGenerator
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOURCE = """0 => int a; 1.5 => float x;
+while (a < 3) { a + 1 => a; <<< x * 2.0 >>>; }
+{ "s" => string a; <<< a + "!" >>>; }
+<<< a >>>;
+"""
+
+
+def _completo(source):
+    ast = UChuckParser().parse(source)
+    diagnostics = Visitor().check(ast)
+    if diagnostics:
+        return [str(d) for d in diagnostics]
+    gen = CodeGenerator()
+    gen.generate(ast)
+    saida = io.StringIO()
+    gen.show(saida)
+    return saida.getvalue()
+
+
+def _incremental(compiler, source):
+    diagnostics = compiler.update(source)
+    if diagnostics:
+        return [str(d) for d in diagnostics]
+    saida = io.StringIO()
+    compiler.show(saida)
+    return saida.getvalue()
+
+
+def test_so_o_que_mudou():
+    compiler = IncrementalCompiler()
+    assert _incremental(compiler, SOURCE) == _completo(SOURCE)
+    assert (compiler.rechecked, compiler.reused) == (5, 0)
+    for source, rechecked in [
+            (SOURCE.replace("1.5", "2.5"), 1),
+            # Temporários e labels renumerados sem checar de novo
+            ("<<< 1 + 2 >>>;\n" + SOURCE, 1),
+            # Quem usa x precisa ser checado de novo
+            (SOURCE.replace("1.5 => float x", "1 => int x").replace("2.0", "2"), 2),
+            (SOURCE.replace("<<< a >>>", "<<< a + 1 >>>"), 1)]:
+        compiler.update(SOURCE)
+        assert _incremental(compiler, source) == _completo(source)
+        assert compiler.rechecked == rechecked
+
+
+def test_erros_e_coordenadas():
+    compiler = IncrementalCompiler()
+    source = SOURCE + "<<< b >>>;\n"
+    assert _incremental(compiler, source) == ["SemanticError: 'b' is not defined @ 5:5"]
+    source = "\n\n" + source.replace("0 => int a;", "0 => int  a;")
+    assert _incremental(compiler, source) == ["SemanticError: 'b' is not defined @ 7:5"]
+    assert compiler.rechecked == 1
+    source = source.replace("<<< a >>>", "2 => int b; <<< a >>>")
+    assert _incremental(compiler, source) == _completo(source)
+    saida, esperado = io.StringIO(), io.StringIO()
+    compiler.program.show(buf=saida, showcoord=True)
+    UChuckParser().parse(source).show(buf=esperado, showcoord=True)
+    assert saida.getvalue() == esperado.getvalue()
+
+
+def test_programas():
+    compiler = IncrementalCompiler()
+    for nome in sorted(os.listdir(RAIZ)):
+        if nome.startswith("program") and nome.endswith(".txt"):
+            with open(os.path.join(RAIZ, nome)) as f:
+                source = f.read()
+            assert _incremental(compiler, source) == _completo(source)
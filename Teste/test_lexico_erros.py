@@ -0,0 +1,57 @@
+import io
+from analisador_lexico import UChuckLexer
+from analisador_sintatico import UChuckParser
+
+
+def _lex(source, max_errors=None):
+    erros = []
+    lexer = UChuckLexer(lambda msg, x, y: erros.append((msg, x, y)), max_errors)
+    return [tok.value for tok in lexer.tokenize(source)], erros
+
+
+def test_caractere_ilegal_isolado():
+    assert _lex("a @ b") == (["a", "b"], [("Illegal character '@'", 1, 3)])
+
+
+def test_caracteres_ilegais_agrupados():
+    assert _lex("a @#$ b\n`~") == (["a", "b"], [
+        ("Illegal characters '@#$'", 1, 3),
+        ("Illegal characters '`~'", 2, 1),
+    ])
+    # Uma sequência longa aparece resumida
+    tokens, erros = _lex("x " + "é" * 1000 + " y")
+    assert tokens == ["x", "y"]
+    assert erros == [("Illegal characters %s... (1000 characters)" % repr("é" * 20), 1, 3)]
+
+
+def test_bloco_binario_um_erro():
+    blob = bytes(range(128, 256)).decode("latin-1") * 8000
+    tokens, erros = _lex("a => b;" + blob + "\nc;")
+    assert tokens == ["a", "=>", "b", ";", "c", ";"]
+    assert len(erros) == 1
+
+
+def test_limite_de_erros():
+    tokens, erros = _lex("a @ b @ c @ d @ e", max_errors=2)
+    assert tokens == ["a", "b"]
+    assert erros == [
+        ("Illegal character '@'", 1, 3),
+        ("Illegal character '@'", 1, 7),
+        ("Too many errors, lexing stopped", 1, 7),
+    ]
+    # O mesmo vale para a leitura em blocos
+    erros = []
+    lexer = UChuckLexer(lambda msg, x, y: erros.append((msg, x, y)), 2)
+    source = io.StringIO("a @ b @ c @ d @ e" * 1000)
+    assert [tok.value for tok in lexer.tokenize_stream(source, chunk_size=4)] == ["a", "b"]
+    assert len(erros) == 3
+
+
+def test_limite_de_erros_no_parser():
+    erros = []
+    parser = UChuckParser(lambda msg, x, y: erros.append((msg, x, y)), max_errors=1)
+    parser.parse("1 => int a; @ 2 => int b; @")
+    assert erros == [
+        ("Illegal character '@'", 1, 13),
+        ("Too many errors, lexing stopped", 1, 13),
+    ]
@@ -0,0 +1,74 @@
+import time
+import pytest
+from analisador_lexico import UChuckLexer
+from conftest import medicao
+
+# Entradas patológicas para as regras de comentário e de string. Cada uma
+# é gerada com n caracteres (aproximadamente)
+CASOS = {
+    "comentario_grande": lambda n: "/*" + "abc def\n" * (n // 8) + "*/ a",
+    "comentario_sem_fim": lambda n: "/*" + "abc def\n" * (n // 8),
+    "asteriscos": lambda n: "/*" + "*" * n + "/ a",
+    "asteriscos_sem_fim": lambda n: "/*" + "* " * (n // 2) + "*" * 10,
+    "string_sem_fim": lambda n: 'a "' + "x" * n,
+    "string_escapes_sem_fim": lambda n: 'a "' + '\\"' * (n // 2),
+}
+
+
+def _tempo_por_caractere(source):
+    melhor = None
+    for _ in range(3):
+        lexer = UChuckLexer(lambda msg, x, y: None)
+        inicio = time.perf_counter()
+        for _ in lexer.tokenize(source):
+            pass
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor / len(source)
+
+
+def _escala(nome, tamanhos, folga):
+    tempos = [_tempo_por_caractere(CASOS[nome](n)) for n in tamanhos]
+    # Com custo linear o tempo por caractere fica praticamente constante;
+    # com custo quadrático ele cresce junto com n (10x a cada tamanho)
+    for menor, maior in zip(tempos, tempos[1:]):
+        assert maior < folga * menor
+
+
+# Nos tamanhos pequenos o custo fixo do lexer pesa mais no tempo por
+# caractere, o que só deixa o teste mais leniente; um custo quadrático
+# ainda passa muito da folga
+@pytest.mark.parametrize("nome", sorted(CASOS))
+def test_tempo_linear(nome):
+    _escala(nome, [10_000, 100_000], 5)
+
+
+@medicao
+@pytest.mark.parametrize("nome", sorted(CASOS))
+def test_tempo_linear_1m(nome):
+    _escala(nome, [100_000, 1_000_000], 3)
+
+
+def _erros(source):
+    erros = []
+    lexer = UChuckLexer(lambda msg, x, y: erros.append((msg, x, y)))
+    tokens = [(tok.type, tok.value) for tok in lexer.tokenize(source)]
+    return tokens, erros
+
+
+def test_diagnosticos_comentario():
+    assert _erros("a /* b\n*/ c") == ([("ID", "a"), ("ID", "c")], [])
+    assert _erros("/**/ a") == ([("ID", "a")], [])
+    assert _erros("a\n/* b") == ([("ID", "a")], [("Unterminated comment", 2, 1)])
+    # Os '*' finais de um comentário sem fim continuam sendo analisados
+    assert _erros("/* b ***") == (
+        [("TIMES", "*"), ("TIMES", "*")], [("Unterminated comment", 1, 1)])
+
+
+def test_diagnosticos_string():
+    assert _erros('"a\\"b"') == ([("STRING_LIT", '"a\\"b"')], [])
+    assert _erros('a "b') == ([("ID", "a")], [("Unterminated string literal", 1, 3)])
+    assert _erros('"b\\') == ([], [("Unterminated string literal", 1, 1)])
+    # Aspas sem par antes do fim do texto são um caractere ilegal
+    assert _erros('"b\nc') == (
+        [("ID", "b"), ("ID", "c")], [("Illegal character '\"'", 1, 1)])
@@ -0,0 +1,56 @@
+import io
+import mmap
+import tracemalloc
+from analisador_lexico import UChuckLexer
+
+SOURCE = """/* print values of factorials */
+1 => int n;
+1.5e+3 => float f; .25 => f;
+"texto com \\"aspas\\"" => string s;
+<<< n, f, s >>>; // comentario de linha
+/* comentario **
+   de bloco */ while( n <= 10 && n != 3 || !n ) { n + 1 => n; }
+@ "sem fim"""
+
+
+def _tokens(tokens):
+    return [(t.type, t.value, t.lineno, t.index, t.end) for t in tokens]
+
+
+def _lexer(erros):
+    return UChuckLexer(lambda msg, x, y: erros.append((msg, x, y)))
+
+
+def test_stream_igual_ao_tokenize_em_qualquer_bloco():
+    erros = []
+    esperado = _tokens(_lexer(erros).tokenize(SOURCE))
+    esperado_erros = list(erros)
+    for tamanho in (1, 2, 3, 7, 64):
+        erros.clear()
+        lexer = _lexer(erros)
+        tokens = _tokens(lexer.tokenize_stream(io.StringIO(SOURCE), chunk_size=tamanho))
+        assert tokens == esperado
+        assert erros == esperado_erros
+
+
+def test_stream_sobre_mmap(tmp_path):
+    arquivo = tmp_path / "prog.uck"
+    arquivo.write_text(SOURCE + " \"çã\" => s;", encoding="utf-8")
+    texto = arquivo.read_text(encoding="utf-8")
+    esperado = _tokens(_lexer([]).tokenize(texto))
+    with open(arquivo, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        assert _tokens(_lexer([]).tokenize_stream(m, chunk_size=5)) == esperado
+
+
+def test_stream_memoria_constante():
+    linha = "a + 1 => a; /* c */ <<< a >>>;\n"
+    source = io.StringIO(linha * 30_000)   # ~1 MB
+    lexer = _lexer([])
+    tracemalloc.start()
+    try:
+        n = sum(1 for _ in lexer.tokenize_stream(source, chunk_size=4096, keep_lines=False))
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert n == 10 * 30_000
+    assert pico < 256 * 1024
@@ -0,0 +1,52 @@
+import pytest
+from analisador_semantico import Visitor
+from analisador_sintatico import UChuckParser
+from ast_alguma import NodeVisitor
+from tabela_nomes import NameTable
+
+SOURCE = '0 => int valor; valor + 1 => valor; <<< valor, "fim", 1, "fim" >>>;'
+
+
+class _Coleta(NodeVisitor):
+    def __init__(self):
+        self.nomes = []
+        self.literais = []
+
+    def visit_ID(self, node):
+        self.nomes.append(node.name)
+
+    def visit_Location(self, node):
+        self.nomes.append(node.name)
+
+    def visit_Literal(self, node):
+        self.literais.append(node.valor)
+
+
+def test_tabela():
+    names = NameTable()
+    a = names.intern("".join(["val", "or"]))
+    assert names.intern("".join(["va", "lor"])) is a
+    assert names.intern("x") == "x"
+    assert len(names) == 2 and "x" in names and "y" not in names
+    assert names.constant("".join(["1", "0"])) is names.constant("".join(["10"]))
+
+
+@pytest.mark.parametrize("engine", ["lalr", "descent"])
+def test_nomes_compartilhados(engine):
+    parser = UChuckParser(engine=engine)
+    coleta = _Coleta()
+    coleta.visit(parser.parse(SOURCE))
+    assert len(coleta.nomes) == 4
+    assert all(nome is coleta.nomes[0] for nome in coleta.nomes)
+    assert "valor" in parser.names and len(parser.names) == 1
+    fim = [v for v in coleta.literais if v == '"fim"']
+    assert len(fim) == 2 and fim[0] is fim[1]
+
+
+def test_tabela_de_simbolos_usa_os_nomes_da_arvore():
+    ast = UChuckParser().parse(SOURCE)
+    Visitor().visit(ast)
+    coleta = _Coleta()
+    coleta.visit(ast)
+    nome, = ast.symtab.symbols
+    assert nome is coleta.nomes[0]
@@ -0,0 +1,68 @@
+import random
+import time
+from analisador_lexico import UChuckLexer
+from conftest import medicao
+
+BASE = open("program2.txt").read() + open("program9.txt").read()
+TRECHOS = ['/*', '*/', '"', '\n', 'a', '1', '.', '5', 'e', '+', '=>', ' ',
+           '<<<', '>>>', '//', '\\', 'int', '@', ';', '*', '/', '"x"']
+
+
+def _lexer():
+    return UChuckLexer(lambda msg, x, y: None)
+
+
+def _tokens(tokens):
+    return [repr(t) for t in tokens]
+
+
+def test_relex_igual_a_tokenizar_de_novo():
+    rnd = random.Random(0)
+    for _ in range(40):
+        texto = BASE
+        lexer = _lexer()
+        tokens = lexer.tokenize_compact(texto)
+        for _ in range(25):
+            offset = rnd.randrange(len(texto) + 1)
+            apagados = min(rnd.choice([0, 0, 1, 3]), len(texto) - offset)
+            inserido = ''.join(rnd.choice(TRECHOS) for _ in range(rnd.randrange(4)))
+            lexer.relex(tokens, offset, apagados, inserido)
+            texto = texto[:offset] + inserido + texto[offset + apagados:]
+            assert tokens.text == texto
+            assert _tokens(tokens) == _tokens(_lexer().tokenize(texto))
+
+
+def test_relex_comentario_e_string_atravessando_a_edicao():
+    texto = 'a => b; /* x */ c => d; "s" => e;\nf => g;'
+    lexer = _lexer()
+    tokens = lexer.tokenize_compact(texto)
+    # Apagar o fechamento do comentário engole o resto do arquivo
+    fim = texto.index('*/')
+    lexer.relex(tokens, fim, 2, '')
+    assert [t.value for t in tokens] == ['a', '=>', 'b', ';']
+    # ... e recolocá-lo mais adiante recupera os tokens seguintes
+    texto = tokens.text
+    lexer.relex(tokens, texto.index('"s"'), 0, '*/')
+    assert [t.value for t in tokens][4:] == ['"s"', '=>', 'e', ';', 'f', '=>', 'g', ';']
+    # Abrir uma string no meio muda o tipo dos tokens até a próxima aspa
+    lexer.relex(tokens, 0, 0, '"')
+    assert tokens.type(0) == 'STRING_LIT'
+    assert _tokens(tokens) == _tokens(_lexer().tokenize(tokens.text))
+
+
+@medicao
+def test_relex_muito_mais_rapido_que_tokenizar_tudo():
+    texto = 'value * n => value; <<< "x", 1.5 >>>;\n' * 50_000
+    lexer = _lexer()
+    inicio = time.perf_counter()
+    tokens = lexer.tokenize_compact(texto)
+    completo = time.perf_counter() - inicio
+
+    rnd = random.Random(1)
+    pos = len(texto) // 2
+    inicio = time.perf_counter()
+    for _ in range(50):
+        pos += rnd.randrange(-40, 40)
+        lexer.relex(tokens, pos, 0, 'a')
+    incremental = (time.perf_counter() - inicio) / 50
+    assert incremental * 50 < completo
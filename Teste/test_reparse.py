@@ -0,0 +1,152 @@
+import io
+import os
+import random
+import time
+from analisador_sintatico import UChuckParser
+from compilacao_incremental import IncrementalCompiler
+from conftest import medicao
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE = open(os.path.join(RAIZ, "program2.txt")).read() + open(os.path.join(RAIZ, "program9.txt")).read()
+TRECHOS = ['{', '}', ';', 'a => b;', 'if (x) ', 'else ', 'while (1) { c => d; }', '\n', ' ', 'int z',
+           '=>', 'x', '<<< 1 >>>;', '/*', '*/', '"', '1', ')', '(', 'break;', '{ int q; }']
+
+
+def _quieto(msg, x, y):
+    pass
+
+
+def _arvore(ast):
+    saida = io.StringIO()
+    ast.show(buf=saida, showcoord=True)
+    return saida.getvalue()
+
+
+def _parse(texto, engine="lalr"):
+    # AST de um parse completo, ou None se o texto tem erros
+    parser = UChuckParser(_quieto, engine=engine)
+    try:
+        ast = parser.parse(texto)
+    except AttributeError:
+        # A ação de `expression : MINUS expression` falha no sly
+        return None
+    if ast is None or parser.error_count or parser.lexer.error_count:
+        return None
+    return ast
+
+
+def test_reparse_igual_ao_parse_completo():
+    rnd = random.Random(0)
+    for engine in ("lalr", "descent"):
+        for _ in range(8):
+            texto = BASE
+            parser = UChuckParser(_quieto, engine=engine)
+            ast = parser.parse(texto)
+            for _ in range(25):
+                offset = rnd.randrange(len(texto) + 1)
+                apagados = min(rnd.choice([0, 0, 1, 2, 5]), len(texto) - offset)
+                inserido = ''.join(rnd.choice(TRECHOS) for _ in range(rnd.randrange(3)))
+                novo = texto[:offset] + inserido + texto[offset + apagados:]
+                esperado = _parse(novo, engine)
+                if esperado is None:
+                    continue
+                ast = parser.reparse(ast, texto, offset, apagados, inserido)
+                texto = novo
+                assert _arvore(ast) == _arvore(esperado)
+                assert ast.stmts[0].lines.starts == esperado.stmts[0].lines.starts
+
+
+def test_reparse_mantem_os_nos_fora_da_edicao():
+    texto = "0 => int a;\nwhile (a < 3) {\n  a + 1 => a;\n  <<< a >>>;\n}\n<<< a >>>;\n"
+    parser = UChuckParser()
+    ast = parser.parse(texto)
+    antes = list(ast.stmts)
+    corpo = list(ast.stmts[1].body.stmts)
+    # Só a instrução do bloco em volta da edição (e a anterior) muda
+    offset = texto.index("<<< a >>>;\n}")
+    ast2 = parser.reparse(ast, texto, offset, 0, "2 => int b;\n  ")
+    texto = texto[:offset] + "2 => int b;\n  " + texto[offset:]
+    assert ast2 is ast
+    assert ast.stmts == antes
+    assert ast.stmts[1].body.stmts[2] is corpo[1]
+    assert ast.stmts[1].body.stmts[0] is not corpo[0]
+    assert str(ast.stmts[2].coord) == "@ 7:1"
+    assert str(corpo[1].coord) == "@ 5:3"
+    assert _arvore(ast) == _arvore(_parse(texto))
+
+
+def test_reparse_else_e_chaves():
+    texto = "if (1) <<< 1 >>>;\n<<< 2 >>>;\n{ 3 => int c; }\n"
+    parser = UChuckParser()
+    ast = parser.parse(texto)
+    # O "else" inserido se junta ao "if" de antes
+    offset = texto.index("<<< 2")
+    ast = parser.reparse(ast, texto, offset, 0, "else ")
+    texto = texto[:offset] + "else " + texto[offset:]
+    assert len(ast.stmts) == 2 and ast.stmts[0].alternative is not None
+    assert _arvore(ast) == _arvore(_parse(texto))
+    # Tirar o "}" do bloco faz a análise sair dele
+    offset = texto.index("}")
+    ast = parser.reparse(ast, texto, offset, 1, "<<< c >>>; }")
+    texto = texto[:offset] + "<<< c >>>; }" + texto[offset + 1:]
+    assert _arvore(ast) == _arvore(_parse(texto))
+
+
+def test_reparse_com_erro_faz_o_parse_completo():
+    erros = []
+    parser = UChuckParser(lambda msg, x, y: erros.append((msg, x, y)))
+    texto = "0 => int a;\n<<< a >>>;\n"
+    ast = parser.reparse(parser.parse(texto), texto, len(texto), 0, "@ => a;\n")
+    assert erros == [("Illegal character '@'", 3, 1)]
+    assert parser.lexer.error_count == 1
+
+
+def test_reparse_quebra_dentro_de_string():
+    # O lexer não conta a quebra dentro da string como linha
+    texto = '<<< "a" >>>;\n<<< 1 >>>;\n'
+    parser = UChuckParser()
+    ast = parser.parse(texto)
+    ast = parser.reparse(ast, texto, 6, 0, "\n")
+    assert _arvore(ast) == _arvore(_parse('<<< "a\n" >>>;\n<<< 1 >>>;\n'))
+    assert str(ast.stmts[1].coord) == "@ 2:1"
+
+
+def test_compilador_incremental_com_edit():
+    texto = "0 => int a;\nwhile (a < 3) { a + 1 => a; <<< a >>>; }\n<<< a >>>;\n"
+    compiler = IncrementalCompiler()
+    compiler.update(texto)
+    for offset, apagados, inserido in [(texto.index("<<< a >>>; }"), 0, "<<< b >>>; "),
+                                       (0, 0, "2 => int b;\n"),
+                                       (0, 0, "@"),
+                                       (0, 1, "")]:
+        texto = texto[:offset] + inserido + texto[offset + apagados:]
+        diagnosticos = compiler.edit(offset, apagados, inserido)
+        completo = IncrementalCompiler()
+        esperado = completo.update(texto)
+        if esperado is None:
+            assert diagnosticos is None
+            continue
+        assert [str(d) for d in diagnosticos] == [str(d) for d in esperado]
+        assert _arvore(compiler.program) == _arvore(completo.program)
+    saida, esperado = io.StringIO(), io.StringIO()
+    compiler.show(saida)
+    completo.show(esperado)
+    assert saida.getvalue() == esperado.getvalue()
+
+
+@medicao
+def test_reparse_muito_mais_rapido_que_o_parse_completo():
+    texto = "0 => int soma;\n" + "soma + 1 => soma; { soma * 2 => int v; <<< v >>>; }\n" * 2_000
+    parser = UChuckParser()
+    inicio = time.perf_counter()
+    ast = parser.parse(texto)
+    completo = time.perf_counter() - inicio
+
+    rnd = random.Random(1)
+    inicio = time.perf_counter()
+    for _ in range(20):
+        offset = texto.index("soma * 2", rnd.randrange(len(texto) // 2)) + 7
+        ast = parser.reparse(ast, texto, offset, 1, "3")
+        texto = texto[:offset] + "3" + texto[offset + 1:]
+    incremental = (time.perf_counter() - inicio) / 20
+    assert incremental * 20 < completo
@@ -0,0 +1,254 @@
+import contextlib
+import glob
+import io
+import os
+import random
+import time
+import pytest
+import analisador_sintatico
+from conftest import medicao
+from analisador_lexico import UChuckLexer
+from analisador_sintatico import UChuckParser
+from ast_alguma import Node, Coord
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMAS = sorted(glob.glob(os.path.join(RAIZ, "program*.txt"))
+                   + glob.glob(os.path.join(RAIZ, "Teste", "*.chuck")))
+
+
+def _descreve(ast):
+    # Todos os campos dos nós, com as coordenadas
+    partes = []
+
+    def visita(valor):
+        if isinstance(valor, Node):
+            partes.append("(" + type(valor).__name__)
+            for nome in dict.fromkeys(nome for cls in type(valor).__mro__
+                                      for nome in getattr(cls, "__slots__", ())):
+                if nome not in ("position", "lines"):
+                    visita(getattr(valor, nome, "-"))
+            visita(valor.coord)
+            partes.append(")")
+        elif isinstance(valor, Coord):
+            partes.append("%s:%s" % (valor.line, valor.column))
+        elif isinstance(valor, list):
+            partes.append("[")
+            for item in valor:
+                visita(item)
+            partes.append("]")
+        else:
+            partes.append(repr(valor))
+
+    visita(ast)
+    return " ".join(partes)
+
+
+def _parse(source, engine):
+    saida = io.StringIO()
+    parser = UChuckParser(lambda msg, x, y: print("Lexical error: %s at %d:%d" % (msg, x, y)),
+                          engine=engine)
+    with contextlib.redirect_stdout(saida):
+        try:
+            resultado = _descreve(parser.parse(source))
+        except Exception as e:
+            resultado = "%s: %s" % (type(e).__name__, e)
+    return resultado, saida.getvalue()
+
+
+@pytest.mark.parametrize("arquivo", PROGRAMAS, ids=os.path.basename)
+def test_programas_iguais_ao_lalr(arquivo):
+    with open(arquivo) as f:
+        source = f.read()
+    assert _parse(source, "descent") == _parse(source, "lalr")
+
+
+OPERANDOS = ["a", "b", "1", "2.5", '"s"', "true", "false"]
+OPERADORES = ["+", "-", "*", "/", "%", "<", "<=", ">", ">=", "==", "!=", "&&", "||"]
+
+
+def _expressao(rnd, nivel):
+    k = rnd.random()
+    if nivel > 4 or k < 0.3:
+        return rnd.choice(OPERANDOS)
+    if k < 0.5:
+        return "%s %s %s" % (_expressao(rnd, nivel + 1), rnd.choice(OPERADORES),
+                             _expressao(rnd, nivel + 1))
+    if k < 0.6:
+        return rnd.choice("-+!") + _expressao(rnd, nivel + 1)
+    if k < 0.7:
+        return "(%s)" % _expressao(rnd, nivel + 1)
+    if k < 0.75:
+        return "<<< %s >>>" % _expressao(rnd, nivel + 1)
+    if k < 0.85:
+        return "%s => %s" % (_expressao(rnd, nivel + 1),
+                             rnd.choice(["int a", "float b", "a", "T c", "a + b"]))
+    if k < 0.9:
+        return rnd.choice(["int a", "float x", "T a"])
+    return "%s, %s" % (_expressao(rnd, nivel + 1), _expressao(rnd, nivel + 1))
+
+
+def _comando(rnd, nivel):
+    k = rnd.random()
+    if nivel > 3 or k < 0.5:
+        return _expressao(rnd, nivel) + ";"
+    if k < 0.6:
+        senao = " else " + _comando(rnd, nivel + 1) if rnd.random() < 0.5 else ""
+        return "if (%s) %s%s" % (_expressao(rnd, nivel), _comando(rnd, nivel + 1), senao)
+    if k < 0.7:
+        return "while (%s) %s" % (_expressao(rnd, nivel), _comando(rnd, nivel + 1))
+    if k < 0.8:
+        return "{ %s }" % " ".join(_comando(rnd, nivel + 1) for _ in range(rnd.randrange(3)))
+    return rnd.choice(["break;", "continue;", ";"])
+
+
+def test_programas_gerados_iguais_ao_lalr():
+    rnd = random.Random(11)
+    for _ in range(1500):
+        source = "\n".join(_comando(rnd, 0) for _ in range(rnd.randrange(1, 5)))
+        assert _parse(source, "descent") == _parse(source, "lalr"), source
+
+
+def test_erros_iguais_ao_lalr():
+    # Erros de sintaxe (e a recuperação do sly), erros léxicos no meio e
+    # a ação de `expression : MINUS expression`, que lança AttributeError
+    pedacos = ["a", "1", "int", "T", "+", "-", "!", "*", "&&", "=>", ",", ";", "(", ")",
+               "{", "}", "<<<", ">>>", "if", "else", "while", "break", "@", "\n"]
+    rnd = random.Random(12)
+    for _ in range(3000):
+        source = " ".join(rnd.choice(pedacos) for _ in range(rnd.randrange(1, 12)))
+        assert _parse(source, "descent") == _parse(source, "lalr"), source
+    for source in ["", "- int a;", "- !a + b => c, d;", "1 => - int a;", "a b c;"]:
+        assert _parse(source, "descent") == _parse(source, "lalr"), source
+
+
+def test_volta_ao_lalr_depois_de_varias_instrucoes():
+    # O LALR recomeça na instrução em que a descida parou
+    for source in ["a => int b;\n" * 50 + "- int c;\nb => c;",
+                   "a => int b;\n{ b; }\n- !a + b => c, d;\nwhile (b) b;",
+                   "a => int b;\n" * 50 + "a b c;\nb => c;",
+                   "a;\nif (a) b; else c;\n(a => b;\nc;",
+                   "a;\nb;\n- int c;\nd e;\nf;"]:
+        assert _parse(source, "descent") == _parse(source, "lalr"), source
+
+
+def test_instrucoes_anteriores_ficam_na_arvore(monkeypatch):
+    # Sem erro de sintaxe, a árvore junta as instruções da descida e as
+    # do LALR
+    class Desiste(analisador_sintatico.DescentParser):
+        __slots__ = ()
+
+        def _statement(self):
+            if self.tok.value == "c":
+                raise analisador_sintatico._Fallback
+            return super()._statement()
+
+    monkeypatch.setattr(analisador_sintatico, "DescentParser", Desiste)
+    source = "a => int b;\n{ b; }\nc + 1 => b;\nwhile (b) { c; }"
+    for arena in (False, True):
+        lalr = UChuckParser().parse(source, arena=arena)
+        descent = UChuckParser(engine="descent").parse(source, arena=arena)
+        if arena:
+            lalr, descent = lalr.to_tree(), descent.to_tree()
+        assert _descreve(descent) == _descreve(lalr)
+
+
+def test_guarda_so_os_tokens_da_instrucao(monkeypatch):
+    tamanhos = []
+
+    class Registra(analisador_sintatico.DescentParser):
+        __slots__ = ()
+
+        def _program(self):
+            ast = super()._program()
+            tamanhos.append(len(self.seen))
+            return ast
+
+    monkeypatch.setattr(analisador_sintatico, "DescentParser", Registra)
+    source = "a => int b;\n" * 1000 + "<<< b >>>;"
+    ast = UChuckParser(engine="descent").parse_stream(io.StringIO(source))
+    assert len(ast.stmts) == 1001
+    assert tamanhos == [4]
+
+
+def test_aninhamento_profundo():
+    source = "(" * 3000 + "1" + ")" * 3000 + ";\n" + "while (1) " * 2000 + ";"
+    assert _parse(source, "descent") == _parse(source, "lalr")
+
+
+class _SemLALR:
+    @staticmethod
+    def parse(parser, tokens):
+        raise AssertionError("voltou ao LALR")
+
+
+def test_programas_sem_voltar_ao_lalr(monkeypatch):
+    # Os programas do repositório ficam inteiros na descida
+    monkeypatch.setattr(analisador_sintatico, "Parser", _SemLALR)
+    for arquivo in PROGRAMAS:
+        with open(arquivo) as f:
+            source = f.read()
+        assert UChuckParser(engine="descent").parse(source) is not None, arquivo
+
+
+def test_limite_de_aninhamento(monkeypatch):
+    limite = analisador_sintatico.DescentParser.MAX_DEPTH
+    monkeypatch.setattr(analisador_sintatico, "Parser", _SemLALR)
+    for source in ["a;\n" + "(" * limite + "1" + ")" * limite + ";",
+                   "{ " * (limite - 1) + "if (a) b;" + " }" * (limite - 1),
+                   "while (1) " * (limite - 1) + "<<< a >>>;"]:
+        assert UChuckParser(engine="descent").parse(source) is not None, source
+    monkeypatch.undo()
+    # Um nível a mais passa para o LALR, que começa na instrução funda
+    for source in ["a;\n" + "(" * (limite + 1) + "1" + ")" * (limite + 1) + ";",
+                   "a;\n" + "{ " * limite + "<<< b >>>;" + " }" * limite,
+                   "a;\n" + "!" * (limite + 1) + "b;"]:
+        assert _parse(source, "descent") == _parse(source, "lalr"), source
+
+
+def test_recursionerror_nao_vira_lalr(monkeypatch):
+    # Só o limite explícito desiste; um estouro da pilha é erro de verdade
+    class Estoura(analisador_sintatico.DescentParser):
+        __slots__ = ()
+
+        def _statement(self):
+            raise RecursionError
+
+    monkeypatch.setattr(analisador_sintatico, "DescentParser", Estoura)
+    with pytest.raises(RecursionError):
+        UChuckParser(engine="descent").parse("a;")
+
+
+def test_tokens_prontos_e_stream():
+    with open(PROGRAMAS[0]) as f:
+        source = f.read()
+    esperado = _descreve(UChuckParser().parse(source))
+    parser = UChuckParser(engine="descent")
+    lexer = UChuckLexer(lambda msg, x, y: None)
+    assert _descreve(parser.parse(lexer.tokenize_compact(source))) == esperado
+    assert _descreve(parser.parse_stream(io.StringIO(source))) == esperado
+
+
+def test_motor_desconhecido():
+    with pytest.raises(ValueError):
+        UChuckParser(engine="dfa")
+
+
+def _nos(node):
+    return 1 + sum(_nos(filho) for _, filho in node.children() if filho is not None)
+
+
+@medicao
+def test_descent_mais_rapido():
+    corpus = "\n".join(open(arquivo).read() for arquivo in PROGRAMAS) * 30
+    # Tokens prontos, para medir só o parser
+    tokens = UChuckLexer(lambda msg, x, y: None).tokenize_compact(corpus)
+    melhor = {}
+    for _ in range(3):
+        for engine in ("lalr", "descent"):
+            parser = UChuckParser(engine=engine)
+            inicio = time.perf_counter()
+            ast = parser.parse(tokens)
+            tempo = (time.perf_counter() - inicio) / _nos(ast)
+            melhor[engine] = min(melhor.get(engine, tempo), tempo)
+    # Meta de pelo menos 2x mais nós por segundo; mede de 2.5x a 4x
+    assert melhor["descent"] * 2 < melhor["lalr"]
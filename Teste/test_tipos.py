@@ -0,0 +1,32 @@
+import pytest
+from analisador_semantico import (BINARY_TYPES, UNARY_TYPES, FloatType, IntType,
+                                  StringType, Visitor)
+from analisador_sintatico import UChuckParser
+
+
+def test_tabelas():
+    assert BINARY_TYPES["+", StringType, StringType] is StringType
+    assert BINARY_TYPES["/", FloatType, FloatType] is FloatType
+    assert BINARY_TYPES["<", FloatType, FloatType] is IntType
+    assert ("+", IntType, FloatType) not in BINARY_TYPES
+    assert ("&&", FloatType, FloatType) not in BINARY_TYPES
+    assert UNARY_TYPES["!", IntType] is IntType and ("!", FloatType) not in UNARY_TYPES
+
+
+def test_tipos_das_expressoes():
+    ast = UChuckParser().parse('1.5 * 2.0 => float f; "a" + "b" => string s; f < f => int c;')
+    Visitor().visit(ast)
+    assert [stmt.expression.expression.uchuck_type for stmt in ast.stmts] == [
+        FloatType, StringType, IntType]
+
+
+@pytest.mark.parametrize("source, msg", [
+    ("1 + 2.0 => int a;", "Binary operator '+' does not have matching LHS/RHS types @ 1:1"),
+    ('"a" - "b" => string s;', "Binary operator '-' is not supported by type 'string' @ 1:1"),
+    ("-\"x\" => string s;", "Unary operator '-' is not supported by type 'string' @ 1:2"),
+    ("1 => float f;", "Cannot assign type 'int' to type 'float' @ 1:1"),
+])
+def test_mensagens(source, msg, capsys):
+    with pytest.raises(SystemExit):
+        Visitor().visit(UChuckParser().parse(source))
+    assert capsys.readouterr().out == "SemanticError: %s\n" % msg
@@ -0,0 +1,38 @@
+import tracemalloc
+from analisador_lexico import UChuckLexer, TokenBuffer
+from analisador_sintatico import UChuckParser
+
+SOURCE = """1 => int n;
+"linha
+dupla" => string s;
+while( n < 10 ) { <<< n, s >>>; n + 1 => n; } @
+"""
+
+
+def test_buffer_reproduz_tokens():
+    lexer = UChuckLexer(lambda msg, x, y: None)
+    esperado = [repr(t) for t in lexer.tokenize(SOURCE)]
+    tokens = lexer.tokenize_compact(SOURCE)
+    assert isinstance(tokens, TokenBuffer)
+    assert [repr(t) for t in tokens] == esperado
+    assert [tokens.value(i) for i in range(len(tokens))] == [t.value for t in tokens]
+
+
+def test_parse_com_buffer_gera_mesma_arvore(capsys):
+    parser = UChuckParser(lambda msg, x, y: None)
+    parser.parse(SOURCE).show(showcoord=True)
+    esperado = capsys.readouterr().out
+    parser.parse(parser.lexer.tokenize_compact(SOURCE)).show(showcoord=True)
+    assert capsys.readouterr().out == esperado
+
+
+def test_buffer_compacto():
+    source = 'value * n => value; <<< "x", 1.5 >>>;\n' * 5000
+    lexer = UChuckLexer(lambda msg, x, y: None)
+    tracemalloc.start()
+    try:
+        tokens = lexer.tokenize_compact(source)
+        usado, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert usado / len(tokens) < 32
@@ -0,0 +1,88 @@
+import contextlib
+import glob
+import io
+import os
+import random
+import time
+import pytest
+from analisador_lexico import UChuckLexer
+from analisador_sintatico import UChuckParser
+from conftest import medicao
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMAS = sorted(glob.glob(os.path.join(RAIZ, "program*.txt"))
+                   + glob.glob(os.path.join(RAIZ, "Teste", "*.chuck")))
+
+
+@pytest.mark.parametrize("arquivo", PROGRAMAS, ids=os.path.basename)
+def test_programas_validos(arquivo):
+    with open(arquivo) as f:
+        source = f.read()
+    parser = UChuckParser()
+    assert parser.validate(source) is None
+    assert parser.validate_stream(io.StringIO(source)) is None
+    assert parser.validate(UChuckLexer(lambda msg, x, y: None).tokenize_compact(source)) is None
+
+
+def test_erros():
+    parser = UChuckParser()
+    assert parser.validate("x;\n  y z w;") == ("Syntax error near the symbol w", 2, 7)
+    assert parser.validate("1 => int a") == ("Syntax error at the end of input", 1, 11)
+    assert parser.validate("") == ("Syntax error at the end of input", 1, 1)
+    assert parser.validate("a @ b;\n$") == ("Lexical error: Illegal character '@'", 1, 3)
+    assert parser.validate("a;\n/* c") == ("Lexical error: Unterminated comment", 2, 1)
+    # O erro de sintaxe vem antes do erro léxico
+    assert parser.validate("a + ; @") == ("Syntax error near the symbol ;", 1, 5)
+    tokens = UChuckLexer(lambda msg, x, y: None).tokenize_compact("a;\n{ b")
+    assert parser.validate(tokens) == ("Syntax error at the end of input", 2, 4)
+
+
+def test_nada_impresso(capsys):
+    parser = UChuckParser()
+    parser.validate("a @ b")
+    parser.validate("a + ;")
+    assert capsys.readouterr().out == ""
+    # O error_func do lexer volta ao normal depois
+    parser.parse("a @ b;")
+    assert capsys.readouterr().out == "Lexical error: Illegal character '@' at 1:3\n"
+
+
+def test_primeiro_erro_igual_ao_parse():
+    pedacos = ["a", "1", "int", "T", "+", "-", "!", "*", "&&", "=>", ",", ";", "(", ")",
+               "{", "}", "<<<", ">>>", "if", "else", "while", "break", "@", "\n"]
+    rnd = random.Random(13)
+    for _ in range(3000):
+        source = " ".join(rnd.choice(pedacos) for _ in range(rnd.randrange(1, 12)))
+        saida = io.StringIO()
+        parser = UChuckParser(lambda msg, x, y: print("Lexical error: %s at %d:%d" % (msg, x, y)))
+        with contextlib.redirect_stdout(saida):
+            try:
+                parser.parse(source)
+            except AttributeError:
+                continue    # ação de `expression : MINUS expression`
+        primeiro = saida.getvalue().partition("\n")[0]
+        erro = UChuckParser().validate(source)
+        if not primeiro:
+            assert erro is None, source
+        elif primeiro.startswith("Lexical error"):
+            assert "%s at %d:%d" % erro == primeiro, source
+        elif primeiro == "Error at the end of input":
+            assert erro[0] == "Syntax error at the end of input", source
+        else:
+            simbolo = erro[0].partition("near the symbol ")[2]
+            assert primeiro == "Error at line %d near the symbol %s " % (erro[1], simbolo), source
+
+
+@medicao
+def test_validate_mais_rapido():
+    corpus = "\n".join(open(arquivo).read() for arquivo in PROGRAMAS) * 30
+    parser = UChuckParser()
+    melhor = {}
+    for _ in range(3):
+        for modo, funcao in (("parse", parser.parse), ("validate", parser.validate)):
+            inicio = time.perf_counter()
+            funcao(corpus)
+            tempo = time.perf_counter() - inicio
+            melhor[modo] = min(melhor.get(modo, tempo), tempo)
+    # Mede cerca de 5x; a folga evita falhas por ruído de medição
+    assert melhor["validate"] * 2.5 < melhor["parse"]
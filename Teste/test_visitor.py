@@ -0,0 +1,84 @@
+import io
+from analisador_semantico import IntType, Visitor
+from analisador_sintatico import UChuckParser
+from ast_alguma import BinaryOp, Literal, NodeVisitor
+from gerador_codigo import CodeGenerator
+
+
+def _cadeia(termos):
+    return "1 => int a;\n<<< " + " + ".join(["a"] * termos) + " >>>;"
+
+
+def test_cadeia_profunda():
+    ast = UChuckParser().parse(_cadeia(20000))
+    Visitor().visit(ast)
+    raiz = ast.stmts[1].expression.expr
+    assert isinstance(raiz, BinaryOp) and raiz.uchuck_type is IntType
+    gen = CodeGenerator()
+    gen.generate(ast)
+    saida = io.StringIO()
+    gen.show(saida)
+    assert "_t19999 = _t19998 + a;" in saida.getvalue()
+
+
+def test_blocos_aninhados():
+    profundidade = 3000
+    source = ("1 => int a;\n" + "if (a) {\n" * profundidade + "<<< a >>>;\n"
+              + "}\n" * profundidade)
+    ast = UChuckParser().parse(source)
+    Visitor().visit(ast)
+    gen = CodeGenerator()
+    gen.generate(ast)
+    assert gen.function.statements.count('printf("%d\\n", a);') == 1
+
+
+def test_ganchos_pre_e_pos_ordem():
+    class Ordem(NodeVisitor):
+        def __init__(self):
+            self.eventos = []
+
+        def visit_BinaryOp(self, node):
+            self.eventos.append("pre " + node.op)
+            yield node.left
+            self.eventos.append("in " + node.op)
+            yield node.right
+            self.eventos.append("pos " + node.op)
+
+        def visit_Location(self, node):
+            self.eventos.append(node.name)
+
+    visitor = Ordem()
+    visitor.visit(UChuckParser().parse("a + b * c;"))
+    assert visitor.eventos == ["pre +", "a", "in +", "pre *", "b", "in *", "c", "pos *", "pos +"]
+
+
+def test_filho_none_nao_encerra_o_metodo():
+    class Opcionais(NodeVisitor):
+        def __init__(self):
+            self.eventos = []
+
+        def visit_IfStatement(self, node):
+            yield node.condition
+            yield node.if_body
+            yield node.else_body
+            self.eventos.append("pos if")
+
+        def visit_Location(self, node):
+            self.eventos.append(node.name)
+
+        def visit_ExpressionAsStatement(self, node):
+            self.eventos.append("stmt")
+
+    visitor = Opcionais()
+    visitor.visit(UChuckParser().parse("if (a) b;").stmts[0])
+    assert visitor.eventos == ["a", "stmt", "pos if"]
+
+
+def test_tabela_por_classe():
+    class Folhas(NodeVisitor):
+        def visit_Literal(self, node):
+            return node.valor
+
+    assert Folhas().visit(Literal("int", "3")) == "3"
+    assert Literal in Folhas._dispatch
+    assert Folhas._dispatch is not NodeVisitor._dispatch
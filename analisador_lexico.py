@@ -1,16 +1,288 @@
+import re
 import sys
+import codecs
+from array import array
+from bisect import bisect_left, bisect_right
 from sly import Lexer
+from sly.lex import Token
+from tabela_linhas import LineTable
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:     # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# Tamanho padrão (em caracteres) dos blocos lidos por tokenize_stream
+CHUNK_SIZE = 1 << 16
+
+# Quantos caracteres depois do fim de um casamento as regras podem ter
+# examinado (p.ex. '1e+5' ou '<<<'). Um casamento que termina a menos
+# disso do fim do bloco atual pode mudar quando chegar mais entrada.
+STREAM_LOOKAHEAD = 16
+
+# Quantos caracteres de uma sequência de caracteres ilegais aparecem na
+# mensagem de erro (o resto é resumido pelo tamanho)
+ERROR_TEXT_LIMIT = 20
+
+# Trechos sem escapes do corpo de uma string, com e sem quebras de linha
+_STRING_BODY = re.compile(r'[^"\\]*')
+_STRING_LINE = re.compile(r'[^"\\\n]*')
+
+
+def _string_end(run, text, pos):
+    """Offset where the body of a string literal starting at `pos` ends:
+    characters matched by `run` and escapes ('\\' followed by anything
+    but a newline). Each character is looked at once."""
+    size = len(text)
+    while True:
+        pos = run.match(text, pos).end()
+        if pos + 1 < size and text[pos] == '\\' and text[pos + 1] != '\n':
+            pos += 2
+        else:
+            return pos
+
+
+class _NeedMoreInput(Exception):
+    """Raised by a rule of the lexer when its decision depends on text
+    beyond the current window of tokenize_stream."""
+
+
+class _ChunkReader:
+    """Read text from a file object or an mmap, decoding bytes if needed."""
+
+    def __init__(self, source):
+        self.source = source
+        self.decoder = None
+
+    def read(self, size):
+        """Return up to `size` characters ('' at the end of the input)."""
+        while True:
+            data = self.source.read(size)
+            if isinstance(data, str):
+                return data
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder('utf-8')()
+            text = self.decoder.decode(data, final=not data)
+            # Um bloco pode terminar no meio de um caractere multibyte
+            if text or not data:
+                return text
+
+
+class ScannerTables:
+    """Tables used by the "dfa" engine of UChuckLexer.
+
+    They are derived from the rules of a sly Lexer class:
+
+    - `first` maps each ASCII character to what the scanner does when a
+      token starts with it (skip, identifier, newlines, operator, other
+      rules, literal or illegal); other characters use `default`.
+    - Identifiers, newlines and tokens of plain rules (no function, not
+      ignored) are matched together with the ignored characters after
+      them, so runs of blanks cost no extra step.
+    - Rules whose pattern is a plain string (the operators) form a
+      transition table: `trans[state]` maps the next character to a new
+      state and `accept[state]` is (priority, type) when the characters
+      read so far match a rule. Among the rules that match, the one
+      defined first wins, as in sly's master regex. Characters that are
+      a whole operator by themselves go straight to `symbols`.
+    - The remaining rules are matched with a regex built for each first
+      character, holding only the rules that can start with it.
+    """
+
+    SKIP, NAME, NEWLINE, SYMBOL, OPERATOR, TOKENS, RULES, LITERAL, ILLEGAL = range(9)
+    # Com um TokenBuffer, _tokenize_dfa põe em `first` SYMBOL_ID mais o id
+    # do tipo para os operadores de um caractere
+    SYMBOL_ID = 9
+
+    _cache = {}
+
+    @classmethod
+    def for_lexer(cls, lexer_cls):
+        tables = cls._cache.get(lexer_cls)
+        if tables is None:
+            tables = cls._cache[lexer_cls] = cls(lexer_cls)
+        return tables
+
+    def __init__(self, lexer_cls):
+        rules = []
+        for name, value in lexer_cls._rules:
+            plain = isinstance(value, str)
+            if name.startswith('ignore_'):
+                name = name[7:]
+                plain = False
+            pattern = value if isinstance(value, str) else value.pattern
+            parsed = sre_parse.parse(pattern, lexer_cls.reflags)
+            literal = None
+            if isinstance(value, str) and all(op is sre_constants.LITERAL for op, _ in parsed):
+                literal = ''.join(chr(arg) for _, arg in parsed)
+            chars = _first_chars(parsed.data)
+            if chars is None or chars[2] or lexer_cls.reflags & re.IGNORECASE:
+                chars = None    # pode começar com qualquer caractere
+            rules.append((name, pattern, literal, chars, plain))
+
+        # Identificadores: tipo dado direto pela tabela de palavras-chave
+        self.names = dict(lexer_cls._remapping.get('ID', {}))
+        self.names.update(getattr(lexer_cls, 'keywords', {}))
+        self.blanks = '[%s]*' % re.escape(lexer_cls.ignore) if lexer_cls.ignore else ''
+        self.skip = re.compile(self.blanks)
+
+        self.trans = [{}]
+        self.accept = [None]
+        self.first = {}
+        self.starts = {}    # estado depois do primeiro caractere de um operador
+        self.symbols = {}   # operadores de um caractere só
+        self.regexes = {}
+        self.name_re = None
+        self.newline_re = None
+        for code in range(128):
+            c = chr(code)
+            candidates = [r for r in rules if r[3] is None or c in r[3][0]]
+            self.first[c] = self._action(c, candidates, lexer_cls)
+        candidates = [r for r in rules if r[3] is None or r[3][1]]
+        self.default = self._action(None, candidates, lexer_cls)
+
+    def _action(self, c, candidates, lexer_cls):
+        if c is not None and c in lexer_cls.ignore:
+            return self.SKIP
+        if not candidates:
+            return self.LITERAL if c in lexer_cls.literals else self.ILLEGAL
+        if len(candidates) == 1 and candidates[0][0] == 'ID':
+            self.name_re = re.compile('(%s)%s' % (candidates[0][1], self.blanks), lexer_cls.reflags)
+            return self.NAME
+        if len(candidates) == 1 and candidates[0][0] == 'newline':
+            self.newline_re = re.compile('(%s)%s' % (candidates[0][1], self.blanks), lexer_cls.reflags)
+            return self.NEWLINE
+        if c is not None and all(r[2] for r in candidates):
+            for priority, (name, _, literal, _, _) in enumerate(candidates):
+                self._add_literal(literal, (priority, name))
+            state = self.starts[c] = self.trans[0][c]
+            name = self.accept[state] and self.accept[state][1]
+            if (not self.trans[state] and candidates[0][4]
+                    and name not in lexer_cls._remapping):
+                self.symbols[c] = name
+                return self.SYMBOL
+            return self.OPERATOR
+        pattern = '|'.join('(?P<%s>%s)' % (rule[0], rule[1]) for rule in candidates)
+        if all(rule[4] for rule in candidates):
+            self.regexes[c] = re.compile('(?:%s)%s' % (pattern, self.blanks), lexer_cls.reflags)
+            return self.TOKENS
+        self.regexes[c] = re.compile(pattern, lexer_cls.reflags)
+        return self.RULES
+
+    def _add_literal(self, literal, accept):
+        state = 0
+        for c in literal:
+            nxt = self.trans[state].get(c)
+            if nxt is None:
+                nxt = self.trans[state][c] = len(self.trans)
+                self.trans.append({})
+                self.accept.append(None)
+            state = nxt
+        if self.accept[state] is None or accept < self.accept[state]:
+            self.accept[state] = accept
+
+
+def _first_chars(items):
+    """First characters of the matches of a parsed regex.
+
+    Returns (ascii, other, nullable): the ASCII characters a match can
+    start with, whether it can start with any other character and whether
+    it can be empty; or None when any character may start a match.
+    """
+    chars, other = set(), False
+    for op, arg in items:
+        first = _first_chars_op(op, arg)
+        if first is None:
+            return None
+        chars |= first[0]
+        other = other or first[1]
+        if not first[2]:
+            return chars, other, False
+    return chars, other, True
+
+
+def _first_chars_op(op, arg):
+    if op is sre_constants.LITERAL:
+        if arg < 128:
+            return {chr(arg)}, False, False
+        return set(), True, False
+    if op is sre_constants.IN:
+        return _first_chars_in(arg)
+    if op is sre_constants.AT:
+        return set(), False, True
+    if op is sre_constants.SUBPATTERN:
+        # (grupo, flags ligadas, flags desligadas, padrão)
+        return None if arg[1] else _first_chars(arg[3])
+    if op is sre_constants.BRANCH:
+        chars, other, nullable = set(), False, False
+        for alternative in arg[1]:
+            first = _first_chars(alternative)
+            if first is None:
+                return None
+            chars |= first[0]
+            other = other or first[1]
+            nullable = nullable or first[2]
+        return chars, other, nullable
+    if op in _REPEATS:
+        first = _first_chars(arg[2])
+        if first is None:
+            return None
+        return first[0], first[1], first[2] or arg[0] == 0
+    return None
+
+
+def _first_chars_in(items):
+    chars, other = set(), False
+    for op, arg in items:
+        if op is sre_constants.LITERAL:
+            if arg < 128:
+                chars.add(chr(arg))
+            else:
+                other = True
+        elif op is sre_constants.RANGE:
+            chars.update(chr(code) for code in range(arg[0], min(arg[1], 127) + 1))
+            other = other or arg[1] >= 128
+        elif op is sre_constants.CATEGORY and arg in _CATEGORY_CHARS:
+            # \d, \w e \s também casam caracteres fora do ASCII
+            chars.update(_CATEGORY_CHARS[arg])
+            other = True
+        else:
+            return None
+    return chars, other, False
+
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+            getattr(sre_constants, 'POSSESSIVE_REPEAT', sre_constants.MAX_REPEAT)}
+
+_CATEGORY_CHARS = {
+    sre_constants.CATEGORY_DIGIT: '0123456789',
+    sre_constants.CATEGORY_WORD: 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_',
+    sre_constants.CATEGORY_SPACE: ' \t\n\r\f\v\x1c\x1d\x1e\x1f',
+}
+
 
 class UChuckLexer(Lexer):
     """A lexer for the uChuck language."""
 
-    def __init__(self, error_func):
+    def __init__(self, error_func, max_errors=None, engine="sly"):
         """Create a new Lexer.
         An error function. Will be called with an error
         message, line and column as arguments, in case of
         an error during lexing.
+        If max_errors is given, lexing stops after that many errors.
+        The engine used by tokenize (and so by tokenize_compact and
+        relex) is "sly" (sly's master regex) or "dfa" (the tables of
+        ScannerTables); both give the same tokens and errors.
         """
+        if engine not in ("sly", "dfa"):
+            raise ValueError("Unknown lexer engine %r" % (engine,))
         self.error_func = error_func
+        self.max_errors = max_errors
+        self.error_count = 0
+        self.stopped = False
+        self.engine = engine
+        if engine == "dfa":
+            self.tables = ScannerTables.for_lexer(type(self))
 
     # Reserved keywords
     #keywords = {
@@ -77,16 +349,28 @@ class UChuckLexer(Lexer):
     def ignore_comment_line(self, t):
         pass
 
-    # Ignorar comentários de bloco
-    @_(r'/\*([^*]|\*+[^*/])*\*+/')
+    # Ignorar comentários de bloco. O fim é procurado com str.find em vez
+    # de uma regex com retrocesso, que em comentários sem fim (ou com
+    # muitos '*') reexaminava o resto da entrada
+    @_(r'/\*')
     def ignore_comment_block(self, t):
-        self.lineno += t.value.count('\n')
+        text = self.text
+        start = self.index - 2
+        end = text.find('*/', self.index)
+        if end >= 0:
+            self._check_window(end + 2)
+            value = text[start:end + 2]
+            self.lineno += value.count('\n')
+            self.line_table.add_newlines(value, t.index)
+            self.index = end + 2
+            return
 
-
-    # Comentário de bloco mal formatado 
-    #@_(r'/\*([^*]|\*+[^*/])*$')
-    @_(r'/\*([^*]|\*+[^*/])*')
-    def error_unterminated_comment(self, t):
+        # Comentário de bloco mal formatado: vai até o fim do texto, menos
+        # os '*' finais (como fazia a regex antiga)
+        self._check_window(len(text))
+        end = max(self.index, len(text.rstrip('*')))
+        self.line_table.add_newlines(text[start:end], t.index)
+        self.index = end
         self._error("Unterminated comment", t)
 
     
@@ -124,7 +408,7 @@ class UChuckLexer(Lexer):
     RBRACE = r'\}'
 
     # Literais
-    STRING_LIT = r'"([^"\\]|\\.)*"'
+    STRING_LIT = r'"'
     #FLOAT_VAL  = r'\d+\.\d*|\.\d+'
     FLOAT_VAL = r'\d+\.\d+(e[+-]?\d+)?|\d+e[+-]?\d+|\.\d+(e[+-]?\d+)?'
     INT_VAL    = r'\d+'
@@ -135,6 +419,36 @@ class UChuckLexer(Lexer):
 
 
     # Special cases
+    def STRING_LIT(self, t):
+        text = self.text
+        start = self.index - 1
+        end = _string_end(_STRING_BODY, text, self.index)
+        self._check_window(end + 1)
+        if text.startswith('"', end):
+            # A string pode conter quebras de linha (não contadas em lineno)
+            t.value = text[start:end + 1]
+            t.end = t.index + len(t.value)
+            if '\n' in t.value:
+                self.line_table.add_newlines(t.value, t.index)
+            self.index = end + 1
+            return t
+
+        # Sem aspas de fechamento: string não terminada se o resto da
+        # linha vai até o fim do texto (opcionalmente com uma '\\' final)
+        end = _string_end(_STRING_LINE, text, self.index)
+        if text.startswith('\\', end):
+            end += 1
+        if end == len(text) or (end == len(text) - 1 and text[end] == '\n'):
+            t.value = text[start:end]
+            self.index = end
+            self._error("Unterminated string literal", t)
+            return
+
+        # Senão, são só aspas soltas
+        t.value = '"'
+        self.index = start
+        return self.error(t)
+
     def ID(self, t):
       t.type = self.keywords.get(t.value, "ID")
       return t
@@ -143,40 +457,666 @@ class UChuckLexer(Lexer):
     @_(r'\n+')
     def ignore_newline(self, t):
         self.lineno += len(t.value)
+        starts = self.line_table.starts
+        starts.extend(range(t.index + 1, t.index + len(t.value) + 1))
+
+
+    def tokenize(self, text, lineno=1, index=0):
+        self._start(text, index)
+        if self.engine == "dfa":
+            return self._tokenize_dfa(text, lineno, index)
+        return super().tokenize(text, lineno, index)
+
+    def _start(self, text, index):
+        self._reset()
+        if index:
+            # Só a linha onde a análise começa importa para as colunas
+            line_start = text.rfind('\n', 0, index) + 1
+            if line_start:
+                self.line_table.starts.append(line_start)
+
+    def _tokenize_dfa(self, text, lineno, index, tokens=None):
+        """Same loop as sly's tokenize, but the action for each token is
+        chosen by its first character (see ScannerTables).
+
+        With a TokenBuffer `tokens`, the tokens are appended to it instead
+        of yielded, and the common ones never become Token objects.
+        """
+        cls = type(self)
+        tables = self.tables
+        first = tables.first
+        default = tables.default
+        skip = tables.skip.match
+        name_match = tables.name_re.match if tables.name_re else None
+        newline_match = tables.newline_re.match if tables.newline_re else None
+        names = tables.names
+        trans = tables.trans
+        accept = tables.accept
+        starts = tables.starts
+        regexes = tables.regexes
+        token_funcs = cls._token_funcs
+        ignored_tokens = cls._ignored_tokens
+        remapping = cls._remapping
+        literals = cls.literals
+        ignore = cls.ignore
+        line_starts = self.line_table.starts
+        symbols = tables.symbols
+        SKIP, NAME, NEWLINE, SYMBOL, OPERATOR, TOKENS, RULES = (
+            ScannerTables.SKIP, ScannerTables.NAME, ScannerTables.NEWLINE, ScannerTables.SYMBOL,
+            ScannerTables.OPERATOR, ScannerTables.TOKENS, ScannerTables.RULES)
+        SYMBOL_ID = ScannerTables.SYMBOL_ID
+        if tokens is not None:
+            # Os arrays do TokenBuffer, com os tipos já convertidos em ids
+            type_ids = TokenBuffer.type_ids_by_name
+            first = dict(first)
+            for c, name in symbols.items():
+                first[c] = SYMBOL_ID + type_ids[name]
+            name_ids = {value: type_ids[name] for value, name in names.items()}
+            id_id = type_ids["ID"]
+            operator_ids = {found: type_ids[found[1]] for found in accept
+                            if found is not None and found[1] not in remapping}
+            add_type = tokens.type_ids.append
+            add_start = tokens.starts.append
+            add_length = tokens.lengths.append
+            add_line = tokens.lines.append
+            add = tokens.append
+
+        self.text = text
+        size = len(text)
+        while index < size:
+            c = text[index]
+            action = first.get(c, default)
+            tok = None
+
+            if action >= SYMBOL_ID:
+                add_type(action - SYMBOL_ID)
+                add_start(index)
+                add_length(1)
+                add_line(lineno)
+                index += 1
+                while index < size and text[index] in ignore:
+                    index += 1
+                continue
+
+            elif action == SYMBOL:
+                tok = Token()
+                tok.type = symbols[c]
+                tok.value = c
+                tok.lineno = lineno
+                tok.index = index
+                tok.end = index = index + 1
+                # Quase sempre um espaço só: o laço sai mais barato que a regex
+                while index < size and text[index] in ignore:
+                    index += 1
+                yield tok
+                continue
+
+            elif action == NAME:
+                # Palavras-chave vêm da tabela, como na regra ID
+                m = name_match(text, index)
+                if m:
+                    if tokens is not None:
+                        add_type(name_ids.get(m.group(1), id_id))
+                        add_start(index)
+                        add_length(m.end(1) - index)
+                        add_line(lineno)
+                        index = m.end()
+                        continue
+                    tok = Token()
+                    tok.value = value = m.group(1)
+                    tok.type = names.get(value, "ID")
+                    tok.lineno = lineno
+                    tok.index = index
+                    tok.end = m.end(1)
+                    index = m.end()
+                    yield tok
+                    continue
+
+            elif action == NEWLINE:
+                # O mesmo que ignore_newline, sem a chamada do método
+                m = newline_match(text, index)
+                end = m.end(1)
+                lineno += end - index
+                if end == index + 1:
+                    line_starts.append(end)
+                else:
+                    line_starts.extend(range(index + 1, end + 1))
+                index = m.end()
+                continue
+
+            elif action == OPERATOR:
+                # Percorre a tabela de transições enquanto houver estado;
+                # das regras aceitas no caminho vence a definida primeiro
+                state = starts[c]
+                best = accept[state]
+                end = j = index + 1
+                while trans[state] and j < size:
+                    state = trans[state].get(text[j])
+                    if state is None:
+                        break
+                    j += 1
+                    found = accept[state]
+                    if found is not None and (best is None or found < best):
+                        best, end = found, j
+                if tokens is not None and best in operator_ids:
+                    add_type(operator_ids[best])
+                    add_start(index)
+                    add_length(end - index)
+                    add_line(lineno)
+                    index = end
+                    while index < size and text[index] in ignore:
+                        index += 1
+                    continue
+                if best is not None:
+                    tok = Token()
+                    tok.type = best[1]
+                    tok.value = text[index:end]
+                    tok.lineno = lineno
+                    tok.index = index
+                    tok.end = index = end
+                    while index < size and text[index] in ignore:
+                        index += 1
+
+            elif action == TOKENS:
+                m = (regexes.get(c) or regexes[None]).match(text, index)
+                if m:
+                    name = m.lastgroup
+                    if tokens is not None and name not in remapping:
+                        add_type(type_ids[name])
+                        add_start(index)
+                        add_length(m.end(name) - index)
+                        add_line(lineno)
+                        index = m.end()
+                        continue
+                    tok = Token()
+                    tok.type = name
+                    tok.value = m.group(name)
+                    tok.lineno = lineno
+                    tok.index = index
+                    tok.end = m.end(name)
+                    index = m.end()
+
+            elif action == SKIP:
+                index = skip(text, index).end()
+                continue
+
+            elif action == RULES:
+                m = (regexes.get(c) or regexes[None]).match(text, index)
+                if m:
+                    tok = Token()
+                    tok.lineno = lineno
+                    tok.index = index
+                    tok.end = index = m.end()
+                    tok.value = m.group()
+                    tok.type = m.lastgroup
+                    if tok.type in remapping:
+                        tok.type = remapping[tok.type].get(tok.value, tok.type)
+                    if tok.type in token_funcs:
+                        self.index = index
+                        self.lineno = lineno
+                        tok = token_funcs[tok.type](self, tok)
+                        index = self.index
+                        lineno = self.lineno
+                        if not tok:
+                            continue
+                    if tok.type not in ignored_tokens:
+                        if tokens is not None:
+                            add(tok.type, tok.index, tok.end, tok.lineno)
+                        else:
+                            yield tok
+                    continue
+
+            if tok is not None:
+                # Operadores e regras sem função
+                if tok.type in remapping:
+                    tok.type = remapping[tok.type].get(tok.value, tok.type)
+                if tok.type not in ignored_tokens:
+                    if tokens is not None:
+                        add(tok.type, tok.index, tok.end, tok.lineno)
+                    else:
+                        yield tok
+                continue
 
+            # Nenhuma regra casou: literal ou caractere ilegal
+            tok = Token()
+            tok.lineno = lineno
+            tok.index = index
+            if c in literals:
+                tok.type = tok.value = c
+                tok.end = index = index + 1
+                if tokens is not None:
+                    add(tok.type, tok.index, tok.end, tok.lineno)
+                else:
+                    yield tok
+                continue
+            self.index = index
+            self.lineno = lineno
+            tok.type = 'ERROR'
+            tok.value = c   # error() olha o resto em self.text
+            tok = self.error(tok)
+            if tok is not None:
+                tok.end = self.index
+                if tokens is not None:
+                    add(tok.type, tok.index, tok.end, tok.lineno)
+                else:
+                    yield tok
+            index = self.index
+            lineno = self.lineno
+
+    def tokenize_stream(self, source, lineno=1, chunk_size=None, keep_lines=True):
+        """Tokenize a file object (text or binary) or an mmap.
+
+        The input is read in chunks of `chunk_size` characters (default
+        CHUNK_SIZE) and only a small window of it is kept in memory.
+        Tokens are generated as soon as they are complete and carry the
+        same index/end offsets they would have if the whole text were
+        passed to `tokenize`.
+
+        With keep_lines=False the line table only covers the current
+        window, so `find_column` works just for the latest tokens (enough
+        for error messages and for consumers that do not keep tokens).
+        """
+        # Obs.: nomes em maiúsculas no corpo da classe viram tokens do sly,
+        # por isso o valor padrão é resolvido aqui dentro
+        chunk_size = chunk_size or CHUNK_SIZE
+        cls = type(self)
+        master_re = cls._master_re
+        ignore = cls.ignore
+        token_funcs = cls._token_funcs
+        ignored_tokens = cls._ignored_tokens
+        remapping = cls._remapping
+        literals = cls.literals
+
+        reader = _ChunkReader(source)
+        self._reset()
+        text = ''
+        base = 0        # offset absoluto de text[0]
+        index = 0       # posição dentro da janela atual
+        need = STREAM_LOOKAHEAD
+        eof = False
+        self.text = text
+        try:
+            while True:
+                # Garante folga suficiente depois de index antes de casar
+                if not eof and len(text) - index < need:
+                    chunk = reader.read(max(chunk_size, need))
+                    if chunk:
+                        base += index
+                        text = text[index:] + chunk
+                        index = 0
+                        self.text = text
+                        if not keep_lines:
+                            self.line_table.discard_before(base)
+                    else:
+                        eof = True
+                    continue
+
+                if index >= len(text):
+                    return
+
+                if text[index] in ignore:
+                    index += 1
+                    continue
+
+                m = master_re.match(text, index)
+                stop = m.end() if m else index
+                if not eof and stop + STREAM_LOOKAHEAD > len(text):
+                    # O token (p.ex. um comentário longo) pode continuar
+                    # no próximo bloco: dobra a janela e tenta de novo
+                    need = 2 * (len(text) - index) + STREAM_LOOKAHEAD
+                    continue
+                need = STREAM_LOOKAHEAD
+
+                tok = Token()
+                tok.lineno = lineno
+                tok.index = base + index
+                if m:
+                    index = m.end()
+                    tok.end = base + index
+                    tok.value = m.group()
+                    tok.type = m.lastgroup
+
+                    if tok.type in remapping:
+                        tok.type = remapping[tok.type].get(tok.value, tok.type)
+
+                    if tok.type in token_funcs:
+                        self.index = index
+                        self.lineno = lineno
+                        self.partial = not eof
+                        try:
+                            tok = token_funcs[tok.type](self, tok)
+                        except _NeedMoreInput:
+                            index = tok.index - base
+                            need = 2 * (len(text) - index) + STREAM_LOOKAHEAD
+                            continue
+                        index = self.index
+                        lineno = self.lineno
+                        if self.stopped:
+                            return
+                        if not tok:
+                            continue
+
+                    if tok.type in ignored_tokens:
+                        continue
+
+                    yield tok
+
+                elif text[index] in literals:
+                    tok.value = text[index]
+                    tok.end = tok.index + 1
+                    tok.type = tok.value
+                    index += 1
+                    yield tok
+
+                else:
+                    self.index = index
+                    self.lineno = lineno
+                    self.partial = not eof
+                    tok.type = 'ERROR'
+                    tok.value = text[index:]
+                    try:
+                        tok = self.error(tok)
+                    except _NeedMoreInput:
+                        need = 2 * (len(text) - index) + STREAM_LOOKAHEAD
+                        continue
+                    if tok is not None:
+                        tok.end = base + self.index
+                        yield tok
+
+                    index = self.index
+                    lineno = self.lineno
+                    if self.stopped:
+                        return
+        finally:
+            self.index = base + index
+            self.lineno = lineno
+
+    def tokenize_compact(self, text, lineno=1, index=0):
+        """Tokenize `text` into a TokenBuffer instead of Token objects.
+        The "dfa" engine fills the arrays of the buffer directly."""
+        tokens = TokenBuffer(text, lineno, index)
+        if self.engine == "dfa":
+            self._start(text, index)
+            for _ in self._tokenize_dfa(text, lineno, index, tokens):
+                pass
+        else:
+            for tok in self.tokenize(text, lineno, index):
+                tokens.append(tok.type, tok.index, tok.end, tok.lineno)
+        tokens.line_table = self.line_table
+        tokens.bad_quotes = self.bad_quotes
+        return tokens
+
+    def relex(self, tokens, offset, deleted, inserted):
+        """Update a TokenBuffer after an edit of its source text.
+
+        The edit replaces `deleted` characters at `offset` with the string
+        `inserted`. Lexing restarts at the end of the last token that the
+        edit cannot affect and stops as soon as a new token lines up with
+        an old one past the edit; the tokens after that point are kept and
+        only shifted. Errors are reported just for the re-lexed region.
+
+        Returns (first, removed, added): the tokens [first, first+removed)
+        of the old buffer were replaced by [first, first+added).
+        """
+        text = tokens.text
+        new_text = text[:offset] + inserted + text[offset + deleted:]
+        delta = len(inserted) - deleted
+        edit_end = offset + len(inserted)   # fim da edição no texto novo
+        n = len(tokens)
+
+        # Tokens que terminam bem antes da edição (com folga para o que o
+        # lexer olhou adiante) não mudam; reinicia no fim do último deles.
+        # Uma aspa sem par olhou o texto até onde a busca pelas aspas de
+        # fechamento parou; se isso alcança a edição ela é reanalisada.
+        # Uma aspa dentro da busca de outra (escapada) para no mesmo lugar
+        limit = offset - STREAM_LOOKAHEAD
+        quotes = tokens.bad_quotes
+        scan_end = -1
+        for q in quotes[:bisect_left(quotes, offset)]:
+            if q >= scan_end:
+                scan_end = _string_end(_STRING_BODY, text, q + 1)
+            if scan_end + 2 >= offset:
+                limit = min(limit, q)
+                break
+        first = tokens.find_end_after(limit)
+        if first:
+            restart = tokens.end(first - 1)
+            lineno = tokens.line(first - 1)
+        else:
+            restart = tokens.index
+            lineno = tokens.lineno
+
+        new = TokenBuffer(new_text)
+        last = first
+        line_delta = None
+        stream = self.tokenize(new_text, lineno, restart)
+        for tok in stream:
+            if tok.index >= edit_end:
+                # Procura um token antigo começando na mesma posição
+                old_index = tok.index - delta
+                while last < n and tokens.start(last) < old_index:
+                    last += 1
+                if (last < n and tokens.start(last) == old_index
+                        and tokens.lengths[last] == tok.end - tok.index
+                        and tokens.type(last) == tok.type):
+                    line_delta = tok.lineno - tokens.line(last)
+                    break
+            new.append(tok.type, tok.index, tok.end, tok.lineno)
+        stream.close()
+        if line_delta is None:
+            last, line_delta = n, 0
+            old_stop = len(text)
+        else:
+            old_stop = tokens.start(last)
+
+        tokens.bad_quotes = (
+            [q for q in quotes if q < restart]
+            + self.bad_quotes
+            + [q + delta for q in quotes if q >= old_stop]
+        )
+        tokens.splice(first, last, new, delta, line_delta)
+        tokens.text = new_text
+        tokens.line_table = None
+        return first, last - first, len(new)
 
     def find_column(self, token):
         """Find the column of the token in its line."""
-        last_cr = self.text.rfind('\n', 0, token.index)
-        return token.index - last_cr
-
-    #@_(r'"(\\["\\nrt]|[^"\\\n])*')
-    @_(r'"([^"\\\n]|\\.)*(\\)?$')
-    def error_string(self, t):
-        self._error("Unterminated string literal", t)
+        return self.line_table.column(token.index)
 
     # Internal auxiliary methods
+    def _reset(self):
+        self.partial = False
+        self.line_table = LineTable()
+        self.bad_quotes = []
+        self.error_count = 0
+        self.stopped = False
+
+    def _check_window(self, stop):
+        # Em tokenize_stream a janela atual pode não ir até o fim do texto
+        if self.partial and stop + STREAM_LOOKAHEAD > len(self.text):
+            raise _NeedMoreInput
+
     def _error(self, msg, token):
         location = self._make_location(token)
         self.error_func(msg, location[0], location[1])
         self.index += 1
+        self.error_count += 1
+        if self.error_count == self.max_errors:
+            self.error_func("Too many errors, lexing stopped", location[0], location[1])
+            # Os laços de tokenize terminam ao chegar no fim do texto
+            self.stopped = True
+            self.index = len(self.text)
 
     def _make_location(self, token):
         return token.lineno, self.find_column(token)
 
     # Error handling rule
     def error(self, t):
-        msg = "Illegal character %s" % repr(t.value[0])
+        if t.value[0] == '"':
+            # A decisão sobre essas aspas dependeu do texto até o fim do
+            # arquivo (sem outra aspa para fechar); usado por relex
+            self.bad_quotes.append(t.index)
+            self._error("Illegal character %s" % repr(t.value[0]), t)
+            return
+
+        # Junta os caracteres ilegais seguidos em um único erro
+        text = self.text
+        end = self._illegal_run_end(self.index + 1)
+        if end - self.index == 1:
+            msg = "Illegal character %s" % repr(text[self.index])
+        elif end - self.index <= ERROR_TEXT_LIMIT:
+            msg = "Illegal characters %s" % repr(text[self.index:end])
+        else:
+            msg = "Illegal characters %s... (%d characters)" % (
+                repr(text[self.index:self.index + ERROR_TEXT_LIMIT]), end - self.index)
+        self.index = end - 1
         self._error(msg, t)
 
+    def _illegal_run_end(self, index):
+        """Offset where the run of characters that start no token (and are
+        not ignored) beginning before `index` ends."""
+        cls = type(self)
+        text = self.text
+        while index < len(text):
+            if self.partial and index + STREAM_LOOKAHEAD > len(text):
+                raise _NeedMoreInput
+            c = text[index]
+            if c in cls.ignore or c in cls.literals or cls._master_re.match(text, index):
+                break
+            index += 1
+        return index
+
     # Scanner (used only for test)
     def scan(self, text):
         output = ""
-        for tok in self.tokenize(text):
+        if isinstance(text, TokenBuffer):
+            tokens = text
+            self.line_table = text.get_line_table()
+        else:
+            tokens = self.tokenize(text)
+        for tok in tokens:
             print(tok)
             output += str(tok) + "\n"
         return output
-    
+
+
+class TokenBuffer:
+    """Compact storage for the tokens of one source text.
+
+    Tokens are kept in parallel arrays (type id, start offset, length and
+    line) instead of one sly Token object each. The value of a token is
+    sliced from the source only when the token is materialized, either by
+    `token(i)` or by iterating over the buffer, which yields Tokens equal
+    to the ones `UChuckLexer.tokenize` would produce.
+
+    After `UChuckLexer.relex` the tokens past an edit are not rewritten:
+    a pending shift (offset and line deltas for every token from index
+    `shift_from` on) is added when they are read. Folding the shift of the
+    next edit only touches the tokens between the two edit points.
+    """
+    __slots__ = ("text", "lineno", "index", "type_ids", "starts", "lengths", "lines",
+                 "line_table", "bad_quotes", "shift_from", "shift_offset", "shift_line")
+
+    type_names = UChuckLexer.tokens
+    type_ids_by_name = {name: i for i, name in enumerate(type_names)}
+
+    def __init__(self, text, lineno=1, index=0):
+        self.text = text
+        self.lineno = lineno    # linha e offset onde a análise começou
+        self.index = index
+        self.type_ids = array('B')
+        self.starts = array('q')
+        self.lengths = array('i')
+        self.lines = array('i')
+        self.line_table = None
+        self.bad_quotes = []    # offsets das aspas sem par (ver relex)
+        self.shift_from = 0
+        self.shift_offset = 0
+        self.shift_line = 0
+
+    def append(self, type_name, index, end, lineno):
+        self.type_ids.append(self.type_ids_by_name[type_name])
+        self.starts.append(index)
+        self.lengths.append(end - index)
+        self.lines.append(lineno)
+
+    def __len__(self):
+        return len(self.type_ids)
+
+    def type(self, i):
+        return self.type_names[self.type_ids[i]]
+
+    def start(self, i):
+        if i >= self.shift_from:
+            return self.starts[i] + self.shift_offset
+        return self.starts[i]
+
+    def end(self, i):
+        return self.start(i) + self.lengths[i]
+
+    def line(self, i):
+        if i >= self.shift_from:
+            return self.lines[i] + self.shift_line
+        return self.lines[i]
+
+    def value(self, i):
+        start = self.start(i)
+        return self.text[start:start + self.lengths[i]]
+
+    def token(self, i):
+        """Build the sly Token for the i-th token."""
+        tok = Token()
+        tok.type = self.type_names[self.type_ids[i]]
+        tok.index = start = self.start(i)
+        tok.end = end = start + self.lengths[i]
+        tok.value = self.text[start:end]
+        tok.lineno = self.line(i)
+        return tok
+
+    def __iter__(self):
+        for i in range(len(self.type_ids)):
+            yield self.token(i)
+
+    def get_line_table(self):
+        """LineTable of the current text (rebuilt after an edit)."""
+        if self.line_table is None:
+            self.line_table = LineTable()
+            self.line_table.add_newlines(self.text)
+        return self.line_table
+
+    def find_end_after(self, index):
+        """Position of the first token that ends after `index`."""
+        return bisect_right(range(len(self.type_ids)), index, key=self.end)
+
+    def splice(self, first, last, new, offset_delta, line_delta):
+        """Replace tokens [first, last) by the TokenBuffer `new` and shift
+        the tokens after them by the given deltas."""
+        pending_from = self.shift_from
+        offset, line = self.shift_offset, self.shift_line
+        if offset or line:
+            # A nova pendência começa depois dos tokens inseridos: acerta
+            # fisicamente só os tokens entre as duas posições de edição
+            if pending_from < first:
+                self._add(pending_from, first, offset, line)
+            elif pending_from > last:
+                self._add(last, pending_from, -offset, -line)
+
+        self.type_ids[first:last] = new.type_ids
+        self.starts[first:last] = new.starts
+        self.lengths[first:last] = new.lengths
+        self.lines[first:last] = new.lines
+
+        self.shift_from = first + len(new)
+        self.shift_offset = offset + offset_delta
+        self.shift_line = line + line_delta
+
+    def _add(self, lo, hi, offset, line):
+        starts, lines = self.starts, self.lines
+        for i in range(lo, min(hi, len(starts))):
+            starts[i] += offset
+            lines[i] += line
+
+
 def print_error(msg, x, y):
     # use stdout to match with the output in the .out test files
     print("Lexical error: %s at %d:%d" % (msg, x, y), file=sys.stdout)
@@ -184,4 +1124,5 @@ def print_error(msg, x, y):
 def main(args):
     lex = UChuckLexer(print_error)
     with open(args[0], 'r') if len(args) > 0 else sys.stdin as f:
-        lex.scan(f.read())
+        for tok in lex.tokenize_stream(f, keep_lines=False):
+            print(tok)
@@ -34,251 +34,270 @@ StringType = UChuckType(
     rel_ops    = {"==", "!="},
 )
 
+# Tipo das expressões com erro, quando os erros são coletados: quem
+# recebe um operando com esse tipo não reporta de novo
+ErrorType = Type("<error>")
+
+# Só esses tipos que aceito aqui
+TYPES = {
+    "int": IntType,
+    "float": FloatType,
+    "string": StringType,
+}
+BASIC_TYPES = frozenset(TYPES.values())
+
+# Tipo do resultado de cada operação válida, (op, tipo da esquerda, tipo
+# da direita) -> tipo; os dois lados têm que ter o mesmo tipo e as
+# comparações dão int
+BINARY_TYPES = {(op, t, t): IntType for t in BASIC_TYPES for op in t.rel_ops}
+BINARY_TYPES.update({(op, t, t): t for t in BASIC_TYPES for op in t.binary_ops})
+UNARY_TYPES = {(op, t): t for t in BASIC_TYPES for op in t.unary_ops}
+
+# Mensagens dos erros semânticos, formatadas só quando o erro acontece
+MESSAGES = {
+     1: "'{name}' is not defined",
+     2: "Cannot assign type '{rtype}' to type '{ltype}'",
+     3: "Binary operator '{name}' does not have matching LHS/RHS types",
+     4: "Binary operator '{name}' is not supported by type '{ltype}'",
+     5: "Break/Continue statement must be inside a loop",
+     6: "The condition expression must be of type 'int', not type '{ltype}'",
+     7: "Expression is not of basic type",
+     8: "Right-side operand is not a variable",
+     9: "Name '{name}' is already defined in this scope",
+    10: "Unary operator '{name}' is not supported by type '{ltype}'",
+}
+
 # Tabela de símbolos (usada para armazenar as variáveis e tipos)
 class SymbolTable:
-    def __init__(self, parent=None):
+    """Stack of nested scopes. Each name maps to the stack of its visible
+    declarations (the innermost last), so lookup takes constant time at
+    any depth; each scope records the names it declared, which are
+    popped when it is closed."""
+    def __init__(self):
         self.symbols = {}
-        self.parent = parent
+        self.scopes = [set()]
+    def push_scope(self):
+        self.scopes.append(set())
+    def pop_scope(self):
+        symbols = self.symbols
+        for name in self.scopes.pop():
+            stack = symbols[name]
+            stack.pop()
+            if not stack:
+                del symbols[name]
     def add(self, name, value):
-        self.symbols[name] = value
+        self.symbols.setdefault(name, []).append(value)
+        self.scopes[-1].add(name)
     def lookup(self, name):
-        value = self.symbols.get(name, None)
-        if value is None and self.parent is not None:
-            return self.parent.lookup(name)
-        return value
+        stack = self.symbols.get(name)
+        return stack[-1] if stack else None
+    def in_scope(self, name):
+        # Declarado no escopo mais interno (não só visível de fora)
+        return name in self.scopes[-1]
+
+class Diagnostic:
+    """A semantic error found by Visitor.check: the code of its message
+    in MESSAGES, the message and the Coord of the node."""
+    __slots__ = ("code", "message", "coord")
+
+    def __init__(self, code, message, coord):
+        self.code = code
+        self.message = message
+        self.coord = coord
+
+    def __str__(self):
+        return "SemanticError: %s %s" % (self.message, self.coord)
+
+    def __repr__(self):
+        return "Diagnostic(%r, %r, %r)" % (self.code, self.message, str(self.coord))
+
 
 # Visitor principal, vai passar por cada nó da AST
 class Visitor(NodeVisitor):
     def __init__(self):
         self.symtab = None
-        # Só esses tipos que aceito aqui 
-        self.typemap = {
-            "int": IntType,
-            "float": FloatType,
-            "string": StringType,
-        }
-
-    # Função para dar erro semântico, já imprime na tela e para tudo
-    def _assert_semantic(self, condition, msg_code, coord, name="", ltype="", rtype=""):
-        msgs = {
-             1: f"'{name}' is not defined",
-             2: f"Cannot assign type '{rtype}' to type '{ltype}'",
-             3: f"Binary operator '{name}' does not have matching LHS/RHS types",
-             4: f"Binary operator '{name}' is not supported by type '{ltype}'",
-             5: "Break/Continue statement must be inside a loop",
-             6: f"The condition expression must be of type 'int', not type '{ltype}'",
-             7: "Expression is not of basic type",
-             8: f"Right-side operand is not a variable",
-             9: f"Name '{name}' is already defined in this scope",
-            10: f"Unary operator '{name}' is not supported by type '{ltype}'",
-        }
-        if not condition:
-            print("SemanticError: %s %s" % (msgs.get(msg_code), coord), file=sys.stdout)
-            sys.exit(1)
+        # Lista dos erros em check; None em visit, que para no primeiro
+        self.diagnostics = None
+
+    def check(self, ast):
+        """Analyze `ast` without stopping at the first error: returns the
+        list of Diagnostic found, empty for a valid program. Nodes whose
+        type could not be found get ErrorType, and errors caused only by
+        an earlier one are not reported."""
+        self.diagnostics = []
+        try:
+            self.visit(ast)
+        finally:
+            diagnostics, self.diagnostics = self.diagnostics, None
+        return diagnostics
+
+    # Função para dar erro semântico: em visit imprime na tela e para
+    # tudo, em check só guarda o erro
+    def _semantic_error(self, msg_code, node, name="", ltype="", rtype=""):
+        msg = MESSAGES[msg_code].format(name=name, ltype=ltype, rtype=rtype)
+        if self.diagnostics is not None:
+            self.diagnostics.append(Diagnostic(msg_code, msg, node.coord))
+            return
+        print("SemanticError: %s %s" % (msg, node.coord), file=sys.stdout)
+        sys.exit(1)
 
     def visit_Program(self, node):
         # Cria uma tabela de símbolos nova para esse programa
-        node.attrs['symtab'] = SymbolTable()
-        self.symtab = node.attrs['symtab']
-        # Lista para controlar os loops (break/continue)
-        self.symtab.add('loops', [])
+        node.symtab = self.symtab = SymbolTable()
+        # Pilha dos loops abertos (alvo de break/continue)
+        self.loops = []
         for stmt in node.stmts:
-            self.visit(stmt)
+            yield stmt
 
     def visit_StmtList(self, node):
+        # Cada bloco é um escopo
+        self.symtab.push_scope()
         for stmt in node.stmts:
-            self.visit(stmt)
+            yield stmt
+        self.symtab.pop_scope()
 
     def visit_VarDecl(self, node):
-        var_name = getattr(node, 'name', None)
-        if hasattr(node, 'name') and hasattr(node.name, 'name'):
-            var_name = node.name.name
-        self._assert_semantic(
-            var_name is not None,
-            1, node.coord,
-            name="VarDecl"
-        )
-        self._assert_semantic(
-            self.symtab.lookup(var_name) is None,
-            9, node.coord,
-            name=var_name
-        )
-        self.visit(node.dtype)
-        var_type = node.dtype.attrs.get('uchuck_type')
-        # Bloqueia tipo inválido
-        self._assert_semantic(
-            var_type in self.typemap.values(),
-            1, node.coord,
-            name=str(var_type)
-        )
-        node.attrs['uchuck_type'] = var_type
-        self.symtab.add(var_name, node)
-
-
+        var_name = node.name.name
+        redefined = self.symtab.in_scope(var_name)
+        if redefined:
+            # Com os erros coletados, os usos seguintes ficam com a
+            # primeira declaração
+            self._semantic_error(9, node, name=var_name)
+        yield node.dtype
+        node.uchuck_type = node.dtype.uchuck_type
+        if not redefined:
+            self.symtab.add(var_name, node)
 
     def visit_Type(self, node):
-        type_name = getattr(node, 'typename', None) or getattr(node, 'name', None)
-        self._assert_semantic(type_name in self.typemap, 1, node.coord, name=type_name)
-        node.attrs['uchuck_type'] = self.typemap[type_name]
+        uchuck_type = TYPES.get(node.typename)
+        if uchuck_type is None:
+            self._semantic_error(1, node, name=node.typename)
+            uchuck_type = ErrorType
+        node.uchuck_type = uchuck_type
 
     def visit_Location(self, node):
         varname = node.name
         decl = self.symtab.lookup(varname)
-        self._assert_semantic(decl is not None, 1, node.coord, name=varname)
-        node.attrs['defn'] = decl
-        node.attrs['uchuck_type'] = decl.attrs['uchuck_type']
-
+        # Sempre sobrescreve: um nó mantido por reparse pode ser checado
+        # de novo
+        node.defn = decl
+        if decl is None:
+            self._semantic_error(1, node, name=varname)
+            node.uchuck_type = ErrorType
+            return
+        node.uchuck_type = decl.uchuck_type
 
     def visit_Literal(self, node):
-        type_name = getattr(node, 'type', None)
+        type_name = node.type
         if type_name == 'bool':  # trata bool como int
             type_name = 'int'
+        uchuck_type = TYPES.get(type_name)
         # Bloqueia literais de tipo desconhecido
-        self._assert_semantic(
-            type_name in self.typemap,
-            1, node.coord,
-            name=type_name
-        )
-        node.attrs['uchuck_type'] = self.typemap[type_name]
-
+        if uchuck_type is None:
+            self._semantic_error(1, node, name=type_name)
+            uchuck_type = ErrorType
+        node.uchuck_type = uchuck_type
 
     def visit_BinaryOp(self, node):
-        # Visita os filhos
-        self.visit(node.left)
-        self.visit(node.right)
-        
-        # Recupera tipos
-        ltype = node.left.attrs.get('uchuck_type')
-        rtype = node.right.attrs.get('uchuck_type')
-
-        # Garante que ambos os tipos estão definidos
-        self._assert_semantic(
-            ltype is not None and rtype is not None,
-            3, node.coord,
-            name=getattr(node, 'op', '?'),
-            ltype=str(ltype),
-            rtype=str(rtype)
-        )
-
-        # Pega o operador (adapta ao nome da AST)
-        op = getattr(node, 'op', getattr(node, 'operator', None))
-        self._assert_semantic(
-            op is not None,
-            4, node.coord,
-            name="(undefined op)",
-            ltype=str(ltype)
-        )
-
+        yield node.left
+        yield node.right
+        ltype = node.left.uchuck_type
+        rtype = node.right.uchuck_type
+        result = BINARY_TYPES.get((node.op, ltype, rtype))
+        if result is None:
+            result = self._binary_error(node, ltype, rtype)
+        node.uchuck_type = result
+
+    def _binary_error(self, node, ltype, rtype):
+        # Acha qual regra a operação quebrou, na ordem em que eram checadas
+        op = node.op
+        if ltype is ErrorType or rtype is ErrorType:
+            # Erro já reportado num operando
+            pass
+        elif ltype is None or rtype is None:
+            self._semantic_error(3, node, name=op, ltype=ltype, rtype=rtype)
+        elif op is None:
+            self._semantic_error(4, node, name="(undefined op)", ltype=ltype)
         # Tipos precisam ser idênticos (não aceita int + float, por exemplo)
-        self._assert_semantic(
-            ltype == rtype,
-            3, node.coord,
-            name=op,
-            ltype=str(ltype),
-            rtype=str(rtype)
-        )
-
-        # Aceita só tipos conhecidos (evita pegar tipos "None")
-        self._assert_semantic(
-            ltype in self.typemap.values(),
-            3, node.coord,
-            name=op,
-            ltype=str(ltype)
-        )
-
-        # Operador precisa ser suportado por esse tipo!
-        if op in getattr(ltype, 'binary_ops', set()):
-            node.attrs['uchuck_type'] = ltype
-        elif op in getattr(ltype, 'rel_ops', set()):
-            node.attrs['uchuck_type'] = self.typemap['int']
+        elif ltype != rtype or ltype not in BASIC_TYPES:
+            self._semantic_error(3, node, name=op, ltype=ltype, rtype=rtype)
         else:
-            self._assert_semantic(
-                False, 4, node.coord, name=op, ltype=str(ltype)
-            )
-
-
+            self._semantic_error(4, node, name=op, ltype=ltype)
+        return ErrorType
 
     def visit_UnaryOp(self, node):
-        self.visit(node.operand)
-        operand_type = node.operand.attrs.get('uchuck_type')
-        op = getattr(node, 'op', None)
-        self._assert_semantic(
-            operand_type is not None and hasattr(operand_type, 'unary_ops'),
-            10, node.coord, name=op, ltype=str(operand_type)
-        )
-        self._assert_semantic(
-            op in operand_type.unary_ops,
-            10, node.coord, name=op, ltype=str(operand_type)
-        )
-        node.attrs['uchuck_type'] = operand_type
-
+        yield node.operand
+        operand_type = node.operand.uchuck_type
+        result = UNARY_TYPES.get((node.op, operand_type))
+        if result is None:
+            if operand_type is not ErrorType:
+                self._semantic_error(10, node, name=node.op, ltype=operand_type)
+            result = ErrorType
+        node.uchuck_type = result
 
     def visit_ChuckOp(self, node):
-        self.visit(node.expression)
-        expr_type = node.expression.attrs.get('uchuck_type')
-        self.visit(node.location)
-        loc_type = node.location.attrs.get('uchuck_type')
+        yield node.expression
+        expr_type = node.expression.uchuck_type
+        yield node.location
+        loc_type = node.location.uchuck_type
 
-        # Só permite atribuição para VarDecl ou Location
-        is_assignable = type(node.location).__name__ in ('Location', 'VarDecl')
-        self._assert_semantic(is_assignable, 8, node.coord)
+        # Só permite atribuição para VarDecl ou Location (pelo nome da
+        # classe, que as visões de ast_arena também têm)
+        if type(node.location).__name__ not in ('Location', 'VarDecl'):
+            self._semantic_error(8, node)
 
         # Tipos precisam bater e não podem ser None!
-        self._assert_semantic(
-            expr_type is not None and loc_type is not None and loc_type == expr_type,
-            2, node.coord, ltype=str(loc_type), rtype=str(expr_type)
-        )
-        node.attrs['uchuck_type'] = loc_type
-
+        if (expr_type is None or loc_type is not expr_type) and (
+                expr_type is not ErrorType and loc_type is not ErrorType):
+            self._semantic_error(2, node, ltype=loc_type, rtype=expr_type)
+        node.uchuck_type = loc_type
 
     def visit_PrintStatement(self, node):
-        self.visit(node.expression)
-        expr_type = node.expression.attrs.get('uchuck_type')
-        self._assert_semantic(
-            expr_type in [self.typemap['int'], self.typemap['float'], self.typemap['string']],
-            7, node.coord
-        )
-        node.attrs['uchuck_type'] = expr_type
-
-
+        yield node.expression
+        expr_type = node.expression.uchuck_type
+        if expr_type not in BASIC_TYPES and expr_type is not ErrorType:
+            self._semantic_error(7, node)
+        node.uchuck_type = expr_type
 
     def visit_ExpressionAsStatement(self, node):
         if node.expression:
-            self.visit(node.expression)
+            yield node.expression
 
     def visit_IfStatement(self, node):
-        self.visit(node.test)
-        test_type = node.test.attrs['uchuck_type']
-        self._assert_semantic(test_type == IntType, 6, node.coord, ltype=str(test_type))
-        self.visit(node.consequence)
+        yield node.test
+        test_type = node.test.uchuck_type
+        if test_type is not IntType and test_type is not ErrorType:
+            self._semantic_error(6, node, ltype=test_type)
+        yield node.consequence
         if node.alternative:
-            self.visit(node.alternative)
+            yield node.alternative
 
     def visit_WhileStatement(self, node):
-        loops = self.symtab.lookup('loops')
+        loops = self.loops
         loops.append(node)
-        self.visit(node.test)
-        test_type = node.test.attrs['uchuck_type']
-        self._assert_semantic(test_type == IntType, 6, node.coord, ltype=str(test_type))
-        self.visit(node.body)
+        yield node.test
+        test_type = node.test.uchuck_type
+        if test_type is not IntType and test_type is not ErrorType:
+            self._semantic_error(6, node, ltype=test_type)
+        yield node.body
         loops.pop()
 
     def visit_BreakStatement(self, node):
-        loops = self.symtab.lookup('loops')
-        self._assert_semantic(
-            isinstance(loops, list) and len(loops) > 0,
-            5, node.coord
-        )
-        node.attrs['loop'] = loops[-1]
-
+        if not self.loops:
+            node.loop = None
+            self._semantic_error(5, node)
+            return
+        node.loop = self.loops[-1]
 
     def visit_ContinueStatement(self, node):
-        loops = self.symtab.lookup('loops')
-        self._assert_semantic(len(loops) > 0, 5, node.coord)
-        node.attrs['loop'] = loops[-1]
+        if not self.loops:
+            node.loop = None
+            self._semantic_error(5, node)
+            return
+        node.loop = self.loops[-1]
 
     def visit_ExprList(self, node):
         for expr in node.exprs:
-            self.visit(expr)
+            yield expr
         if node.exprs:
-            node.attrs['uchuck_type'] = node.exprs[-1].attrs['uchuck_type']
+            node.uchuck_type = node.exprs[-1].uchuck_type
@@ -1,9 +1,100 @@
+import os
 import sys
+import pickle
+import hashlib
+import tempfile
+from bisect import bisect_right
+from itertools import chain
+import sly
 from sly import Parser
-from analisador_lexico import UChuckLexer
-from analisador_semantico import Visitor 
-from ast_alguma import Program, BinaryOp, UnaryOp, Literal, Location, PrintStatement, IfStatement, WhileStatement, ChuckOp, VarDecl, ExpressionAsStatement, StmtList, BreakStatement, ContinueStatement, ExprList, Coord, Type, ID
-from gerador_codigo import CodeGenerator
+from sly.yacc import LRTable, YaccError
+from analisador_lexico import UChuckLexer, TokenBuffer
+from tabela_nomes import NameTable
+import ast_alguma
+from ast_alguma import ANNOTATIONS, OFFSET_BITS, OFFSET_MASK, Node, IfStatement, WhileStatement, StmtList, Type
+
+# Diretório do cache das tabelas LALR. UCHUCK_CACHE_DIR escolhe outro
+# lugar; com o valor vazio o cache é desligado
+CACHE_DIR = os.environ.get(
+    "UCHUCK_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__"))
+
+# Muda quando o formato do arquivo de cache muda
+TABLES_FORMAT = 1
+
+# Ler as tabelas do cache passa por partes internas do sly: os passos de
+# Parser._build e os atributos de LRTable. Elas só são usadas nas versões
+# do sly em que foram conferidas; nas outras (ou se faltar algum passo) a
+# classe é construída pelo caminho normal do sly, sem cache
+SLY_VERSIONS = ("0.5",)
+_SLY_BUILD_STEPS = ("_Parser__collect_rules", "_Parser__validate_specification",
+                    "_Parser__build_grammar", "_Parser__build_lrtables")
+_TABLE_FIELDS = ("lr_action", "lr_goto", "defaulted_states", "sr_conflicts", "rr_conflicts")
+TABLES_CACHE = (sly.__version__ in SLY_VERSIONS
+                and all(hasattr(Parser, name) for name in _SLY_BUILD_STEPS))
+
+
+def grammar_key(parser_cls):
+    """Hash of everything the LALR tables of a parser class depend on:
+    the productions (with their precedence), tokens and precedence table,
+    plus the sly version."""
+    productions = [(p.name, p.prod, p.prec) for p in parser_cls._grammar.Productions]
+    data = (TABLES_FORMAT, sly.__version__, sorted(parser_cls.tokens),
+            parser_cls.precedence, productions)
+    return hashlib.sha256(repr(data).encode()).hexdigest()
+
+
+def tables_path(parser_cls, directory=None):
+    """Cache file of the LALR tables of a parser class, or None if the
+    cache is disabled or this version of sly is not supported."""
+    directory = CACHE_DIR if directory is None else directory
+    if not directory or not TABLES_CACHE:
+        return None
+    return os.path.join(directory, "%s-lalr-%s.pickle" % (
+        parser_cls.__name__, grammar_key(parser_cls)[:32]))
+
+
+def load_tables(parser_cls, path):
+    """Read the LALR tables saved by save_tables. Returns an LRTable or
+    None if the file is missing or unusable."""
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data["key"] != grammar_key(parser_cls):
+            return None
+    except Exception:
+        # Um cache ilegível é só reconstruído
+        return None
+    table = LRTable.__new__(LRTable)
+    table.grammar = parser_cls._grammar
+    table.lr_productions = parser_cls._grammar.Productions
+    for name in _TABLE_FIELDS:
+        setattr(table, name, data[name])
+    return table
+
+
+def save_tables(parser_cls, path):
+    """Write the LALR tables of a parser class to `path`. The file is
+    written under a temporary name and then renamed, so concurrent
+    processes never read a partial file."""
+    table = parser_cls._lrtable
+    data = {"key": grammar_key(parser_cls)}
+    for name in _TABLE_FIELDS:
+        data[name] = getattr(table, name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        # Sem permissão de escrita: as tabelas valem só para este processo
+        pass
+
 
 class UChuckParser(Parser):
     """A parser for the uChuck language."""
@@ -24,22 +115,379 @@ class UChuckParser(Parser):
         ('right', 'EXCLAMATION'),
     )
 
-    def __init__(self, error_func=lambda msg, x, y: print("Lexical error: %s at %d:%d" % (msg, x, y), file=sys.stdout)):
+    if TABLES_CACHE:
+        @classmethod
+        def _build(cls, definitions):
+            # O mesmo que Parser._build, mas as tabelas LALR vêm do cache em
+            # disco quando a gramática não mudou (a chave é grammar_key)
+            rules = cls._Parser__collect_rules(definitions)
+            if not cls._Parser__validate_specification():
+                raise YaccError('Invalid parser specification')
+            cls._Parser__build_grammar(rules)
+
+            path = None if cls.debugfile else tables_path(cls)
+            table = load_tables(cls, path) if path else None
+            if table is None:
+                if not cls._Parser__build_lrtables():
+                    raise YaccError('Can\'t build parsing tables')
+                if path:
+                    save_tables(cls, path)
+            else:
+                cls._lrtable = table
+                # Mesmos avisos que a construção das tabelas daria
+                for kind, conflicts in (("shift/reduce", table.sr_conflicts),
+                                        ("reduce/reduce", table.rr_conflicts)):
+                    expected = getattr(cls, 'expected_' + kind.replace('/', '_'), None)
+                    if conflicts and len(conflicts) != expected:
+                        cls.log.warning('%d %s conflict%s', len(conflicts), kind,
+                                        's' if len(conflicts) > 1 else '')
+
+            if cls.debugfile:
+                with open(cls.debugfile, 'w') as f:
+                    f.write(str(cls._grammar))
+                    f.write('\n')
+                    f.write(str(cls._lrtable))
+                cls.log.info('Parser debugging for %s written to %s', cls.__qualname__, cls.debugfile)
+
+    def __init__(self, error_func=lambda msg, x, y: print("Lexical error: %s at %d:%d" % (msg, x, y), file=sys.stdout),
+                 max_errors=None, engine="lalr"):
         """Create a new Parser.
-        An error function for the lexer.
+        An error function for the lexer and, optionally, the maximum
+        number of lexical errors before the lexer stops.
+        The engine is "lalr" (sly's LALR driver) or "descent" (the
+        recursive descent of DescentParser); both give the same AST,
+        coordinates and messages.
         """
-        self.lexer = UChuckLexer(error_func)
-
-    def parse(self, text, lineno=1, index=0):
-        return super().parse(self.lexer.tokenize(text, lineno, index))
+        if engine not in ("lalr", "descent"):
+            raise ValueError("Unknown parser engine %r" % (engine,))
+        self.lexer = UChuckLexer(error_func, max_errors)
+        self.engine = engine
+        # Erros de sintaxe do último parse
+        self.error_count = 0
+        # Quem faz os nós: ast_alguma, ou um ArenaBuilder num parse com
+        # arena=True
+        self.nodes = ast_alguma
+        # Nomes do último parse, que reparse continua usando
+        self.names = None
+
+    def parse(self, text, lineno=1, index=0, arena=False):
+        """Parse `text`. With `arena`, the result is an ast_arena.Arena
+        built from the reductions, without making the Node objects."""
+        # Aceita também os tokens já prontos de lexer.tokenize_compact
+        if isinstance(text, TokenBuffer):
+            self.lexer.line_table = text.get_line_table()
+            return self._parse_tokens(iter(text), arena)
+        return self._parse_tokens(self.lexer.tokenize(text, lineno, index), arena)
+
+    def parse_stream(self, source, lineno=1, arena=False):
+        """Parse a file object or an mmap without reading it all at once."""
+        return self._parse_tokens(self.lexer.tokenize_stream(source, lineno), arena)
+
+    def reparse(self, ast, text, offset, deleted, inserted):
+        """Parse `text` with its `deleted` characters at `offset` replaced
+        by the str `inserted`, reusing `ast`, the tree `parse` gave for
+        `text` without errors.
+
+        Only the statements of the innermost block (or of the program)
+        around the edit are parsed again, from the one before the edit
+        up to the first old statement that starts after it; they are
+        spliced into `ast`, and the nodes after the edit are moved with
+        their text. Returns the AST of the new text, the same one
+        `parse` would give: `ast` itself, or a new tree from a full
+        parse when the edit changes the blocks around it or the new
+        text has errors (reported as by `parse`).
+        """
+        if text[offset:offset + deleted] == inserted:
+            return ast
+        new_text = text[:offset] + inserted + text[offset + deleted:]
+        lines = ast.stmts[0].lines if ast.stmts else None
+        if lines is None:
+            return self.parse(new_text)
+        end = offset + deleted
+        lexer = self.lexer
+        error_func = lexer.error_func
+        # Os erros do trecho são reportados pelo parse completo
+        lexer.error_func = _ignore_error
+        try:
+            contexts, path = self._edit_contexts(ast, text, offset, end)
+            old_starts = lines.starts
+            delta = len(inserted) - deleted
+            self.lines = lines
+            self.nodes = ast_alguma
+            if self.names is None:
+                self.names = NameTable()
+            # Do bloco mais interno para fora, até um que termine igual
+            for level in range(len(contexts) - 1, -1, -1):
+                stmts, block, close = contexts[level]
+                span = self._reparse_span(new_text, lines, old_starts, stmts, block, close,
+                                          offset, end, delta)
+                if span is not None:
+                    break
+            else:
+                lines.starts = old_starts
+                span = None
+        finally:
+            lexer.error_func = error_func
+        if span is None:
+            return self.parse(new_text)
+
+        first, last, new, lines_moved = span
+        # Linhas e offsets dos nós depois da edição mudam juntos
+        shift = (lines_moved << OFFSET_BITS) + delta
+        _shift_nodes(stmts[last:], end, shift)
+        for outer in range(level):
+            outer_stmts = contexts[outer][0]
+            j = path[outer]
+            _shift_nodes(outer_stmts[j + 1:], end, shift)
+            # Dentro do bloco seguinte o nível de dentro já moveu
+            _shift_nodes((outer_stmts[j],), end, shift, contexts[outer + 1][1])
+        stmts[first:last] = new
+        self.error_count = 0
+        return ast
+
+    def _edit_contexts(self, ast, text, offset, end):
+        # Listas de instruções que contêm a edição, do programa até o
+        # bloco mais interno: (instruções, bloco, token "}" do bloco), e
+        # o índice da instrução que contém o bloco seguinte
+        contexts = [(ast.stmts, None, None)]
+        path = []
+        stmts = ast.stmts
+        while stmts:
+            j = _statement_index(stmts, offset) - 1
+            if j < 0:
+                break
+            blocks = [block for block in _blocks(stmts[j])
+                      if block.position & OFFSET_MASK < offset]
+            if not blocks:
+                break
+            block = blocks[-1]
+            close = self._close(block, text)
+            if end > close.index:
+                break
+            contexts.append((block.stmts, block, close))
+            path.append(j)
+            stmts = block.stmts
+        return contexts, path
+
+    def _reparse_span(self, text, lines, old_starts, stmts, block, close, offset, end, delta):
+        # Analisa de novo as instruções de stmts em volta da edição até
+        # voltar a uma fronteira antiga depois dela. Devolve (primeira,
+        # fim, novas, quantas linhas as seguintes andaram) das instruções
+        # trocadas, com as linhas do texto novo em lines, ou None se não
+        # dá para trocar só elas
+        j = max(_statement_index(stmts, offset) - 1, 0)
+        # A instrução anterior também: um "else" pode se juntar a ela
+        first = max(j - 1, 0)
+        if stmts and stmts[first].position & OFFSET_MASK <= offset:
+            start = stmts[first].position
+            index, lineno = start & OFFSET_MASK, start >> OFFSET_BITS
+        elif block is None:
+            index, lineno = 0, 1
+        else:
+            index, lineno = (block.position & OFFSET_MASK) + 1, block.position >> OFFSET_BITS
+        edit_end = end + delta
+
+        descent = DescentParser(self)
+        descent.tokens = self.lexer.tokenize(text, lineno, index)
+        descent.seen = []
+        descent.depth = 0
+        descent.lines = lines
+        descent.names = self.names
+        descent.nodes = ast_alguma
+        # O lexer continua a tabela de linhas do texto antigo
+        starts = self.lexer.line_table.starts = old_starts[:bisect_right(old_starts, index)]
+        lines.starts = starts
+        new = []
+        resync = None
+        lines_moved = 0
+        try:
+            descent._advance()
+            while True:
+                tok = descent.tok
+                if tok is None:
+                    if block is not None:
+                        return None
+                    last = len(stmts)
+                    break
+                if tok.index >= edit_end:
+                    old = tok.index - delta
+                    if block is not None and descent.type == 'RBRACE':
+                        if old != close.index:
+                            return None
+                        last = len(stmts)
+                        resync = tok.index
+                        # A linha do lexer não conta as quebras dentro
+                        # de strings, que a tabela de linhas tem
+                        lines_moved = tok.lineno - close.lineno
+                        break
+                    last = _statement_index(stmts, old)
+                    if last and stmts[last - 1].position & OFFSET_MASK == old:
+                        last -= 1
+                        resync = tok.index
+                        lines_moved = tok.lineno - (stmts[last].position >> OFFSET_BITS)
+                        break
+                new.append(descent._statement())
+        except _Fallback:
+            return None
+        if self.lexer.error_count or (block is None and len(stmts) - last + first + len(new) == 0):
+            return None
+        if resync is not None:
+            # Depois do ponto em que as análises se encontram, as linhas
+            # antigas andam junto com o texto
+            del starts[bisect_right(starts, resync):]
+            starts.extend(map(delta.__add__, old_starts[bisect_right(old_starts, resync - delta):]))
+        return first, last, new, lines_moved
+
+    def _close(self, block, text):
+        # Token "}" de um bloco do texto antigo
+        if block.stmts:
+            last = self._statement_end(block.stmts[-1], text)
+            return self._next_token(text, last.lineno, last.index + 1, 'RBRACE')
+        position = block.position
+        return self._next_token(text, position >> OFFSET_BITS, (position & OFFSET_MASK) + 1, 'RBRACE')
+
+    def _statement_end(self, stmt, text):
+        # Último token de uma instrução do texto antigo
+        while True:
+            if isinstance(stmt, WhileStatement):
+                stmt = stmt.body
+            elif isinstance(stmt, IfStatement):
+                stmt = stmt.consequence if stmt.alternative is None else stmt.alternative
+            else:
+                break
+        if isinstance(stmt, StmtList):
+            return self._close(stmt, text)
+        position = stmt.position
+        return self._next_token(text, position >> OFFSET_BITS, position & OFFSET_MASK, 'SEMI')
+
+    def _next_token(self, text, lineno, index, type):
+        for tok in self.lexer.tokenize(text, lineno, index):
+            if tok.type == type:
+                return tok
+        raise ValueError("The AST does not match the source text")
+
+    def _parse_tokens(self, tokens, arena=False):
+        # Os nós compartilham as linhas do lexer, que só cria a tabela ao
+        # ler o primeiro token
+        first = next(tokens, None)
+        self.lines = self.lexer.line_table
+        self.error_count = 0
+        # Nomes e textos de literais do parse, compartilhados pela AST
+        self.names = NameTable()
+        if arena:
+            from ast_arena import ArenaBuilder
+            self.nodes = ArenaBuilder(self.lines)
+        else:
+            self.nodes = ast_alguma
+        if first is not None:
+            tokens = chain((first,), tokens)
+        if self.engine == "descent":
+            root = DescentParser(self).parse(tokens)
+        else:
+            root = super().parse(tokens)
+        if arena:
+            builder = self.nodes
+            self.nodes = ast_alguma
+            return None if root is None else builder.finish(root)
+        return root
+
+    def validate(self, text, lineno=1, index=0):
+        """Check that `text` (or a TokenBuffer) is a valid program without
+        building the AST. Nothing is printed: returns None for a valid
+        program, or (message, line, column) for the first lexical or
+        syntax error.
+        """
+        if isinstance(text, TokenBuffer):
+            self.lexer.line_table = text.get_line_table()
+            names = text.type_names
+            count = self._recognize(names[i] for i in text.type_ids)
+            if count is None:
+                return None
+            if count < len(text):
+                return self._syntax_error(text.token(count), False, text.lineno)
+            return self._syntax_error(text.token(count - 1) if count else None, True, text.lineno)
+        return self._validate_tokens(lambda: self.lexer.tokenize(text, lineno, index), lineno)
+
+    def validate_stream(self, source, lineno=1):
+        """Like validate, reading a file object or an mmap in chunks."""
+        return self._validate_tokens(lambda: self.lexer.tokenize_stream(source, lineno), lineno)
+
+    def _validate_tokens(self, tokenize, lineno):
+        last = None
+        at_end = False
+
+        def types():
+            nonlocal last, at_end
+            for tok in tokenize():
+                last = tok
+                yield tok.type
+            at_end = True
+
+        def lexical_error(msg, x, y):
+            raise _InvalidInput("Lexical error: %s" % msg, x, y)
+
+        error_func = self.lexer.error_func
+        self.lexer.error_func = lexical_error
+        try:
+            if self._recognize(types()) is None:
+                return None
+            # O erro está no último token lido ou, se os tokens acabaram,
+            # no fim da entrada
+            return self._syntax_error(last, at_end, lineno)
+        except _InvalidInput as e:
+            return e.args
+        finally:
+            self.lexer.error_func = error_func
+
+    def _recognize(self, types):
+        # Roda as tabelas LALR só com os tipos dos tokens, sem chamar as
+        # ações nem criar símbolos. Devolve None se a entrada é aceita ou
+        # quantos tokens vieram antes do que causou o erro
+        actions = self._lrtable.lr_action
+        goto = self._lrtable.lr_goto
+        rules = [(p.len, p.name) for p in self._grammar.Productions]
+        stack = [0]
+        state = 0
+        count = 0
+        for type in chain(types, ('$end',)):
+            while True:
+                t = actions[state].get(type)
+                if t is None:
+                    return count
+                if t > 0:
+                    stack.append(t)
+                    state = t
+                    break
+                if t == 0:
+                    return None
+                length, name = rules[-t]
+                del stack[len(stack) - length:]
+                state = goto[stack[-1]][name]
+                stack.append(state)
+            count += 1
+
+    def _syntax_error(self, tok, at_end, lineno):
+        if tok is None:
+            return ("Syntax error at the end of input", lineno, 1)
+        if at_end:
+            return ("Syntax error at the end of input", tok.lineno,
+                    self.lexer.line_table.column(tok.end))
+        line, column = self.lexer._make_location(tok)
+        return ("Syntax error near the symbol %s" % tok.value, line, column)
 
     # Internal auxiliary methods
-    def _token_coord(self, p):
-        line, column = self.lexer._make_location(p)
-        return Coord(line, column)
+    def _located(self, node, p, shift=0):
+        # Coordenada do primeiro token de p, com a coluna somada a shift
+        return node.locate(p.lineno, p.index + shift, self.lines)
+
+    def _located_as(self, node, other):
+        # Mesma coordenada de outro nó
+        position = other.position
+        return node.locate(position >> OFFSET_BITS, position & OFFSET_MASK, other.lines)
 
     # Error handling rule
     def error(self, p):
+        self.error_count += 1
         if p:
             if hasattr(p, 'lineno'):
                 print("Error at line %d near the symbol %s " % (p.lineno, p.value))
@@ -51,12 +499,14 @@ class UChuckParser(Parser):
     # <program> ::= <statement_list> EOF
     @_('statement_list')
     def program(self, p):
-        return Program(p.statement_list)
+        return self.nodes.Program(p.statement_list)
   
     
     @_('statement_list statement')
     def statement_list(self, p):
-        return p.statement_list + [p.statement]
+        # Acumula na própria lista (evita copiar a lista inteira a cada redução)
+        p.statement_list.append(p.statement)
+        return p.statement_list
 
     @_('statement')
     def statement_list(self, p):
@@ -94,47 +544,40 @@ class UChuckParser(Parser):
     #                    | "continue" ";"
     @_('BREAK SEMI')
     def jump_statement(self, p):
-        coord = self._token_coord(p)
-        return BreakStatement(coord=coord)
+        return self._located(self.nodes.BreakStatement(), p)
 
     @_('CONTINUE SEMI')
     def jump_statement(self, p):
-        coord = self._token_coord(p)
-        return ContinueStatement(coord=coord)
+        return self._located(self.nodes.ContinueStatement(), p)
  
 
 
     # <selection_statement> ::= "if" "(" <expression> ")" <statement> { "else" <statement> }?
     @_('IF LPAREN expression RPAREN statement ELSE statement')
     def selection_statement(self, p):
-        coord = self._token_coord(p)
-        return IfStatement(p.expression, p.statement0, p.statement1, coord=coord)
+        return self._located(self.nodes.IfStatement(p.expression, p.statement0, p.statement1), p)
 
     @_('IF LPAREN expression RPAREN statement')
     def selection_statement(self, p):
-        coord = self._token_coord(p)
-        return IfStatement(p.expression, p.statement, None, coord=coord)
+        return self._located(self.nodes.IfStatement(p.expression, p.statement, None), p)
 
 
 
     # <loop_statement> ::= "while" "(" <expression> ")" <statement>
     @_('WHILE LPAREN expression RPAREN statement')
     def loop_statement(self, p):
-        coord = self._token_coord(p)
-        return WhileStatement(p.expression, p.statement, coord=coord)
+        return self._located(self.nodes.WhileStatement(p.expression, p.statement), p)
 
 
 
     # <code_segment> ::= "{" { <statement_list> }? "}"
     @_('LBRACE statement_list RBRACE')
     def code_segment(self, p):
-        coord = self._token_coord(p)
-        return StmtList(p.statement_list, coord=coord)
+        return self._located(self.nodes.StmtList(p.statement_list), p)
 
     @_('LBRACE RBRACE')
     def code_segment(self, p):
-        coord = self._token_coord(p)
-        return StmtList([], coord=coord)
+        return self._located(self.nodes.StmtList([]), p)
 
 
 
@@ -142,27 +585,26 @@ class UChuckParser(Parser):
     # <expression_statement> ::= { <expression> }? ";"
     @_('expression SEMI')
     def expression_statement(self, p):
-        coord = self._token_coord(p)
-        return ExpressionAsStatement(p.expression, coord=coord)
+        return self._located(self.nodes.ExpressionAsStatement(p.expression), p)
 
     @_('SEMI')
     def expression_statement(self, p):
-        coord = self._token_coord(p)
-        return ExpressionAsStatement(None, coord=coord)
+        return self._located(self.nodes.ExpressionAsStatement(None), p)
 
 
     # <expression> ::= <chuck_expression> { "," <chuck_expression> }*
 
     @_('expression COMMA expression')
     def expression(self, p):
-        if isinstance(p.expression0, ExprList):
-            expressions = p.expression0.exprs + [p.expression1]
-            coord = p.expression0.coord  
-        else:
-            expressions = [p.expression0, p.expression1]
-            coord = p.expression0.coord  
+        # A regra é associativa à esquerda: se o lado esquerdo já é uma
+        # ExprList, basta acrescentar o novo elemento nela
+        # As classes vão pelo nome: num parse para arena os nós são
+        # visões de ast_arena
+        if p.expression0.__class__.__name__ == 'ExprList':
+            p.expression0.exprs.append(p.expression1)
+            return p.expression0
 
-        return ExprList(expressions, coord=coord)
+        return self._located_as(self.nodes.ExprList([p.expression0, p.expression1]), p.expression0)
 
 
 
@@ -174,8 +616,7 @@ class UChuckParser(Parser):
     # <chuck_expression> ::= { <chuck_expression> "=>" }? <decl_expression>
     @_('chuck_expression CHUCK decl_expression')
     def chuck_expression(self, p):
-        coord = self._token_coord(p)
-        return ChuckOp(p.chuck_expression, p.decl_expression, coord=coord)
+        return self._located(self.nodes.ChuckOp(p.chuck_expression, p.decl_expression), p)
 
 
 
@@ -190,13 +631,12 @@ class UChuckParser(Parser):
     #                     | <type_decl> <identifier>
     @_('type_decl ID')
     def decl_expression(self, p):
-        coord = self._token_coord(p)
         # Se p.type_decl já for Type, só usa ele!
         if isinstance(p.type_decl, Type):
             dtype = p.type_decl
         else:
-            dtype = Type(p.type_decl, coord=coord)
-        return VarDecl(dtype, ID(p.ID, coord=coord), coord=coord)
+            dtype = self._located(self.nodes.Type(p.type_decl), p)
+        return self._located(self.nodes.VarDecl(dtype, self._located(self.nodes.ID(self.names.intern(p.ID)), p)), p)
 
 
 
@@ -243,81 +683,69 @@ class UChuckParser(Parser):
    
     @_('binary_expression PLUS binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        if isinstance(p.binary_expression0, UnaryOp):
-            coord.column += 1
-        return BinaryOp('+', p.binary_expression0, p.binary_expression1, coord=coord)
+        shift = 0
+        if p.binary_expression0.__class__.__name__ == 'UnaryOp':
+            shift = 1
+        return self._located(self.nodes.BinaryOp('+', p.binary_expression0, p.binary_expression1), p, shift)
 
 
     @_('binary_expression MINUS binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('-', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('-', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression TIMES binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('*', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('*', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression DIVIDE binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('/', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('/', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression PERCENT binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('%', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('%', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression LE binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('<=', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('<=', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression LT binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('<', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('<', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression GE binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('>=', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('>=', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression GT binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('>', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('>', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression EQ binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        return BinaryOp('==', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('==', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression NEQ binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p) 
-        return BinaryOp('!=', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('!=', p.binary_expression0, p.binary_expression1), p)
 
     @_('binary_expression AND binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
+        shift = 0
 
         
         left_coord = getattr(p.binary_expression0, "coord", None)
 
         
-        if left_coord and coord.column != left_coord.column:
-            coord.column += 1  
+        if left_coord and self.lines.column(p.index) != left_coord.column:
+            shift = 1
 
-        return BinaryOp('&&', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('&&', p.binary_expression0, p.binary_expression1), p, shift)
 
 
     @_('binary_expression OR binary_expression')
     def binary_expression(self, p):
-        coord = self._token_coord(p)
-        coord.column += 1  
-        return BinaryOp('||', p.binary_expression0, p.binary_expression1, coord)
+        return self._located(self.nodes.BinaryOp('||', p.binary_expression0, p.binary_expression1), p, 1)
 
 
     @_('unary_expression')
@@ -329,13 +757,12 @@ class UChuckParser(Parser):
     #                      | <unary_operator> <unary_expression>
     @_('MINUS expression')
     def expression(self, p):
-        coord = self._token_coord(p.MINUS)  
-        return UnaryOp('-', p.expression, coord=coord)
+        return self._located(self.nodes.UnaryOp('-', p.expression), p.MINUS)
 
 
     @_('unary_operator unary_expression')
     def unary_expression(self, p):
-        return UnaryOp(p.unary_operator, p.unary_expression, coord=p.unary_expression.coord)
+        return self._located_as(self.nodes.UnaryOp(p.unary_operator, p.unary_expression), p.unary_expression)
 
 
     @_('primary_expression')
@@ -374,8 +801,7 @@ class UChuckParser(Parser):
 
     @_('L_HACK expression R_HACK')
     def primary_expression(self, p):
-        coord = self._token_coord(p)
-        return PrintStatement(p.expression, coord=coord)
+        return self._located(self.nodes.PrintStatement(p.expression), p)
 
 
 
@@ -391,69 +817,420 @@ class UChuckParser(Parser):
     #             | "false"
     @_('INT_VAL')
     def literal(self, p):
-        coord = self._token_coord(p)
-        return Literal('int', p.INT_VAL, coord=coord)
+        return self._located(self.nodes.Literal('int', self.names.constant(p.INT_VAL)), p)
 
     @_('FLOAT_VAL')
     def literal(self, p):
-        coord = self._token_coord(p)
-        return Literal('float', p.FLOAT_VAL, coord=coord)
+        return self._located(self.nodes.Literal('float', self.names.constant(p.FLOAT_VAL)), p)
 
     @_('STRING_LIT')
     def literal(self, p):
-        coord = self._token_coord(p)
-        return Literal('string', p.STRING_LIT, coord=coord)
+        return self._located(self.nodes.Literal('string', self.names.constant(p.STRING_LIT)), p)
 
     @_('TRUE')
     def literal(self, p):
-        coord = self._token_coord(p)
-        return Literal('int', 1, coord=coord)
+        return self._located(self.nodes.Literal('int', 1), p)
 
     @_('FALSE')
     def literal(self, p):
-        coord = self._token_coord(p)
-        return Literal('int', 0, coord=coord)
+        return self._located(self.nodes.Literal('int', 0), p)
 
     
 
     # <location> ::= <identifier>
     @_('ID')
     def location(self, p):
-        coord = self._token_coord(p)
-        return Location(p.ID, coord=coord)
+        return self._located(self.nodes.Location(self.names.intern(p.ID)), p)
 
     
 
+def _ignore_error(msg, x, y):
+    pass
+
+
+def _statement_index(stmts, offset):
+    # Quantas instruções de stmts começam até offset
+    lo, hi = 0, len(stmts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if stmts[mid].position & OFFSET_MASK <= offset:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _blocks(stmt):
+    # Blocos de uma instrução que não estão dentro de outro bloco, na
+    # ordem do texto
+    if isinstance(stmt, StmtList):
+        return [stmt]
+    if isinstance(stmt, WhileStatement):
+        return _blocks(stmt.body)
+    if isinstance(stmt, IfStatement):
+        blocks = _blocks(stmt.consequence)
+        if stmt.alternative is not None:
+            blocks += _blocks(stmt.alternative)
+        return blocks
+    return []
+
+
+_child_fields_cache = {}
+
+
+def _child_fields(node_class):
+    # Campos de uma classe da AST que podem ter nós ou listas de nós
+    fields = _child_fields_cache.get(node_class)
+    if fields is None:
+        fields = _child_fields_cache[node_class] = tuple(
+            field for field in node_class.__slots__ if field not in ANNOTATIONS)
+    return fields
+
+
+def _shift_nodes(nodes, end, shift, skip=None):
+    # Soma shift à posição dos nós a partir do offset end, sem entrar em
+    # skip
+    stack = list(nodes)
+    pop = stack.pop
+    push = stack.append
+    fields_of = _child_fields_cache.get
+    while stack:
+        node = pop()
+        if node is skip:
+            continue
+        if node.lines is not None and node.position & OFFSET_MASK >= end:
+            node.position += shift
+        node_class = node.__class__
+        for field in fields_of(node_class) or _child_fields(node_class):
+            value = getattr(node, field, None)
+            if value.__class__ is list:
+                stack.extend(value)
+            elif isinstance(value, Node):
+                push(value)
+
+
+class _InvalidInput(Exception):
+    """Stops UChuckParser.validate at the first lexical error."""
+
+
+class _Fallback(Exception):
+    """Raised by DescentParser on input it leaves to the LALR driver."""
+
+
+class DescentParser:
+    """The "descent" engine of UChuckParser.
+
+    Statements are parsed by recursive descent and binary_expression by
+    precedence climbing, with the levels of UChuckParser.precedence.
+    The nodes and their coordinates are the ones the grammar actions of
+    UChuckParser build: a coordinate is the position of the first token
+    of the production, with the same column adjustments for "+", "&&"
+    and "||"; UnaryOp and ExprList have the coordinate of their first
+    child.
+
+    Input the LALR tables reject, and "-" followed by "!", "int" or
+    "float" at the start of an expression (the production
+    `expression : MINUS expression`, whose action fails), is given to
+    the LALR driver from the start of the top-level statement it is in,
+    so syntax errors, their recovery and their messages stay those of
+    sly. Only the tokens of that statement are kept. So is input nested
+    deeper than MAX_DEPTH, which the LALR driver parses without using
+    the Python stack.
+    """
+
+    __slots__ = ("parser", "tokens", "seen", "stmts", "depth", "tok", "type", "lines", "names",
+                 "nodes")
+
+    # Níveis de aninhamento (blocos, if/while, parênteses, <<< >>> e
+    # operadores unários). Cada nível usa até uns 13 quadros da pilha do
+    # Python (um por nível de precedência), e o limite deixa folga para
+    # quem chama o parser dentro do recursionlimit padrão
+    MAX_DEPTH = 50
+
+    # Níveis de precedência dos operadores de binary_expression
+    LEVELS = {name: level for level, (assoc, *names) in enumerate(UChuckParser.precedence, 1)
+              for name in names
+              if name not in ('COMMA', 'CHUCK', 'EXCLAMATION')}
+
+    OPERATORS = {'PLUS': '+', 'MINUS': '-', 'TIMES': '*', 'DIVIDE': '/', 'PERCENT': '%',
+                 'LE': '<=', 'LT': '<', 'GE': '>=', 'GT': '>', 'EQ': '==', 'NEQ': '!=',
+                 'AND': '&&', 'OR': '||'}
+
+    UNARY = {'PLUS': '+', 'MINUS': '-', 'EXCLAMATION': '!'}
+
+    LITERALS = {'INT_VAL': 'int', 'FLOAT_VAL': 'float', 'STRING_LIT': 'string'}
+
+    def __init__(self, parser):
+        self.parser = parser
+
+    def parse(self, tokens):
+        self.tokens = tokens
+        self.seen = []
+        self.stmts = []
+        self.depth = 0
+        self.lines = self.parser.lines
+        self.names = self.parser.names
+        self.nodes = self.parser.nodes
+        self._advance()
+        try:
+            return self._program()
+        except _Fallback:
+            root = Parser.parse(self.parser, chain(self.seen, tokens))
+        # Num erro de sintaxe o sly esvazia a pilha, e as instruções
+        # anteriores ficariam fora da árvore do mesmo jeito
+        if root is None or self.parser.error_count or not self.stmts:
+            return root
+        return self.nodes.Program(self.stmts + list(root.stmts))
+
+    # Internal auxiliary methods
+    def _advance(self):
+        tok = self.tok = next(self.tokens, None)
+        if tok is None:
+            self.type = '$end'
+        else:
+            self.type = tok.type
+            self.seen.append(tok)
+
+    def _enter(self):
+        # Mais um nível de aninhamento; o _leave correspondente só falta
+        # quando a análise desiste
+        self.depth += 1
+        if self.depth > self.MAX_DEPTH:
+            raise _Fallback
+
+    def _leave(self):
+        self.depth -= 1
+
+    def _expect(self, type):
+        if self.type != type:
+            raise _Fallback
+        self._advance()
+
+    def _located(self, node, tok, shift=0):
+        return node.locate(tok.lineno, tok.index + shift, self.lines)
+
+    # <program> ::= <statement_list> EOF
+    def _program(self):
+        stmts = self.stmts
+        seen = self.seen
+        while self.type != '$end':
+            # Os tokens das instruções já prontas não voltam ao LALR
+            del seen[:-1]
+            stmts.append(self._statement())
+        if not stmts:
+            raise _Fallback
+        return self.nodes.Program(stmts)
+
+    def _statement(self):
+        tok = self.tok
+        type = self.type
+        if type == 'SEMI':
+            self._advance()
+            return self._located(self.nodes.ExpressionAsStatement(None), tok)
+        if type == 'IF':
+            self._enter()
+            self._advance()
+            self._expect('LPAREN')
+            condition = self._expression()
+            self._expect('RPAREN')
+            if_body = self._statement()
+            else_body = None
+            # O "else" fica com o "if" mais próximo (shift no conflito)
+            if self.type == 'ELSE':
+                self._advance()
+                else_body = self._statement()
+            self._leave()
+            return self._located(self.nodes.IfStatement(condition, if_body, else_body), tok)
+        if type == 'WHILE':
+            self._enter()
+            self._advance()
+            self._expect('LPAREN')
+            condition = self._expression()
+            self._expect('RPAREN')
+            body = self._statement()
+            self._leave()
+            return self._located(self.nodes.WhileStatement(condition, body), tok)
+        if type == 'LBRACE':
+            self._enter()
+            self._advance()
+            stmts = []
+            while self.type != 'RBRACE':
+                stmts.append(self._statement())
+            self._advance()
+            self._leave()
+            return self._located(self.nodes.StmtList(stmts), tok)
+        if type == 'BREAK':
+            self._advance()
+            self._expect('SEMI')
+            return self._located(self.nodes.BreakStatement(), tok)
+        if type == 'CONTINUE':
+            self._advance()
+            self._expect('SEMI')
+            return self._located(self.nodes.ContinueStatement(), tok)
+        expression = self._expression()
+        self._expect('SEMI')
+        return self._located(self.nodes.ExpressionAsStatement(expression), tok)
+
+    # <expression> ::= <chuck_expression> { "," <chuck_expression> }*
+    def _expression(self):
+        left = self._chuck_expression()
+        while self.type == 'COMMA':
+            self._advance()
+            right = self._chuck_expression()
+            if left.__class__.__name__ == 'ExprList':
+                left.exprs.append(right)
+            else:
+                left = self.parser._located_as(self.nodes.ExprList([left, right]), left)
+        return left
+
+    # <chuck_expression> ::= { <chuck_expression> "=>" }? <decl_expression>
+    def _chuck_expression(self):
+        start = self.tok
+        if self.type == 'MINUS':
+            self._advance()
+            if self.type in ('EXCLAMATION', 'INT', 'FLOAT'):
+                raise _Fallback
+            operand = self._unary_expression()
+            unary = self.parser._located_as(self.nodes.UnaryOp('-', operand), operand)
+            left = self._binary_rest(unary, start, 0)
+        else:
+            left = self._decl_expression()
+        while self.type == 'CHUCK':
+            self._advance()
+            right = self._decl_expression()
+            left = self._located(self.nodes.ChuckOp(left, right), start)
+        return left
+
+    # <decl_expression> ::= <binary_expression>
+    #                     | <type_decl> <identifier>
+    def _decl_expression(self):
+        tok = self.tok
+        type = self.type
+        if type == 'ID':
+            self._advance()
+            if self.type != 'ID':
+                location = self._located(self.nodes.Location(self.names.intern(tok.value)), tok)
+                return self._binary_rest(location, tok, 0)
+            typename = tok.value
+        elif type == 'INT' or type == 'FLOAT':
+            self._advance()
+            if self.type != 'ID':
+                raise _Fallback
+            typename = type.lower()
+        else:
+            return self._binary_rest(self._unary_expression(), tok, 0)
+        name = self.tok.value
+        self._advance()
+        nodes = self.nodes
+        return self._located(nodes.VarDecl(self._located(nodes.Type(typename), tok),
+                                           self._located(nodes.ID(self.names.intern(name)), tok)), tok)
+
+    # <binary_expression>: continua `left`, que começa no token `start`,
+    # com os operadores de nível >= min_level
+    def _binary_rest(self, left, start, min_level):
+        levels = self.LEVELS
+        while True:
+            level = levels.get(self.type, 0)
+            if level <= min_level:
+                return left
+            type = self.type
+            self._advance()
+            right_start = self.tok
+            right = self._binary_rest(self._unary_expression(), right_start, level)
+            shift = 0
+            if type == 'PLUS':
+                if left.__class__.__name__ == 'UnaryOp':
+                    shift = 1
+            elif type == 'AND':
+                left_coord = getattr(left, "coord", None)
+                if left_coord and self.lines.column(start.index) != left_coord.column:
+                    shift = 1
+            elif type == 'OR':
+                shift = 1
+            left = self._located(self.nodes.BinaryOp(self.OPERATORS[type], left, right), start, shift)
+
+    # <unary_expression> ::= <primary_expression>
+    #                      | <unary_operator> <unary_expression>
+    def _unary_expression(self):
+        op = self.UNARY.get(self.type)
+        if op is None:
+            return self._primary_expression()
+        self._enter()
+        self._advance()
+        operand = self._unary_expression()
+        self._leave()
+        return self.parser._located_as(self.nodes.UnaryOp(op, operand), operand)
+
+    # <primary_expression> ::= <literal>
+    #                        | <location>
+    #                        | "<<<" <expression> ">>>"
+    #                        | "(" <expression> ")"
+    def _primary_expression(self):
+        tok = self.tok
+        type = self.type
+        if type == 'ID':
+            self._advance()
+            return self._located(self.nodes.Location(self.names.intern(tok.value)), tok)
+        if type in self.LITERALS:
+            self._advance()
+            return self._located(self.nodes.Literal(self.LITERALS[type], self.names.constant(tok.value)), tok)
+        if type == 'TRUE' or type == 'FALSE':
+            self._advance()
+            return self._located(self.nodes.Literal('int', 1 if type == 'TRUE' else 0), tok)
+        if type == 'LPAREN':
+            self._enter()
+            self._advance()
+            expression = self._expression()
+            self._expect('RPAREN')
+            self._leave()
+            return expression
+        if type == 'L_HACK':
+            self._enter()
+            self._advance()
+            expression = self._expression()
+            self._expect('R_HACK')
+            self._leave()
+            return self._located(self.nodes.PrintStatement(expression), tok)
+        raise _Fallback
+
+
 def build_tree(root):
     return '\n'.join(_build_tree(root))
 
 def _build_tree(node):
-    if isinstance(node, list):
-        if not node: return
-        node = tuple(node)
-
-    if not isinstance(node, tuple):
-        yield " "+str(node)
-        return
-
-    values = [_build_tree(n) for n in node]
-    if len(values) == 1:
-        yield from build_lines('──', '  ', values[0])
-        return
-
-    start, *mid, end = values
-    yield from build_lines('┬─', '│ ', start)
-    for value in mid:
-        yield from build_lines('├─', '│ ', value)
-    yield from build_lines('└─', '  ', end)
-
-def build_lines(first, other, values):
-    try:
-        yield first + next(values)
-        for value in values:
-            yield other + value
-    except StopIteration:
-        return
+    # Linhas do desenho de uma árvore de tuplas e listas, em pré-ordem
+    # com uma pilha explícita. Cada nível do caminho até a folha atual tem
+    # o prefixo da primeira linha do filho e o das demais, e diz se a
+    # primeira linha já saiu
+    path = []
+    stack = [(node, 0, None, None)]
+    while stack:
+        node, depth, first, other = stack.pop()
+        del path[depth:]
+        if first is not None:
+            path.append([first, other, False])
+        if isinstance(node, list):
+            if not node: continue
+            node = tuple(node)
+
+        if not isinstance(node, tuple):
+            prefix = []
+            for level in path:
+                prefix.append(level[1] if level[2] else level[0])
+                level[2] = True
+            yield ''.join(prefix) + " " + str(node)
+            continue
+
+        depth = len(path)
+        if len(node) == 1:
+            stack.append((node[0], depth, '──', '  '))
+            continue
+
+        start, *mid, end = node
+        stack.append((end, depth, '└─', '  '))
+        for value in reversed(mid):
+            stack.append((value, depth, '├─', '│ '))
+        stack.append((start, depth, '┬─', '│ '))
 
 def print_error(msg, x, y):
     # use stdout to match with the output in the .out test files
@@ -475,9 +1252,12 @@ def print_error(msg, x, y):
             ast.show(showcoord=True)'''
 
 def main(args):
+    # Só quem roda todas as fases carrega a análise semântica e o gerador
+    from analisador_semantico import Visitor
+    from gerador_codigo import CodeGenerator
     parser = UChuckParser(print_error)
     with open(args[0], 'r') if len(args) > 0 else sys.stdin as f:
-        ast = parser.parse(f.read())
+        ast = parser.parse_stream(f)
         if ast is not None:
             sema = Visitor()
             sema.visit(ast)     # análise semântica
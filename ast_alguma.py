@@ -1,45 +1,259 @@
+import json
 import sys
+from collections.abc import MutableMapping
 
 def represent_node(obj, indent=0):
-    def _repr(obj, indent, printed_set):
+    # Pilha explícita: cada item é um trecho pronto (str) ou um nó ou
+    # lista ainda por representar, com seu recuo. Os valores escalares
+    # entram direto no trecho de quem os contém
+    pieces = []
+    printed_set = set()
+    stack = [(obj, indent)]
+    while stack:
+        item = stack.pop()
+        if item.__class__ is str:
+            pieces.append(item)
+            continue
+        obj, indent = item
         if isinstance(obj, list):
             if not obj:
-                return "[]"
-            indent += 4
-            sep = ",\n" + (" " * indent)
-            return (
-                "[\n"
-                + sep.join(_repr(e, indent, printed_set) for e in obj)
-                + "\n" + (" " * (indent - 4)) + "]"
-            )
+                pieces.append("[]")
+                continue
+            inner = indent + 4
+            sep = ",\n" + (" " * inner)
+            pending = []
+            text = "[\n"
+            for n, element in enumerate(obj):
+                if n:
+                    text += sep
+                if isinstance(element, (Node, list)):
+                    pending.append(text)
+                    pending.append((element, inner))
+                    text = ""
+                else:
+                    text += _represent_scalar(element)
+            pending.append(text + "\n" + (" " * indent) + "]")
+            stack.extend(reversed(pending))
         elif isinstance(obj, Node):
             if obj in printed_set:
-                return f"{obj.__class__.__name__}(...)"
+                pieces.append(f"{obj.__class__.__name__}(...)")
+                continue
             printed_set.add(obj)
 
-            class_name = obj.__class__.__name__
-            attrs = []
-            indent += 4
-            for name in obj.__slots__:
-                if name == "attrs":  # ignora campo interno
+            inner = indent + 4
+            sep = ",\n" + (" " * inner)
+            pending = []
+            text = f"{obj.__class__.__name__}(\n" + (" " * inner)
+            first = True
+            labels = PRINTED_NAMES.get(obj.__class__.__name__, {})
+            for name in obj.__slots__ + ("coord",):
+                if name in ANNOTATIONS:  # ignora campos internos
                     continue
                 value = getattr(obj, name, None)
                 if value is None:
                     continue
-                value_str = _repr(value, indent + len(name) + 1, printed_set)
-                attrs.append(f"{name}={value_str}")
-            sep = ",\n" + (" " * indent)
-            result = f"{class_name}(\n" + (" " * indent) + sep.join(attrs) + "\n" + (" " * (indent - 4)) + ")"
-            return result
-        elif isinstance(obj, tuple) and len(obj) == 2 and all(isinstance(x, int) for x in obj):
-            return f"{obj[0]}:{obj[1]}"
-        elif isinstance(obj, str):
-            return f"'{obj}'"
+                if not first:
+                    text += sep
+                first = False
+                label = labels.get(name, name)
+                text += label + "="
+                if isinstance(value, (Node, list)):
+                    pending.append(text)
+                    pending.append((value, inner + len(label) + 1))
+                    text = ""
+                else:
+                    text += _represent_scalar(value)
+            pending.append(text + "\n" + (" " * indent) + ")")
+            stack.extend(reversed(pending))
         else:
-            return str(obj)
-
-    printed_set = set()
-    return _repr(obj, indent, printed_set)
+            pieces.append(_represent_scalar(obj))
+    return "".join(pieces)
+
+
+def _represent_scalar(obj):
+    if isinstance(obj, tuple) and len(obj) == 2 and all(isinstance(x, int) for x in obj):
+        return f"{obj[0]}:{obj[1]}"
+    elif isinstance(obj, str):
+        return f"'{obj}'"
+    else:
+        return str(obj)
+
+
+def write_json(node, buf=sys.stdout):
+    """Write the tree under `node` to `buf` as one JSON object per node:
+    "node" (the class), "coord" ([line, column] or null), the fields of
+    the class (child nodes nested, lists as arrays) and "uchuck_type"
+    once the semantic analysis has set it."""
+    _write_chunks(buf, _json_pieces(node))
+    buf.write("\n")
+
+
+def write_ndjson(node, buf=sys.stdout):
+    """Write the tree under `node` to `buf` as NDJSON, one line per node
+    in preorder. Each line has the scalar fields of write_json plus "id",
+    "parent" (the id of the parent, null at the root), "field" (the field
+    of the parent holding the node) and, in list fields, "index"."""
+    _write_chunks(buf, _ndjson_lines(node))
+
+
+_json_fields_cache = {}
+
+
+def _json_fields(node):
+    # Campos da classe de ast_alguma (as visões de ast_arena têm o mesmo
+    # nome) sem as anotações
+    name = node.__class__.__name__
+    fields = _json_fields_cache.get(name)
+    if fields is None:
+        fields = _json_fields_cache[name] = tuple(
+            field for field in globals()[name].__slots__ if field not in ANNOTATIONS)
+    return fields
+
+
+def _json_header(node):
+    coord = node.coord
+    header = '"node":%s,"coord":%s' % (
+        json.dumps(node.__class__.__name__),
+        "null" if coord is None else "[%s,%s]" % (coord.line, json.dumps(coord.column)))
+    if node.uchuck_type is not None:
+        header += ',"uchuck_type":' + json.dumps(str(node.uchuck_type))
+    return header
+
+
+def _json_pieces(root):
+    # A pilha tem pedaços prontos (str) ou valores a escrever, dentro de
+    # uma tupla
+    dumps = json.dumps
+    stack = [(root,)]
+    while stack:
+        item = stack.pop()
+        if item.__class__ is str:
+            yield item
+            continue
+        value = item[0]
+        if isinstance(value, Node):
+            pending = []
+            for field in _json_fields(value):
+                pending.append(",%s:" % dumps(field))
+                pending.append((getattr(value, field, None),))
+            pending.append("}")
+            yield "{" + _json_header(value)
+            stack.extend(reversed(pending))
+        elif isinstance(value, list):
+            pending = []
+            for n, element in enumerate(value):
+                if n:
+                    pending.append(",")
+                pending.append((element,))
+            pending.append("]")
+            yield "["
+            stack.extend(reversed(pending))
+        else:
+            yield dumps(value, default=str)
+
+
+def _ndjson_lines(root):
+    dumps = json.dumps
+    next_id = 0
+    # (nó, id do pai, campo, índice na lista ou None)
+    stack = [(root, None, None, None)]
+    while stack:
+        node, parent, field, index = stack.pop()
+        line = ['{"id":%d,"parent":%s,"field":%s' % (
+            next_id, "null" if parent is None else parent, dumps(field))]
+        if index is not None:
+            line.append(',"index":%d' % index)
+        line.append("," + _json_header(node))
+        children = []
+        for name in _json_fields(node):
+            value = getattr(node, name, None)
+            if isinstance(value, Node):
+                children.append((value, next_id, name, None))
+            elif isinstance(value, list):
+                children.extend((element, next_id, name, n)
+                                for n, element in enumerate(value) if element is not None)
+            elif value is not None:
+                line.append(",%s:%s" % (dumps(name), dumps(value, default=str)))
+        line.append("}\n")
+        yield "".join(line)
+        next_id += 1
+        stack.extend(reversed(children))
+
+
+def _write_chunks(buf, pieces, size=1 << 16):
+    """Write the strings of `pieces` to `buf`, joined into writes of about
+    `size` characters. What was produced before an error is still
+    written."""
+    chunk = []
+    length = 0
+    try:
+        for piece in pieces:
+            chunk.append(piece)
+            length += len(piece)
+            if length >= size:
+                buf.write("".join(chunk))
+                chunk.clear()
+                length = 0
+    finally:
+        if chunk:
+            buf.write("".join(chunk))
+
+
+# Node.position guarda a linha nos bits acima dos OFFSET_BITS do offset
+OFFSET_BITS = 40
+OFFSET_MASK = (1 << OFFSET_BITS) - 1
+
+# inspect.CO_GENERATOR (sem importar inspect, que é lento)
+CO_GENERATOR = 0x20
+
+# Devolvido por next() quando um método gerador de NodeVisitor termina
+_DONE = object()
+
+# Anotações da análise semântica e do gerador de código. Cada classe só
+# tem slots para as que recebe; as outras valem None
+ANNOTATIONS = ("uchuck_type", "gen_location", "defn", "symtab", "loop")
+
+# Nomes que represent_node mostra para os campos que mudaram de nome (os
+# antigos continuam como propriedades)
+PRINTED_NAMES = {
+    "IfStatement": {"test": "condition", "consequence": "if_body", "alternative": "else_body"},
+    "WhileStatement": {"test": "condition"},
+}
+
+
+class Attrs(MutableMapping):
+    """Dictionary view of the annotations of a node, for code written
+    against the old `node.attrs` dict. Unset annotations are missing
+    keys; keys other than the ANNOTATIONS of the node raise KeyError on
+    assignment."""
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def __getitem__(self, key):
+        value = getattr(self.node, key, None) if key in ANNOTATIONS else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in ANNOTATIONS:
+            raise KeyError(key)
+        try:
+            setattr(self.node, key, value)
+        except AttributeError:
+            raise KeyError("%s has no annotation %r" % (type(self.node).__name__, key)) from None
+
+    def __delitem__(self, key):
+        self[key]
+        setattr(self.node, key, None)
+
+    def __iter__(self):
+        return (key for key in ANNOTATIONS if getattr(self.node, key, None) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
 
 
 class Node:
@@ -47,12 +261,51 @@ class Node:
     Base class for AST nodes.
 
     Defines `__slots__` to save memory and a `show()` method for printing.
+
+    The annotations made by the later phases (see ANNOTATIONS) are slots
+    of the classes that receive them and read as None while unset;
+    `attrs` gives them as a dict for older code.
+
+    The nodes built by the parser keep their coordinate as one int,
+    `position` (the line and the source offset, see `locate`), plus the
+    line table of the lexer, shared by the whole tree; the Coord is
+    made when `coord` is read. A Coord given to the constructor (or
+    assigned to `coord`) is kept as is, in place of the position.
     """
-    __slots__ = ("coord", "attrs")
+    __slots__ = ("position", "lines")
 
     def __init__(self, coord=None):
-        self.coord = coord
-        self.attrs = {}
+        self.position = coord
+        self.lines = None
+
+    def __getattr__(self, name):
+        # Só chamado quando o atributo não existe ou o slot está vazio
+        if name in ANNOTATIONS:
+            return None
+        raise AttributeError("%r object has no attribute %r" % (type(self).__name__, name))
+
+    @property
+    def attrs(self):
+        return Attrs(self)
+
+    @property
+    def coord(self):
+        if self.lines is None:
+            return self.position
+        position = self.position
+        return Coord(position >> OFFSET_BITS, self.lines.column(position & OFFSET_MASK))
+
+    @coord.setter
+    def coord(self, coord):
+        self.position = coord
+        self.lines = None
+
+    def locate(self, line, offset, lines):
+        """Set the coordinate to `line` and the column of the source
+        `offset` in `lines` (a LineTable of the lexer)."""
+        self.position = line << OFFSET_BITS | offset
+        self.lines = lines
+        return self
 
     def children(self):
         return ()
@@ -71,59 +324,96 @@ class Node:
 
 
     def show(self, buf=sys.stdout, offset=0, attrnames=False, nodenames=False, showcoord=False, _my_node_name=None):
-        lead = " " * offset
-        label = self.__repr__()
-
+        # Pré-ordem com uma pilha explícita; as linhas vão para buf em
+        # blocos. Na pilha, uma str é a linha de um filho ausente
         omit_coord_classes = {"ExpressionAsStatement", "VarDecl"}
-        class_name = self.__class__.__name__
-
-        if showcoord and self.coord and class_name not in omit_coord_classes:
-            label += f" @ {self.coord.line}:{self.coord.column}"
-
-        print(lead + label, file=buf)
-
-        for (child_name, child) in self.children():
-            if child is not None:
-                child.show(
-                    buf=buf,
-                    offset=offset + 4,
-                    attrnames=attrnames,
-                    nodenames=nodenames,
-                    showcoord=showcoord,
-                    _my_node_name=child_name
-                )
-            else:
-                print(" " * (offset + 4) + f"{child_name}: None", file=buf)
-
-
-
-
-
+        lines = []
+        stack = [(self, offset)]
+        try:
+            while stack:
+                item = stack.pop()
+                if item.__class__ is str:
+                    lines.append(item)
+                    continue
+                node, offset = item
+                label = node.__repr__()
+                coord = node.coord if showcoord else None
+                if coord and node.__class__.__name__ not in omit_coord_classes:
+                    label += f" @ {coord.line}:{coord.column}"
+                lines.append(" " * offset + label + "\n")
+                if len(lines) >= 4096:
+                    buf.write("".join(lines))
+                    lines.clear()
+
+                children = node.children()
+                for n in range(len(children) - 1, -1, -1):
+                    child_name, child = children[n]
+                    if child is not None:
+                        stack.append((child, offset + 4))
+                    else:
+                        stack.append(" " * (offset + 4) + f"{child_name}: None\n")
+        finally:
+            if lines:
+                buf.write("".join(lines))
 
 
 class NodeVisitor:
     """A base NodeVisitor class for visiting uchuck_ast nodes.
     Subclass it and define your own visit_XXX methods.
+
+    The method for each node class is looked up once per visitor class and
+    kept in a class-level dispatch table.
+
+    A visit_XXX method may be a generator: each child it yields is visited,
+    on an explicit stack, before the method resumes. Code before the first
+    yield runs in pre-order and code after the last one in post-order, so
+    the depth of the tree is not limited by the recursion limit. Yielding
+    None (an absent optional child) visits nothing. Results are passed
+    through node attributes. Plain methods are called directly.
     """
 
-    _method_cache = None
+    _dispatch = {}
 
-    def visit(self, node):
-        if self._method_cache is None:
-            self._method_cache = {}
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
 
-        visitor = self._method_cache.get(node.__class__.__name__, None)
-        if visitor is None:
-            method = 'visit_' + node.__class__.__name__
-            visitor = getattr(self, method, self.generic_visit)
-            self._method_cache[node.__class__.__name__] = visitor
+    @classmethod
+    def _resolve(cls, node_class):
+        # As visões de ast_arena têm o nome das classes de ast_alguma
+        method = getattr(cls, 'visit_' + node_class.__name__, cls.generic_visit)
+        is_generator = bool(method.__code__.co_flags & CO_GENERATOR)
+        entry = cls._dispatch[node_class] = (method, is_generator)
+        return entry
 
-        return visitor(node)
+    def visit(self, node):
+        dispatch = self._dispatch
+        method, is_generator = dispatch.get(node.__class__) or self._resolve(node.__class__)
+        if not is_generator:
+            return method(self, node)
+
+        stack = []
+        current = method(self, node)
+        while True:
+            child = next(current, _DONE)
+            if child is _DONE:
+                if not stack:
+                    return None
+                current = stack.pop()
+                continue
+            if child is None:
+                continue
+            method, is_generator = dispatch.get(child.__class__) or self._resolve(child.__class__)
+            if is_generator:
+                stack.append(current)
+                current = method(self, child)
+            else:
+                method(self, child)
 
     def generic_visit(self, node):
         for _, child in node.children():
             if isinstance(child, Node):
-                self.visit(child)
+                yield child
 
 class Coord:
     """Coordinates of a syntactic element. Consists of:
@@ -146,7 +436,7 @@ class Coord:
 
 
 class Program(Node):
-    __slots__ = ("stmts",)
+    __slots__ = ("stmts", "symtab")
     def __init__(self, stmts):
         super().__init__()
         self.stmts = stmts
@@ -157,12 +447,11 @@ class Program(Node):
         return "Program:"
 
 class ChuckOp(Node):
-    __slots__ = ("expression", "location", "coord")
+    __slots__ = ("expression", "location", "uchuck_type", "gen_location")
     def __init__(self, expression, location, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.expression = expression
         self.location = location
-        self.coord = coord
 
     def children(self):
         return (None, self.location), (None, self.expression)
@@ -170,21 +459,22 @@ class ChuckOp(Node):
 
 
 class IfStatement(Node):
-    __slots__ = ("condition", "if_body", "else_body", "coord", "test", "consequence", "alternative")
+    __slots__ = ("test", "consequence", "alternative")
     def __init__(self, condition, if_body, else_body=None, coord=None):
-        super().__init__()
-        self.condition = condition
-        self.if_body = if_body
-        self.else_body = else_body
-        self.coord = coord
+        super().__init__(coord)
         self.test = condition
         self.consequence = if_body
         self.alternative = else_body
 
+    # Nomes antigos dos campos
+    condition = property(lambda self: self.test)
+    if_body = property(lambda self: self.consequence)
+    else_body = property(lambda self: self.alternative)
+
     def children(self):
-        children = [(None, self.condition), (None, self.if_body)]
-        if self.else_body is not None:
-            children.append((None, self.else_body))
+        children = [(None, self.test), (None, self.consequence)]
+        if self.alternative is not None:
+            children.append((None, self.alternative))
         return tuple(children)
 
     attr_names = ("coord",)
@@ -194,25 +484,23 @@ class IfStatement(Node):
 
 
 class WhileStatement(Node):
-    __slots__ = ("condition", "body", "coord", "test")
+    __slots__ = ("test", "body")
     def __init__(self, condition, body, coord=None):
-        super().__init__()
-        self.condition = condition
-        self.body = body
-        self.coord = coord
+        super().__init__(coord)
         self.test = condition
+        self.body = body
+    condition = property(lambda self: self.test)
     def children(self):
-        return (None, self.condition), (None, self.body)
+        return (None, self.test), (None, self.body)
     def __repr__(self):
         return f"WhileStatement:"
 
 
 class PrintStatement(Node):
-    __slots__ = ("expr", "coord")
+    __slots__ = ("expr", "uchuck_type")
     def __init__(self, expr, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.expr = expr
-        self.coord = coord
     def children(self):
         return (None, self.expr),
 
@@ -224,13 +512,12 @@ class PrintStatement(Node):
 
 
 class BinaryOp(Node):
-    __slots__ = ("op", "left", "right", "coord")
+    __slots__ = ("op", "left", "right", "uchuck_type", "gen_location")
     def __init__(self, op, left, right, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.op = op
         self.left = left
         self.right = right
-        self.coord = coord
     def children(self):
         return (("left", self.left), ("right", self.right))
     def __repr__(self):
@@ -238,12 +525,11 @@ class BinaryOp(Node):
 
 
 class UnaryOp(Node):
-    __slots__ = ("op", "operand", "coord")
+    __slots__ = ("op", "operand", "uchuck_type", "gen_location")
     def __init__(self, op, operand, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.op = op
         self.operand = operand
-        self.coord = coord
         
     def children(self):
         return (("operand", self.operand),)
@@ -253,7 +539,7 @@ class UnaryOp(Node):
     
 
 class Location(Node):
-    __slots__ = ("name", "coord")
+    __slots__ = ("name", "uchuck_type", "gen_location", "defn")
 
     def __init__(self, name, coord=None):
         super().__init__(coord)
@@ -269,7 +555,7 @@ class Location(Node):
 
 
 class Literal(Node):
-    __slots__ = ("type", "valor", "coord")
+    __slots__ = ("type", "valor", "uchuck_type", "gen_location")
     def __init__(self, type_name, valor, coord=None):
         super().__init__(coord)
         self.type = type_name
@@ -282,7 +568,7 @@ class Literal(Node):
 
 
 class Type(Node):
-    __slots__ = ("typename", "coord")
+    __slots__ = ("typename", "uchuck_type")
 
     def __init__(self, typename, coord=None):
         super().__init__(coord)
@@ -300,12 +586,11 @@ class Type(Node):
 
 
 class VarDecl(Node):
-    __slots__ = ("dtype", "name", "coord")
+    __slots__ = ("dtype", "name", "uchuck_type", "gen_location")
     def __init__(self, dtype, name, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.dtype = dtype  # Nó Type
         self.name = name    # Nó ID
-        self.coord = coord
 
     def children(self):
         # Retorna ambos como filhos!
@@ -319,12 +604,11 @@ class VarDecl(Node):
 
     
 class ExpressionAsStatement(Node):
-    __slots__ = ("expression", "coord")
+    __slots__ = ("expression",)
 
     def __init__(self, expression, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.expression = expression
-        self.coord = coord
 
     def children(self):
         return ((None, self.expression),) if self.expression is not None else ()
@@ -335,11 +619,10 @@ class ExpressionAsStatement(Node):
 
 
 class StmtList(Node):
-    __slots__ = ("stmts", "coord")
+    __slots__ = ("stmts",)
     def __init__(self, stmts, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.stmts = stmts
-        self.coord = coord
     def children(self):
       return tuple((None, stmt) for stmt in (self.stmts or []))
     attr_names = ("coord",)
@@ -347,11 +630,10 @@ class StmtList(Node):
         return f"StmtList:"
       
 class BreakStatement (Node):
-    __slots__ = ("coord",)
+    __slots__ = ("loop",)
 
     def __init__(self, coord=None):
-        super().__init__()
-        self.coord = coord
+        super().__init__(coord)
 
     def children(self):
         return ()
@@ -362,11 +644,10 @@ class BreakStatement (Node):
         return f"BreakStatement:"
 
 class ContinueStatement(Node):
-    __slots__ = ("coord",)
+    __slots__ = ("loop",)
 
     def __init__(self, coord=None):
-        super().__init__()
-        self.coord = coord
+        super().__init__(coord)
 
     def children(self):
         return ()
@@ -377,7 +658,7 @@ class ContinueStatement(Node):
         return f"ContinueStatement:"
       
 class ID(Node):
-    __slots__ = ("name", "coord")
+    __slots__ = ("name",)
     
     def __init__(self, name, coord=None):
         super().__init__(coord)
@@ -390,12 +671,11 @@ class ID(Node):
         return f"ID(name={self.name})"
       
 class ExprList(Node):
-    __slots__ = ("exprs", "coord")
+    __slots__ = ("exprs", "uchuck_type", "gen_location")
 
     def __init__(self, exprs, coord=None):
-        super().__init__()
+        super().__init__(coord)
         self.exprs = exprs
-        self.coord = coord
 
     def children(self):
         return tuple((None, expr) for expr in self.exprs)
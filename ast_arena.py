@@ -0,0 +1,666 @@
+"""Struct-of-arrays representation of the uChuck AST.
+
+An Arena keeps a whole tree in flat typed arrays, one row per node:
+
+    kind          index of the node class in KINDS (0 is a missing child)
+    symbol        index in `symbols` of the operator (BinaryOp, UnaryOp)
+                  or of the literal type (Literal)
+    value         index in `values` of the name (Location, ID), the type
+                  name (Type) or the literal value (Literal)
+    first_child   row of the first child, -1 if there is none
+    next_sibling  row of the next child of the same parent, -1 at the end
+    position      Node.position of the node (line and source offset),
+                  -1 when the coordinate is not a position of `lines`
+
+Rows are numbered in preorder, so the root is row 0 and a traversal of
+the whole tree is `range(len(arena))`.
+
+`UChuckParser.parse(text, arena=True)` builds the arena directly from
+the reductions of the parser (see ArenaBuilder), without making the
+Node objects; `Arena.from_tree` copies a tree that already exists.
+
+`arena.node(row)` gives a view of the row: a Node subclass with the name,
+fields, `children()`, `__repr__` and `show()` of the class of ast_alguma,
+so NodeVisitor subclasses (the semantic analyzer and the code generator)
+run on the arena unchanged. Views are made on each access and keep only
+the arena and the row; `children()` and the fields read the child rows
+straight from the arrays, and the annotations written on views (see
+ANNOTATIONS) are stored in arrays of the arena.
+
+`arena.to_tree()` turns the arena back into Node objects, and
+`arena.dumps()` / `Arena.loads()` give a compact binary form of it.
+"""
+import marshal
+from array import array
+
+import ast_alguma
+from ast_alguma import ANNOTATIONS, OFFSET_BITS, OFFSET_MASK, Coord, Node
+from tabela_linhas import LineTable
+
+# Campos filhos de cada classe, na ordem em que ficam no arena. Um nome
+# com * é uma lista de filhos
+FIELDS = {
+    "Program": ("*stmts",),
+    "ChuckOp": ("location", "expression"),
+    "IfStatement": ("test", "consequence", "alternative"),
+    "WhileStatement": ("test", "body"),
+    "PrintStatement": ("expr",),
+    "BinaryOp": ("left", "right"),
+    "UnaryOp": ("operand",),
+    "Location": (),
+    "Literal": (),
+    "Type": (),
+    "VarDecl": ("dtype", "name"),
+    "ExpressionAsStatement": ("expression",),
+    "StmtList": ("*stmts",),
+    "BreakStatement": (),
+    "ContinueStatement": (),
+    "ID": (),
+    "ExprList": ("*exprs",),
+}
+
+# Campos escalares: o que fica na coluna symbol e o que fica em value
+SYMBOL_FIELDS = {"BinaryOp": "op", "UnaryOp": "op", "Literal": "type"}
+VALUE_FIELDS = {"Location": "name", "ID": "name", "Type": "typename", "Literal": "valor"}
+
+# Nome de cada filho no children() das classes de ast_alguma (None nas
+# que não estão aqui), e as que deixam de fora o último filho ausente
+CHILD_NAMES = {"BinaryOp": ("left", "right"), "UnaryOp": ("operand",)}
+OPTIONAL_LAST = ("IfStatement", "ExpressionAsStatement")
+
+# Nomes antigos de campos, como nas classes de ast_alguma
+ALIASES = {
+    "IfStatement": {"condition": "test", "if_body": "consequence", "else_body": "alternative"},
+    "WhileStatement": {"condition": "test"},
+    "PrintStatement": {"expression": "expr"},
+}
+
+KINDS = (None,) + tuple(FIELDS)
+KIND_OF = {name: kind for kind, name in enumerate(KINDS) if name}
+
+# Muda quando o formato de Arena.dumps muda
+DUMP_FORMAT = 1
+
+
+class Arena:
+    """A whole AST in flat arrays (see the module docstring)."""
+
+    def __init__(self, lines=None):
+        self.kind = array("B")
+        self.symbol = array("H")
+        self.value = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.position = array("q")
+        self.lines = lines
+        self.symbols = []
+        self.values = []
+        # Coordenadas que não são posições de lines, por linha
+        self.coords = {}
+        # Anotação -> array com, por linha, -1 (vazia), o índice em
+        # objects ou -2 - linha quando o valor é um nó do próprio arena
+        self.annotations = {}
+        self.objects = []
+        self._objects = self._intern(self.objects)
+
+    def __len__(self):
+        return len(self.kind)
+
+    @classmethod
+    def from_tree(cls, root, annotations=()):
+        """Build the arena of the tree of Node objects under `root`,
+        copying the annotations named in `annotations`."""
+        arena = cls(_lines_of(root))
+        kind, symbol, value = arena.kind, arena.symbol, arena.value
+        first_child, next_sibling = arena.first_child, arena.next_sibling
+        position, lines, coords = arena.position, arena.lines, arena.coords
+        symbols, values = arena._intern(arena.symbols), arena._intern(arena.values)
+        # Último filho já visto de cada linha, para encadear os irmãos
+        last_child = []
+        # Anotações a copiar e linha de cada nó (para anotações que são nós)
+        pending = []
+        rows = {}
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            row = len(kind)
+            if parent >= 0:
+                if last_child[parent] < 0:
+                    first_child[parent] = row
+                else:
+                    next_sibling[last_child[parent]] = row
+                last_child[parent] = row
+            first_child.append(-1)
+            next_sibling.append(-1)
+            last_child.append(-1)
+            if node is None:
+                kind.append(0)
+                symbol.append(0)
+                value.append(-1)
+                position.append(-1)
+                continue
+            name = type(node).__name__
+            kind.append(KIND_OF[name])
+            if annotations:
+                rows[id(node)] = row
+                for annotation in annotations:
+                    item = getattr(node, annotation, None)
+                    if item is not None:
+                        pending.append((row, annotation, item))
+            field = SYMBOL_FIELDS.get(name)
+            symbol.append(symbols(getattr(node, field)) if field else 0)
+            field = VALUE_FIELDS.get(name)
+            value.append(values(getattr(node, field)) if field else -1)
+            if node.lines is not None and node.lines is lines:
+                position.append(node.position)
+            else:
+                position.append(-1)
+                if node.coord is not None:
+                    coords[row] = node.coord
+            children = []
+            for field in FIELDS[name]:
+                if field[0] == "*":
+                    children.extend(getattr(node, field[1:]) or ())
+                else:
+                    children.append(getattr(node, field))
+            stack.extend((child, row) for child in reversed(children))
+        for row, annotation, item in pending:
+            target = rows.get(id(item)) if isinstance(item, Node) else None
+            arena.annotate(row, annotation, arena.node(target) if target is not None else item)
+        return arena
+
+    def to_tree(self):
+        """Node objects of ast_alguma for the whole arena, with its
+        coordinates and annotations (the inverse of from_tree)."""
+        kind, symbol, value = self.kind, self.symbol, self.value
+        symbols, values, objects = self.symbols, self.values, self.objects
+        position, lines, coords = self.position, self.lines, self.coords
+        nodes = [None] * len(self)
+        # Em pré-ordem os filhos vêm depois do pai: de trás para frente
+        # os filhos de uma linha já estão prontos
+        for row in range(len(self) - 1, -1, -1):
+            k = kind[row]
+            if not k:
+                continue
+            name = KINDS[k]
+            cls = getattr(ast_alguma, name)
+            node = cls.__new__(cls)
+            children = [nodes[child] for child in self.child_rows(row)]
+            fields = FIELDS[name]
+            if fields and fields[0][0] == "*":
+                setattr(node, fields[0][1:], children)
+            else:
+                for field, child in zip(fields, children):
+                    setattr(node, field, child)
+            if name in SYMBOL_FIELDS:
+                setattr(node, SYMBOL_FIELDS[name], symbols[symbol[row]])
+            if name in VALUE_FIELDS:
+                setattr(node, VALUE_FIELDS[name], values[value[row]])
+            if position[row] >= 0:
+                node.position = position[row]
+                node.lines = lines
+            else:
+                node.position = coords.get(row)
+                node.lines = None
+            nodes[row] = node
+        for annotation, column in self.annotations.items():
+            for row, item in enumerate(column):
+                if item != -1:
+                    setattr(nodes[row], annotation, objects[item] if item >= 0 else nodes[-2 - item])
+        return nodes[0]
+
+    def dumps(self, encode=None):
+        """The arena as bytes. `encode` turns the objects of the
+        annotations into values marshal can write."""
+        objects = self.objects if encode is None else [encode(item) for item in self.objects]
+        coords = {row: (coord.line, coord.column) for row, coord in self.coords.items()}
+        return marshal.dumps((
+            DUMP_FORMAT,
+            self.kind.tobytes(), self.symbol.tobytes(), self.value.tobytes(),
+            self.first_child.tobytes(), self.next_sibling.tobytes(), self.position.tobytes(),
+            None if self.lines is None else self.lines.starts.tobytes(),
+            self.symbols, self.values, coords,
+            {name: column.tobytes() for name, column in self.annotations.items()},
+            objects))
+
+    @classmethod
+    def loads(cls, data, decode=None):
+        """Arena written by dumps; `decode` is the inverse of its
+        `encode`. Raises ValueError if `data` is not in this format."""
+        data = marshal.loads(data)
+        if data[0] != DUMP_FORMAT:
+            raise ValueError("unknown arena format %r" % (data[0],))
+        (_, kind, symbol, value, first_child, next_sibling, position, starts,
+         symbols, values, coords, annotations, objects) = data
+        lines = None
+        if starts is not None:
+            lines = LineTable()
+            lines.starts = array("q")
+            lines.starts.frombytes(starts)
+        arena = cls(lines)
+        for name, raw in (("kind", kind), ("symbol", symbol), ("value", value),
+                          ("first_child", first_child), ("next_sibling", next_sibling),
+                          ("position", position)):
+            getattr(arena, name).frombytes(raw)
+        arena.symbols = symbols
+        arena.values = values
+        arena.coords = {row: Coord(line, column) for row, (line, column) in coords.items()}
+        for name, raw in annotations.items():
+            column = arena.annotations[name] = array("i")
+            column.frombytes(raw)
+        # Pelo _intern, para que annotate ache os objetos já presentes
+        for item in objects:
+            arena._objects(item if decode is None else decode(item))
+        return arena
+
+    def _intern(self, pool):
+        # Função que devolve o índice de um valor em pool, incluindo-o
+        index = {}
+
+        def intern(item):
+            key = (type(item), item)
+            found = index.get(key)
+            if found is None:
+                found = index[key] = len(pool)
+                pool.append(item)
+            return found
+        return intern
+
+    def node(self, row):
+        """View of `row`, None for a missing child."""
+        view = VIEWS[self.kind[row]]
+        return view and view(self, row)
+
+    def root(self):
+        return self.node(0)
+
+    def child_rows(self, row):
+        """Rows of the children of `row`, in order."""
+        next_sibling = self.next_sibling
+        child = self.first_child[row]
+        while child >= 0:
+            yield child
+            child = next_sibling[child]
+
+    def coord(self, row):
+        position = self.position[row]
+        if position < 0:
+            return self.coords.get(row)
+        return Coord(position >> OFFSET_BITS, self.lines.column(position & OFFSET_MASK))
+
+    def annotation(self, row, name):
+        column = self.annotations.get(name)
+        if column is None:
+            return None
+        item = column[row]
+        if item == -1:
+            return None
+        if item >= 0:
+            return self.objects[item]
+        return self.node(-2 - item)
+
+    def annotate(self, row, name, item):
+        column = self.annotations.get(name)
+        if column is None:
+            # A coluna só existe depois da primeira anotação com esse nome
+            column = self.annotations[name] = array("i", [-1]) * len(self)
+        if item is None:
+            column[row] = -1
+        elif isinstance(item, NodeView) and item.arena is self:
+            column[row] = -2 - item.index
+        else:
+            column[row] = self._objects(item)
+
+
+class ArenaBuilder:
+    """Makes the nodes of a parse as rows of an arena.
+
+    UChuckParser builds its nodes through `parser.nodes`: the module
+    ast_alguma for a tree, or an ArenaBuilder when it parses into an
+    arena. The methods below have the names and arguments of the
+    classes of ast_alguma and return a view of the new row, so the
+    grammar actions are the same in both cases. Rows are added in the
+    order of the reductions; `finish` keeps only the ones under the
+    root, numbered in preorder.
+    """
+
+    def __init__(self, lines):
+        self.arena = Arena(lines)
+        self._symbols = self.arena._intern(self.arena.symbols)
+        self._values = self.arena._intern(self.arena.values)
+        # ExprList ainda abertas: a gramática acrescenta elementos a elas
+        self._open = []
+
+    def _add(self, name, children=(), symbol=None, value=None):
+        arena = self.arena
+        row = len(arena.kind)
+        kind = KIND_OF[name]
+        arena.kind.append(kind)
+        arena.symbol.append(0 if symbol is None else self._symbols(symbol))
+        arena.value.append(-1 if value is None else self._values(value))
+        arena.position.append(-1)
+        arena.first_child.append(-1)
+        arena.next_sibling.append(-1)
+        if children:
+            self._link(row, children)
+        return VIEWS[kind](arena, row)
+
+    def _link(self, row, children):
+        # Encadeia as linhas dos filhos (visões ou None) sob row
+        arena = self.arena
+        first_child, next_sibling = arena.first_child, arena.next_sibling
+        child = -1
+        for node in children:
+            previous = child
+            if node is None:
+                child = len(arena.kind)
+                arena.kind.append(0)
+                arena.symbol.append(0)
+                arena.value.append(-1)
+                arena.position.append(-1)
+                first_child.append(-1)
+                next_sibling.append(-1)
+            else:
+                child = node.index
+            if previous < 0:
+                first_child[row] = child
+            else:
+                next_sibling[previous] = child
+
+    # Os "construtores", com os argumentos das classes de ast_alguma
+    def Program(self, stmts):
+        return self._add("Program", stmts)
+
+    def ChuckOp(self, expression, location):
+        return self._add("ChuckOp", (location, expression))
+
+    def IfStatement(self, condition, if_body, else_body=None):
+        return self._add("IfStatement", (condition, if_body, else_body))
+
+    def WhileStatement(self, condition, body):
+        return self._add("WhileStatement", (condition, body))
+
+    def PrintStatement(self, expr):
+        return self._add("PrintStatement", (expr,))
+
+    def BinaryOp(self, op, left, right):
+        return self._add("BinaryOp", (left, right), op)
+
+    def UnaryOp(self, op, operand):
+        return self._add("UnaryOp", (operand,), op)
+
+    def Location(self, name):
+        return self._add("Location", value=name)
+
+    def Literal(self, type_name, valor):
+        return self._add("Literal", symbol=type_name, value=valor)
+
+    def Type(self, typename):
+        return self._add("Type", value=typename)
+
+    def VarDecl(self, dtype, name):
+        return self._add("VarDecl", (dtype, name))
+
+    def ExpressionAsStatement(self, expression):
+        return self._add("ExpressionAsStatement", (expression,))
+
+    def StmtList(self, stmts):
+        return self._add("StmtList", stmts)
+
+    def BreakStatement(self):
+        return self._add("BreakStatement")
+
+    def ContinueStatement(self):
+        return self._add("ContinueStatement")
+
+    def ID(self, name):
+        return self._add("ID", value=name)
+
+    def ExprList(self, exprs):
+        view = self._add("ExprList")
+        view = _OpenExprList(view.arena, view.index)
+        view.exprs = exprs
+        self._open.append(view)
+        return view
+
+    def finish(self, root):
+        """The arena of the tree under the view `root`, with its rows
+        renumbered in preorder; the builder is not used after this."""
+        for view in self._open:
+            self._link(view.index, view.exprs)
+        self._open = []
+        arena = self.arena
+        first_child, next_sibling = arena.first_child, arena.next_sibling
+        # Pré-ordem: desce pelos primeiros filhos, guardando os irmãos
+        order = array("i")
+        siblings = [root.index]
+        while siblings:
+            row = siblings.pop()
+            while row >= 0:
+                order.append(row)
+                if next_sibling[row] >= 0:
+                    siblings.append(next_sibling[row])
+                row = first_child[row]
+        # Número novo de cada linha; o último item, -1, é o de -1
+        new = array("i", [-1]) * (len(arena.kind) + 1)
+        for n, row in enumerate(order):
+            new[row] = n
+        renumber = new.__getitem__
+        for name in ("kind", "symbol", "value", "position"):
+            column = getattr(arena, name)
+            setattr(arena, name, array(column.typecode, map(column.__getitem__, order)))
+        arena.first_child = array("i", map(renumber, map(first_child.__getitem__, order)))
+        arena.next_sibling = array("i", map(renumber, map(next_sibling.__getitem__, order)))
+        arena.coords = {new[row]: coord for row, coord in arena.coords.items() if new[row] >= 0}
+        return arena
+
+
+def _lines_of(root):
+    # Tabela de linhas da árvore (a mesma em todos os nós do parser)
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.lines is not None:
+            return node.lines
+        stack.extend(child for _, child in node.children() if child is not None)
+    return None
+
+
+class NodeView(Node):
+    """A row of an Arena seen as a Node. Subclasses are in VIEWS."""
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def coord(self):
+        return self.arena.coord(self.index)
+
+    @coord.setter
+    def coord(self, coord):
+        self.arena.position[self.index] = -1
+        self.arena.coords[self.index] = coord
+
+    # position e lines como os de Node
+    @property
+    def position(self):
+        position = self.arena.position[self.index]
+        return self.arena.coords.get(self.index) if position < 0 else position
+
+    @property
+    def lines(self):
+        return self.arena.lines if self.arena.position[self.index] >= 0 else None
+
+    def locate(self, line, offset, lines):
+        arena = self.arena
+        if lines is not arena.lines:
+            self.coord = Coord(line, lines.column(offset))
+            return self
+        arena.position[self.index] = line << OFFSET_BITS | offset
+        if arena.coords:
+            arena.coords.pop(self.index, None)
+        return self
+
+    def __eq__(self, other):
+        return (isinstance(other, NodeView) and other.arena is self.arena
+                and other.index == self.index)
+
+    def __hash__(self):
+        return hash((id(self.arena), self.index))
+
+
+def _child_field(n):
+    # Todo campo filho tem linha (a de um filho ausente tem kind 0)
+    if n == 0:
+        def get(self):
+            arena = self.arena
+            row = arena.first_child[self.index]
+            view = VIEWS[arena.kind[row]]
+            return view and view(arena, row)
+    else:
+        def get(self):
+            arena = self.arena
+            row = arena.first_child[self.index]
+            for _ in range(n):
+                row = arena.next_sibling[row]
+            view = VIEWS[arena.kind[row]]
+            return view and view(arena, row)
+    return property(get)
+
+
+def _list_field(self):
+    return [node for _, node in _list_children(self)]
+
+
+def _symbol_field(self):
+    return self.arena.symbols[self.arena.symbol[self.index]]
+
+
+def _value_field(self):
+    return self.arena.values[self.arena.value[self.index]]
+
+
+def _annotation_field(name):
+    # Arena.annotation e Arena.annotate, com o caso comum direto
+    def get(self):
+        arena = self.arena
+        column = arena.annotations.get(name)
+        if column is None:
+            return None
+        item = column[self.index]
+        if item >= 0:
+            return arena.objects[item]
+        return None if item == -1 else arena.node(-2 - item)
+
+    def set(self, item):
+        arena = self.arena
+        column = arena.annotations.get(name)
+        if column is None or item is None or isinstance(item, NodeView):
+            arena.annotate(self.index, name, item)
+        else:
+            column[self.index] = arena._objects(item)
+    return property(get, set)
+
+
+def _children_method(name):
+    # children() da classe de ast_alguma, lendo as linhas dos filhos
+    # direto dos arrays
+    fields = FIELDS[name]
+    if not fields:
+        return _no_children
+    if fields[0][0] == "*":
+        return _list_children
+    first, *rest = CHILD_NAMES.get(name) or (None,) * len(fields)
+    optional = name in OPTIONAL_LAST
+    if not rest:
+        def children(self):
+            arena = self.arena
+            row = arena.first_child[self.index]
+            view = VIEWS[arena.kind[row]]
+            if view is None:
+                return () if optional else ((first, None),)
+            return ((first, view(arena, row)),)
+    elif len(rest) == 1:
+        second, = rest
+
+        def children(self):
+            arena = self.arena
+            kind = arena.kind
+            row = arena.first_child[self.index]
+            other = arena.next_sibling[row]
+            view, other_view = VIEWS[kind[row]], VIEWS[kind[other]]
+            return ((first, view and view(arena, row)),
+                    (second, other_view and other_view(arena, other)))
+    else:
+        def children(self):
+            arena = self.arena
+            kind, next_sibling = arena.kind, arena.next_sibling
+            row = arena.first_child[self.index]
+            view = VIEWS[kind[row]]
+            nodes = [(first, view and view(arena, row))]
+            for name in rest:
+                row = next_sibling[row]
+                view = VIEWS[kind[row]]
+                nodes.append((name, view and view(arena, row)))
+            if optional and nodes[-1][1] is None:
+                nodes.pop()
+            return tuple(nodes)
+    return children
+
+
+def _no_children(self):
+    return ()
+
+
+def _list_children(self):
+    arena = self.arena
+    kind, next_sibling = arena.kind, arena.next_sibling
+    nodes = []
+    row = arena.first_child[self.index]
+    while row >= 0:
+        view = VIEWS[kind[row]]
+        nodes.append((None, view and view(arena, row)))
+        row = next_sibling[row]
+    return tuple(nodes)
+
+
+def _view_class(name):
+    # Classe de visão com o nome, os campos e os métodos da classe de
+    # ast_alguma (NodeVisitor escolhe o método pelo nome da classe)
+    source = getattr(ast_alguma, name)
+    namespace = {"__slots__": (), "__module__": __name__,
+                 "__doc__": "View of an arena row of kind %s." % name,
+                 "children": _children_method(name), "__repr__": source.__repr__,
+                 "attr_names": source.attr_names}
+    for n, field in enumerate(FIELDS[name]):
+        if field[0] == "*":
+            namespace[field[1:]] = property(_list_field)
+        else:
+            namespace[field] = _child_field(n)
+    if name in SYMBOL_FIELDS:
+        namespace[SYMBOL_FIELDS[name]] = property(_symbol_field)
+    if name in VALUE_FIELDS:
+        namespace[VALUE_FIELDS[name]] = property(_value_field)
+    for alias, field in ALIASES.get(name, {}).items():
+        namespace[alias] = namespace[field]
+    return type(name, (NodeView,), namespace)
+
+
+for _name in ANNOTATIONS:
+    setattr(NodeView, _name, _annotation_field(_name))
+
+VIEWS = (None,) + tuple(_view_class(name) for name in KINDS[1:])
+
+
+class _OpenExprList(VIEWS[KIND_OF["ExprList"]]):
+    # ExprList de ArenaBuilder antes de finish: os elementos ficam numa
+    # lista, à qual a gramática acrescenta os seguintes
+    __slots__ = ("exprs",)
+
+    def children(self):
+        return tuple((None, expr) for expr in self.exprs)
+
+
+_OpenExprList.__name__ = "ExprList"
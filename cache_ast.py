@@ -0,0 +1,161 @@
+"""On-disk cache of checked uChuck ASTs.
+
+An entry is the AST of a source text after the semantic analysis, keyed
+by a hash of the text and of the compiler itself (compiler_key), so a
+cache hit skips lexing, parsing and checking. Entries are Arena.dumps
+of the tree, with the annotations in CACHED_ANNOTATIONS; the symbol
+table of the Program is not kept.
+
+Entries are written under a temporary name and then renamed, so several
+processes can share the directory. Reading an entry refreshes its
+modification time, and each `put` removes the entries with the oldest
+modification time while the directory is larger than `max_bytes`. It
+also removes the temporary files left behind by writers that died before
+the rename.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from analisador_semantico import FloatType, IntType, StringType
+from ast_arena import DUMP_FORMAT, Arena
+
+# Diretório do cache: o mesmo das tabelas LALR (UCHUCK_CACHE_DIR, vazio
+# desliga o cache), numa subpasta própria
+CACHE_DIR = os.environ.get(
+    "UCHUCK_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__"))
+CACHE_SUBDIR = "uchuck-ast"
+
+# Tamanho máximo do diretório; UCHUCK_AST_CACHE_SIZE muda (em bytes)
+MAX_BYTES = int(os.environ.get("UCHUCK_AST_CACHE_SIZE", 64 * 1024 * 1024))
+
+CACHED_ANNOTATIONS = ("uchuck_type", "defn", "loop")
+
+# Idade (em segundos) a partir da qual um .tmp é de uma escrita que não
+# terminou; os mais novos podem estar sendo escritos por outro processo
+STALE_TMP_SECONDS = 3600
+
+# Muda quando o formato das entradas muda
+CACHE_FORMAT = 1
+
+# Módulos cujo código decide a AST checada
+COMPILER_MODULES = ("tabela_linhas", "tabela_nomes", "analisador_lexico", "analisador_sintatico",
+                    "analisador_semantico", "ast_alguma", "ast_arena", "cache_ast")
+
+TYPES = {t.typename: t for t in (IntType, FloatType, StringType)}
+
+_compiler_key = None
+
+
+def compiler_key():
+    """Hash of the sources of the compiler modules, the entry format and
+    the Python version (marshal depends on it)."""
+    global _compiler_key
+    if _compiler_key is None:
+        h = hashlib.sha256(repr((CACHE_FORMAT, DUMP_FORMAT, sys.version_info[:2],
+                                 sys.byteorder)).encode())
+        root = os.path.dirname(os.path.abspath(__file__))
+        for module in COMPILER_MODULES:
+            with open(os.path.join(root, module + ".py"), "rb") as f:
+                h.update(f.read())
+        _compiler_key = h.hexdigest()
+    return _compiler_key
+
+
+def source_key(source):
+    """Key of the entry of a source text."""
+    return hashlib.sha256(compiler_key().encode() + source.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class ASTCache:
+    """The entries of one cache directory (see the module docstring)."""
+
+    def __init__(self, directory=None, max_bytes=MAX_BYTES):
+        if directory is None:
+            directory = os.path.join(CACHE_DIR, CACHE_SUBDIR) if CACHE_DIR else None
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:40] + ".ast")
+
+    def get(self, source):
+        """Checked AST of `source`, or None if it is not in the cache."""
+        if not self.directory:
+            return None
+        key = source_key(source)
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:64] != key.encode():
+                return None
+            arena = Arena.loads(data[64:], TYPES.__getitem__)
+        except Exception:
+            # Entrada ausente, removida por outro processo ou ilegível
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return arena.to_tree()
+
+    def put(self, source, ast):
+        """Store the checked AST of `source`. Failing to write (e.g. no
+        permission) only leaves it out of the cache."""
+        if not self.directory:
+            return
+        key = source_key(source)
+        arena = Arena.from_tree(ast, CACHED_ANNOTATIONS)
+        data = key.encode() + arena.dumps(lambda t: t.typename)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, self.path(key))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        """Remove the least recently used entries until the directory
+        holds at most max_bytes, and the stale temporary files."""
+        entries = []
+        total = 0
+        stale = time.time() - STALE_TMP_SECONDS
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                is_tmp = entry.name.endswith(".tmp")
+                if not is_tmp and not entry.name.endswith(".ast"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if is_tmp:
+                    if st.st_mtime < stale:
+                        try:
+                            os.unlink(entry.path)
+                        except FileNotFoundError:
+                            pass
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # Outro processo já removeu
+                pass
+            total -= size
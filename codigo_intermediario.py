@@ -0,0 +1,273 @@
+"""Three-address intermediate representation of the uChuck compiler.
+
+CodeGenerator translates the checked AST into an IRFunction: a list of
+typed instructions over explicit operands (the variables of the
+program, temporaries and constants), with labels and branches for the
+control flow. The C code is only the last lowering of it (see
+gerador_codigo.CEmitter), so a pass can inspect and rewrite the code
+before it becomes text.
+
+Every instruction writes at most one operand, `dest`, and `uses` gives
+the operands it reads. `IRFunction.dump` writes the code as text, one
+instruction per line, e.g.:
+
+    _t1 = add int a, 1
+    a = move int _t1
+    if_false _t2 goto L2
+    print string _t3
+"""
+import sys
+
+# Nomes das operações no dump
+BINARY_OPCODES = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div', '%': 'mod',
+                  '==': 'eq', '!=': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge',
+                  '&&': 'and', '||': 'or'}
+UNARY_OPCODES = {'-': 'neg', '+': 'pos', '!': 'not'}
+
+
+# Operandos
+class Var:
+    """A variable of the program. Variables are compared by name."""
+    __slots__ = ("name", "type")
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+    def __eq__(self, other):
+        return other.__class__ is Var and other.name == self.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return "Var(%r, %r)" % (self.name, self.type)
+
+
+class Temp:
+    """A temporary, written by a single instruction."""
+    __slots__ = ("name", "type")
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return "Temp(%r, %r)" % (self.name, self.type)
+
+
+class Const:
+    """An int or float constant, kept as the text of the literal."""
+    __slots__ = ("value", "type")
+
+    def __init__(self, value, type):
+        self.value = value
+        self.type = type
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return "Const(%r, %r)" % (self.value, self.type)
+
+
+# Instruções
+class Instruction:
+    """Base of the instructions."""
+    __slots__ = ()
+
+    dest = None
+
+    def uses(self):
+        return ()
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self)
+
+
+class StringConst(Instruction):
+    """dest = a new copy of the string `text` (without the quotes)."""
+    __slots__ = ("dest", "text")
+
+    def __init__(self, dest, text):
+        self.dest = dest
+        self.text = text
+
+    def __str__(self):
+        return '%s = const string "%s"' % (self.dest, self.text)
+
+
+class BinOp(Instruction):
+    """dest = left op right, with result `type`."""
+    __slots__ = ("op", "type", "dest", "left", "right")
+
+    def __init__(self, op, type, dest, left, right):
+        self.op = op
+        self.type = type
+        self.dest = dest
+        self.left = left
+        self.right = right
+
+    def uses(self):
+        return (self.left, self.right)
+
+    def __str__(self):
+        return "%s = %s %s %s, %s" % (
+            self.dest, BINARY_OPCODES.get(self.op, self.op), self.type, self.left, self.right)
+
+
+class Concat(Instruction):
+    """dest = a new string left + right; `length` is the int temporary
+    that holds its length."""
+    __slots__ = ("dest", "left", "right", "length")
+
+    def __init__(self, dest, left, right, length):
+        self.dest = dest
+        self.left = left
+        self.right = right
+        self.length = length
+
+    def uses(self):
+        return (self.left, self.right)
+
+    def __str__(self):
+        return "%s = concat string %s, %s (length %s)" % (self.dest, self.left, self.right, self.length)
+
+
+class UnOp(Instruction):
+    """dest = op operand, with result `type`."""
+    __slots__ = ("op", "type", "dest", "operand")
+
+    def __init__(self, op, type, dest, operand):
+        self.op = op
+        self.type = type
+        self.dest = dest
+        self.operand = operand
+
+    def uses(self):
+        return (self.operand,)
+
+    def __str__(self):
+        return "%s = %s %s %s" % (self.dest, UNARY_OPCODES.get(self.op, self.op), self.type, self.operand)
+
+
+class Move(Instruction):
+    """dest = src; a string is copied into the buffer of dest."""
+    __slots__ = ("type", "dest", "src")
+
+    def __init__(self, type, dest, src):
+        self.type = type
+        self.dest = dest
+        self.src = src
+
+    def uses(self):
+        return (self.src,)
+
+    def __str__(self):
+        return "%s = move %s %s" % (self.dest, self.type, self.src)
+
+
+class Label(Instruction):
+    """Target of jumps. With `empty`, C gets an empty statement after it."""
+    __slots__ = ("name", "empty")
+
+    def __init__(self, name, empty=False):
+        self.name = name
+        self.empty = empty
+
+    def __str__(self):
+        return "%s:" % self.name
+
+
+class Jump(Instruction):
+    """Go to the label `target`."""
+    __slots__ = ("target",)
+
+    def __init__(self, target):
+        self.target = target
+
+    def __str__(self):
+        return "goto %s" % self.target
+
+
+class BranchFalse(Instruction):
+    """Go to the label `target` if the int `cond` is 0."""
+    __slots__ = ("cond", "target")
+
+    def __init__(self, cond, target):
+        self.cond = cond
+        self.target = target
+
+    def uses(self):
+        return (self.cond,)
+
+    def __str__(self):
+        return "if_false %s goto %s" % (self.cond, self.target)
+
+
+class Print(Instruction):
+    """Print `value`, of `type`, and a newline."""
+    __slots__ = ("type", "value")
+
+    def __init__(self, type, value):
+        self.type = type
+        self.value = value
+
+    def uses(self):
+        return (self.value,)
+
+    def __str__(self):
+        return "print %s %s" % (self.type, self.value)
+
+
+class PrintNewline(Instruction):
+    """Print only a newline."""
+    __slots__ = ()
+
+    def __str__(self):
+        return "print_newline"
+
+
+class Return(Instruction):
+    """Return `value` from the function."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def uses(self):
+        return (self.value,)
+
+    def __str__(self):
+        return "return %s" % self.value
+
+
+class IRFunction:
+    """The IR of a function: its variables and temporaries, in the order
+    they were created, and its instructions."""
+    __slots__ = ("name", "args", "rettype", "locals", "code")
+
+    def __init__(self, name, args, rettype):
+        self.name = name
+        self.args = args
+        self.rettype = rettype
+        self.locals = []
+        self.code = []
+
+    def dump(self, buf=sys.stdout):
+        """Write the function as text."""
+        lines = ["function %s(%s) -> %s" % (self.name, ", ".join(map(str, self.args)), self.rettype)]
+        for operand in self.locals:
+            kind = "var" if operand.__class__ is Var else "temp"
+            lines.append("    %s %s %s" % (kind, operand.type, operand))
+        for instruction in self.code:
+            # Labels um pouco para fora, para achar os blocos
+            indent = "  " if instruction.__class__ is Label else "    "
+            lines.append(indent + str(instruction))
+        buf.write("\n".join(lines) + "\n")
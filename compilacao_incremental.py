@@ -0,0 +1,352 @@
+"""Semantic analysis and C generation of successive versions of a program.
+
+An edit-compile loop usually changes one statement of a large program.
+IncrementalCompiler keeps, for each top-level statement of the last
+version, its checked AST, its diagnostics and its piece of the C code,
+and after an edit it checks and generates again only the statements
+whose inputs changed:
+
+- its source text (from its first token up to the next statement);
+- the declarations it found in the program scope: the type and the C
+  name of every top-level name it looked up or declared;
+- the C names given to its own declarations, which depend on the names
+  taken before it (see CodeGenerator.new_varname).
+
+Temporaries and labels are numbered inside each statement, so a kept
+piece of C is only renumbered when the statements before it now use a
+different number of them. The C code and the diagnostics are the same
+as those of a full Visitor.check and CodeGenerator run.
+
+With `edit`, the parse is incremental too: UChuckParser.reparse parses
+again only the statements around the edit, and the others keep their
+nodes.
+"""
+import re
+import sys
+
+from analisador_semantico import Diagnostic, ErrorType, IntType, SymbolTable, Visitor
+from analisador_sintatico import UChuckParser
+from ast_alguma import OFFSET_MASK, Location, Node, Program, VarDecl
+from codigo_intermediario import IRFunction, Temp
+from gerador_codigo import CEmitter, CodeGenerator
+from tabela_linhas import LineTable
+
+HEADER = "#include <stdio.h>\n#include <stdlib.h>\n#include <string.h>\n\nint main() {\n"
+FOOTER = "    return 0;\n}\n"
+
+# Temporários e labels de um pedaço de C, numerados a partir de 1
+_PLACEHOLDER = re.compile("\0([tL])(\\d+)\0")
+
+
+def _signature(decl):
+    # O que uma instrução usa de uma declaração de fora
+    if decl is None:
+        return None
+    return decl.uchuck_type, decl.gen_location
+
+
+def _nodes(stmt):
+    nodes = []
+    stack = [stmt]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(child for _, child in node.children() if isinstance(child, Node))
+    return nodes
+
+
+class _ProgramTable(SymbolTable):
+    # Tabela do programa que anota o que a instrução sendo checada buscou
+    # e declarou no escopo do programa
+    def __init__(self):
+        super().__init__()
+        self.begin()
+
+    def begin(self):
+        self.uses = {}
+        self.defines = []
+
+    def lookup(self, name):
+        stack = self.symbols.get(name)
+        if not stack:
+            self.uses.setdefault(name, None)
+            return None
+        decl = stack[-1]
+        if len(stack) == 1 and name in self.scopes[0]:
+            self.uses.setdefault(name, _signature(decl))
+        return decl
+
+    def in_scope(self, name):
+        if len(self.scopes) == 1:
+            stack = self.symbols.get(name)
+            self.uses.setdefault(name, _signature(stack[-1]) if stack else None)
+        return super().in_scope(name)
+
+    def add(self, name, value):
+        if len(self.scopes) == 1:
+            self.defines.append((name, value))
+        super().add(name, value)
+
+    def current(self, name):
+        # Declaração visível no escopo do programa, entre duas instruções
+        stack = self.symbols.get(name)
+        return stack[-1] if stack else None
+
+
+class _StatementChecker(Visitor):
+    # Guarda também o nó de cada erro, para refazer a coordenada quando
+    # a instrução muda de lugar
+    def _semantic_error(self, msg_code, node, name="", ltype="", rtype=""):
+        super()._semantic_error(msg_code, node, name, ltype, rtype)
+        self.error_nodes.append(node)
+
+
+class _FragmentGenerator(CodeGenerator):
+    # Gera o C de uma instrução com temporários e labels marcados, e
+    # guarda as declarações na ordem em que ganharam nome
+    def start(self):
+        self.function = IRFunction('main', [], IntType)
+        self.temps = 0
+        self.labels = 0
+        self.decls = []
+
+    def new_temporary(self, type):
+        self.temps += 1
+        temp = Temp('\0t%d\0' % self.temps, type)
+        self.function.locals.append(temp)
+        return temp
+
+    def new_label(self):
+        self.labels += 1
+        return '\0L%d\0' % self.labels
+
+    def visit_VarDecl(self, node):
+        yield from super().visit_VarDecl(node)
+        self.decls.append(node)
+
+
+class _Unit:
+    """One top-level statement and what was computed for it."""
+    __slots__ = ("text", "stmt", "nodes", "uses", "defines", "imports", "diagnostics",
+                 "error_nodes", "decls", "temps", "labels", "locals", "statements",
+                 "base", "code")
+
+
+class IncrementalCompiler:
+    """Check and generate C for new versions of one program, reusing the
+    work done for the statements that did not change (see the module
+    docstring).
+
+    `update` compiles a version and `edit` one made by changing the last
+    one; `program` is its checked AST, `diagnostics` its semantic errors
+    and `show` writes its C code.
+    `rechecked` and `reused` count the statements of the last update
+    that were analyzed again and that were kept.
+    """
+
+    def __init__(self, error_func=None, engine="lalr"):
+        if error_func is None:
+            self.parser = UChuckParser(engine=engine)
+        else:
+            self.parser = UChuckParser(error_func, engine=engine)
+        # Tabela de linhas de todos os nós guardados, atualizada a cada
+        # versão (as colunas dos nós mantidos continuam certas)
+        self.lines = LineTable()
+        self.units = []
+        # Último texto recebido e texto de program
+        self.text = None
+        self.source = None
+        self.program = None
+        self.diagnostics = []
+        self.rechecked = 0
+        self.reused = 0
+
+    def update(self, source):
+        """Compile a new version of the program. Returns its list of
+        Diagnostic, or None if it has lexical or syntax errors; those
+        are reported by the parser and the last version is kept."""
+        self.text = source
+        return self._compile(source, self.parser.parse(source))
+
+    def edit(self, offset, deleted, inserted):
+        """Compile the last source given to `update` or `edit` with its
+        `deleted` characters at `offset` replaced by the str `inserted`.
+        Returns the same as `update`."""
+        text = self.text
+        source = text[:offset] + inserted + text[offset + deleted:]
+        self.text = source
+        if self.program is not None and text is self.source:
+            # Os nós de program são os de text, com as linhas em self.lines
+            ast = self.parser.reparse(self.program, text, offset, deleted, inserted)
+        else:
+            ast = self.parser.parse(source)
+        return self._compile(source, ast)
+
+    def show(self, buf=sys.stdout):
+        """Write the C code of the last version, which must have no
+        diagnostics."""
+        if self.program is None or self.diagnostics:
+            raise ValueError("No program without semantic errors to generate")
+        units = self.units
+        buf.write(HEADER)
+        buf.write("".join(unit.code[0] for unit in units))
+        buf.write("".join(unit.code[1] for unit in units))
+        buf.write(FOOTER)
+
+    # Internal auxiliary methods
+    def _compile(self, source, ast):
+        parser = self.parser
+        if ast is None or parser.lexer.error_count or parser.error_count:
+            return None
+        self.lines.starts = parser.lines.starts
+
+        stmts = ast.stmts
+        starts = [stmt.position & OFFSET_MASK for stmt in stmts]
+        starts.append(len(source))
+        # Depois de reparse, as instruções guardadas que não mudaram são os
+        # próprios nós da árvore; as outras só ficam com unidades cujo nó
+        # saiu dela
+        by_node = {id(unit.stmt): unit for unit in self.units}
+        present = {id(stmt) for stmt in stmts}
+        old = {}
+        for unit in self.units:
+            if id(unit.stmt) not in present:
+                old.setdefault(unit.text, []).append(unit)
+        for same in old.values():
+            same.reverse()
+
+        table = _ProgramTable()
+        checker = _StatementChecker()
+        checker.symtab = table
+        gen = _FragmentGenerator()
+        units = []
+        diagnostics = []
+        temps = labels = 0
+        self.rechecked = self.reused = 0
+        # Nomes do programa declarados por instruções checadas de novo
+        self._replaced = set()
+        for i, stmt in enumerate(stmts):
+            text = source[starts[i]:starts[i + 1]]
+            unit = by_node.get(id(stmt))
+            if unit is None or unit.text != text:
+                same = old.get(text)
+                unit = same.pop() if same else None
+            if unit is not None and self._reuse(unit, stmt, table, gen):
+                self.reused += 1
+            else:
+                unit = self._check(text, stmt, table, checker, gen)
+                self.rechecked += 1
+            diagnostics.extend(unit.diagnostics)
+            if unit.locals is not None:
+                base = temps, labels
+                if unit.base != base:
+                    unit.base = base
+                    unit.code = self._number(unit, temps, labels)
+                temps += unit.temps
+                labels += unit.labels
+            units.append(unit)
+
+        self.units = units
+        self.program = Program([unit.stmt for unit in units])
+        self.program.symtab = table
+        self.source = source
+        self.diagnostics = diagnostics
+        return diagnostics
+
+    def _reuse(self, unit, stmt, table, gen):
+        # As entradas da instrução continuam as mesmas?
+        symbols = table.symbols
+        for name, signature in unit.uses.items():
+            stack = symbols.get(name)
+            if _signature(stack[-1] if stack else None) != signature:
+                return False
+        if unit.locals is not None:
+            # Os nomes no C das declarações têm que sair iguais; se não,
+            # desfaz o que foi reservado
+            taken = []
+            suffixes = []
+            for decl in unit.decls:
+                name = decl.name.name
+                suffixes.append((name, gen.suffixes.get(name)))
+                varname = gen.new_varname(name)
+                taken.append(varname)
+                if varname != decl.gen_location.name:
+                    gen.varnames.difference_update(taken)
+                    for name, suffix in reversed(suffixes):
+                        if suffix is None:
+                            gen.suffixes.pop(name, None)
+                        else:
+                            gen.suffixes[name] = suffix
+                    return False
+
+        # Nós mudam de lugar se o texto antes da instrução mudou
+        delta = stmt.position - unit.stmt.position
+        if delta:
+            for node in unit.nodes:
+                node.position += delta
+        if unit.diagnostics:
+            unit.diagnostics = [Diagnostic(d.code, d.message, node.coord)
+                                for d, node in zip(unit.diagnostics, unit.error_nodes)]
+        # A declaração usada pode ser outro nó com a mesma assinatura, se
+        # a instrução que declara o nome foi checada de novo
+        replaced = self._replaced
+        if replaced:
+            for location in unit.imports:
+                if location.name in replaced:
+                    location.defn = table.current(location.name)
+        for name, decl in unit.defines:
+            table.add(name, decl)
+        return True
+
+    def _check(self, text, stmt, table, checker, gen):
+        unit = _Unit()
+        unit.text = text
+        unit.stmt = stmt
+        unit.nodes = nodes = _nodes(stmt)
+        lines = self.lines
+        for node in nodes:
+            node.lines = lines
+
+        table.begin()
+        checker.loops = []
+        checker.diagnostics = unit.diagnostics = []
+        checker.error_nodes = unit.error_nodes = []
+        checker.visit(stmt)
+        checker.diagnostics = None
+        unit.uses = table.uses
+        unit.defines = table.defines
+        table.begin()
+        self._replaced.update(name for name, _ in unit.defines)
+        own = {node for node in nodes if type(node) is VarDecl}
+        unit.imports = [node for node in nodes if type(node) is Location
+                        and node.defn is not None and node.defn not in own]
+
+        unit.base = unit.code = None
+        if unit.diagnostics or any(signature is not None and signature[0] is ErrorType
+                                   for signature in unit.uses.values()):
+            # Sem C para uma instrução com erro ou que usa uma declaração
+            # com erro (o programa não tem C)
+            unit.locals = None
+            unit.temps = unit.labels = 0
+            return unit
+        gen.start()
+        gen.visit(stmt)
+        function = CEmitter().lower(gen.function)
+        unit.decls = gen.decls
+        unit.temps = gen.temps
+        unit.labels = gen.labels
+        unit.locals = "".join("    %s\n" % line for line in function.locals)
+        unit.statements = "".join("    %s\n" % line for line in function.statements)
+        return unit
+
+    def _number(self, unit, temps, labels):
+        # Dá aos temporários e labels da instrução os números que teriam
+        # na geração do programa inteiro
+        if not unit.temps and not unit.labels:
+            return unit.locals, unit.statements
+
+        def name(match):
+            if match.group(1) == 't':
+                return '_t%d' % (temps + int(match.group(2)))
+            return 'L%d' % (labels + int(match.group(2)))
+        return _PLACEHOLDER.sub(name, unit.locals), _PLACEHOLDER.sub(name, unit.statements)
@@ -0,0 +1,216 @@
+"""Command line entry point of the uChuck compiler.
+
+Usage: python compilador.py COMMAND [options] [FILE]
+
+    lex      print the tokens of FILE
+    parse    print the AST of FILE (--validate: only check the syntax,
+             --format json/ndjson: machine-readable AST)
+    check    run the semantic analysis on FILE
+    emit-ir  print the intermediate code generated for FILE
+    emit-c   print the C code generated for FILE
+    build    compile FILE to an executable with the C compiler
+
+FILE defaults to the standard input. Each command imports only the
+phases it runs, so `lex` and `parse` do not load the semantic analyzer
+or the code generator. `check`, `emit-ir`, `emit-c` and `build` keep
+the checked AST of each source in the cache of cache_ast, and skip
+lexing, parsing and checking when the same source is compiled again
+(--no-cache turns it off).
+"""
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def print_error(msg, x, y):
+    # use stdout to match with the output in the .out test files
+    print("Lexical error: %s at %d:%d" % (msg, x, y), file=sys.stdout)
+
+
+@contextlib.contextmanager
+def _open_input(path):
+    if path in (None, '-'):
+        yield sys.stdin
+    else:
+        with open(path, 'r') as f:
+            yield f
+
+
+@contextlib.contextmanager
+def _open_output(path):
+    if path in (None, '-'):
+        yield sys.stdout
+    else:
+        with open(path, 'w') as f:
+            yield f
+
+
+# As fases devolvem o resultado (None se não houve) e se houve erros
+
+def _parse(args, source=None):
+    from analisador_sintatico import UChuckParser
+    parser = UChuckParser(print_error, args.max_errors, args.parser)
+    if source is None:
+        with _open_input(args.file) as f:
+            ast = parser.parse_stream(f)
+    else:
+        ast = parser.parse(source)
+    if parser.error_count:
+        # A árvore que a recuperação de erros do sly monta não é o
+        # programa: nenhuma fase roda sobre ela
+        return None, True
+    return ast, ast is None or parser.lexer.error_count > 0
+
+
+def _check(args):
+    # Com o cache, um programa já checado não é nem analisado de novo
+    cache = None
+    if args.cache:
+        from cache_ast import ASTCache
+        cache = ASTCache()
+        with _open_input(args.file) as f:
+            source = f.read()
+        ast = cache.get(source)
+        if ast is not None:
+            return ast, False
+        ast, failed = _parse(args, source)
+    else:
+        ast, failed = _parse(args)
+    if ast is not None:
+        from analisador_semantico import Visitor
+        Visitor().visit(ast)    # sai com status 1 num erro semântico
+        # Só entra no cache o que compilou sem nenhuma mensagem
+        if cache is not None and not failed:
+            cache.put(source, ast)
+    return ast, failed
+
+
+def _generate(args):
+    from gerador_codigo import CodeGenerator
+    ast, failed = _check(args)
+    if ast is None:
+        return None, True
+    gen = CodeGenerator()
+    gen.generate(ast)
+    return gen, failed
+
+
+def cmd_lex(args):
+    from analisador_lexico import UChuckLexer
+    lexer = UChuckLexer(print_error, args.max_errors)
+    with _open_input(args.file) as f, _open_output(args.output) as out:
+        for tok in lexer.tokenize_stream(f, keep_lines=False):
+            print(tok, file=out)
+    return 1 if lexer.error_count else 0
+
+
+def cmd_parse(args):
+    if args.validate:
+        return _validate(args)
+    ast, failed = _parse(args)
+    if ast is not None:
+        with _open_output(args.output) as out:
+            if args.format == 'tree':
+                ast.show(buf=out, showcoord=True)
+            else:
+                from ast_alguma import write_json, write_ndjson
+                (write_json if args.format == 'json' else write_ndjson)(ast, out)
+    return 1 if failed else 0
+
+
+def _validate(args):
+    from analisador_sintatico import UChuckParser
+    parser = UChuckParser(print_error, args.max_errors)
+    with _open_input(args.file) as f:
+        error = parser.validate_stream(f)
+    if error is None:
+        return 0
+    msg, line, column = error
+    print("%s:%d:%d: %s" % (args.file or '<stdin>', line, column, msg))
+    return 1
+
+
+def cmd_check(args):
+    ast, failed = _check(args)
+    return 1 if failed else 0
+
+
+def cmd_emit_ir(args):
+    gen, failed = _generate(args)
+    if gen is not None:
+        with _open_output(args.output) as out:
+            gen.show_ir(out)
+    return 1 if failed else 0
+
+
+def cmd_emit_c(args):
+    gen, failed = _generate(args)
+    if gen is not None:
+        with _open_output(args.output) as out:
+            gen.show(out)
+    return 1 if failed else 0
+
+
+def cmd_build(args):
+    gen, failed = _generate(args)
+    if failed:
+        return 1
+    cc = os.environ.get('CC', 'cc')
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'out.c')
+        with open(source, 'w') as out:
+            gen.show(out)
+        result = subprocess.run([cc, source, '-o', args.output])
+    if result.returncode == 0:
+        print("Wrote: %s" % args.output)
+    return result.returncode
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog='compilador', description='uChuck compiler.')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    def add(name, func, help, output='-', parses=True):
+        cmd = commands.add_parser(name, help=help)
+        cmd.add_argument('file', nargs='?', help='source file (default: standard input)')
+        cmd.add_argument('--max-errors', type=int, metavar='N',
+                         help='stop lexing after N lexical errors')
+        if parses:
+            cmd.add_argument('--parser', choices=('lalr', 'descent'), default='lalr',
+                             help='parser engine (default: lalr)')
+        if output is not None:
+            cmd.add_argument('-o', '--output', default=output, metavar='PATH',
+                             help='output file (default: %s)' % (
+                                 'standard output' if output == '-' else output))
+        cmd.set_defaults(func=func)
+        return cmd
+
+    add('lex', cmd_lex, 'print the tokens', parses=False)
+    parse = add('parse', cmd_parse, 'print the AST')
+    parse.add_argument(
+        '--validate', action='store_true',
+        help='only check the syntax, reporting the first error as FILE:LINE:COLUMN')
+    parse.add_argument(
+        '--format', choices=('tree', 'json', 'ndjson'), default='tree',
+        help='print the AST as an indented tree, one JSON document or one '
+             'JSON line per node (default: tree)')
+    checks = [add('check', cmd_check, 'run the semantic analysis', output=None),
+              add('emit-ir', cmd_emit_ir, 'print the generated intermediate code'),
+              add('emit-c', cmd_emit_c, 'print the generated C code'),
+              add('build', cmd_build, 'compile to an executable', output='a.out')]
+    for cmd in checks:
+        cmd.add_argument('--no-cache', dest='cache', action='store_false',
+                         help='do not use the cache of checked ASTs')
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
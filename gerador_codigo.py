@@ -1,6 +1,11 @@
 import sys
 from ast_alguma import *
 from analisador_semantico import *
+from codigo_intermediario import (BinOp, BranchFalse, Concat, Const, IRFunction, Jump, Label, Move,
+                                  Print, PrintNewline, Return, StringConst, Temp, UnOp, Var)
+
+# Tipo no C de cada tipo da linguagem
+C_TYPES = {IntType: "int", FloatType: "double", StringType: "char*"}
 
 class Function:
     def __init__(self, name, args, rettype):
@@ -22,40 +27,148 @@ class Function:
 
 
 
+class CEmitter:
+    """Lowers an IRFunction to a Function of C source lines, the last
+    step of CodeGenerator."""
+
+    _dispatch = {}
+
+    def lower(self, code):
+        function = Function(code.name, code.args, C_TYPES[code.rettype])
+        for operand in code.locals:
+            ctype = C_TYPES[operand.type]
+            # Só as variáveis de string começam com NULL (o realloc das
+            # atribuições precisa disso)
+            if operand.__class__ is Var and ctype == 'char*':
+                function.locals.append(f"{ctype} {operand} = NULL;")
+            else:
+                function.locals.append(f"{ctype} {operand};")
+        dispatch = self._dispatch
+        append = function.statements.append
+        for instruction in code.code:
+            method = dispatch.get(instruction.__class__)
+            if method is None:
+                method = dispatch[instruction.__class__] = getattr(
+                    CEmitter, 'lower_' + instruction.__class__.__name__)
+            method(self, instruction, append)
+        return function
+
+    def lower_StringConst(self, instruction, append):
+        value_inner = instruction.text
+        # CASO ESPECIAL: apenas uma quebra de linha
+        if value_inner == '\\n' or value_inner == '\n':
+            c_value = '\\n' if value_inner == '\\n' else '\n'
+        else:
+            # Faz escape duplo: unicode_escape cobre multiline e \n, replace cobre aspas duplas
+            c_value = (
+                value_inner.encode('unicode_escape').decode('ascii')
+                .replace('"', '\\"')
+            )
+        append(f'{instruction.dest} = strdup("{c_value}");')
+
+    def lower_BinOp(self, instruction, append):
+        append(f"{instruction.dest} = {instruction.left} {instruction.op} {instruction.right};")
+
+    def lower_Concat(self, instruction, append):
+        # Concatenação de strings (char*) usando malloc, strcpy, strcat
+        result, lvalue, rvalue = instruction.dest, instruction.left, instruction.right
+        append(f'{instruction.length} = strlen({lvalue}) + strlen({rvalue});')
+        append(f'{result} = malloc({instruction.length} + 1);')
+        append(f'strcpy({result}, {lvalue});')
+        append(f'strcat({result}, {rvalue});')
+
+    def lower_UnOp(self, instruction, append):
+        append(f"{instruction.dest} = {instruction.op}{instruction.operand};")
+
+    def lower_Move(self, instruction, append):
+        varname, value = instruction.dest, instruction.src
+        if C_TYPES[instruction.type] == 'char*':
+            append(f'{varname} = strcpy(realloc({varname}, strlen({value})+1), {value});')
+        else:
+            append(f'{varname} = {value};')
+
+    def lower_Label(self, instruction, append):
+        append(f'{instruction.name}: ;' if instruction.empty else f'{instruction.name}:')
+
+    def lower_Jump(self, instruction, append):
+        append(f'goto {instruction.target};')
+
+    def lower_BranchFalse(self, instruction, append):
+        append(f'if (!{instruction.cond}) goto {instruction.target};')
+
+    def lower_Print(self, instruction, append):
+        ctype = C_TYPES[instruction.type]
+        val = instruction.value
+        if ctype == "int":
+            append(f'printf("%d\\n", {val});')
+        elif ctype == "double":
+            append(f'printf("%f\\n", {val});')
+        elif ctype == "char*":
+            append(f'printf("%s\\n", {val});')
+
+    def lower_PrintNewline(self, instruction, append):
+        append('printf("\\n");')
+
+    def lower_Return(self, instruction, append):
+        append(f'return {instruction.value};')
+
+
 class CodeGenerator(NodeVisitor):
+    """Translates a checked AST to the IR of codigo_intermediario and
+    lowers it to C. `generate` leaves the IR of each function in `code`
+    and their C in `globals` (`function` is main)."""
     def __init__(self):
         self.globals = []
+        self.code = []
         self.function = None
+        # Nomes de variáveis já usados no C (todas são locais de main) e o
+        # próximo sufixo a tentar para cada nome repetido
+        self.varnames = set()
+        self.suffixes = {}
         CodeGenerator._temporary_counter = 0
         CodeGenerator._label_counter = 0
 
-    def new_temporary(self, c_type):
+    def new_temporary(self, type):
         CodeGenerator._temporary_counter += 1
-        name = f'_t{CodeGenerator._temporary_counter}'
-        self.function.locals.append(f'{c_type} {name};')
-        return name
+        temp = Temp(f'_t{CodeGenerator._temporary_counter}', type)
+        self.function.locals.append(temp)
+        return temp
+
+    def new_varname(self, name):
+        # Blocos diferentes podem declarar o mesmo nome: cada declaração
+        # ganha um nome próprio no C
+        varnames = self.varnames
+        varname = name
+        if varname in varnames:
+            suffix = self.suffixes.get(name, 2)
+            varname = f'{name}_{suffix}'
+            while varname in varnames:
+                suffix += 1
+                varname = f'{name}_{suffix}'
+            self.suffixes[name] = suffix + 1
+        varnames.add(varname)
+        return varname
 
     def new_label(self):
         CodeGenerator._label_counter += 1
         return f'L{CodeGenerator._label_counter}'
 
     def declare_function(self, funcname, argdefns, rettype):
-        self.function = Function(funcname, argdefns, rettype)
-        self.globals.append(self.function)
+        # Durante a visita, function é o IR da função sendo gerada
+        self.function = IRFunction(funcname, argdefns, rettype)
+        self.code.append(self.function)
 
-    def append(self, stmt):
-        self.function.statements.append(stmt)
+    def append(self, instruction):
+        self.function.code.append(instruction)
 
-    def typeof(self, node):
-        uchuck_type = node.attrs['uchuck_type']
-        if uchuck_type == IntType:
-            return "int"
-        elif uchuck_type == FloatType:
-            return "double"
-        elif uchuck_type == StringType:
-            return "char*"
-        else:
+    def irtype(self, node):
+        uchuck_type = node.uchuck_type
+        if uchuck_type not in C_TYPES:
             raise RuntimeError(f'Unsupported type {uchuck_type}')
+        return uchuck_type
+
+    def typeof(self, node):
+        return C_TYPES[self.irtype(node)]
 
     def show(self, buf=sys.stdout):
         main = self.globals[0]
@@ -63,195 +176,150 @@ class CodeGenerator(NodeVisitor):
         _str += str(main) + "\n"
         buf.write(_str)
 
+    def show_ir(self, buf=sys.stdout):
+        """Write the IR of the generated functions as text."""
+        for code in self.code:
+            code.dump(buf)
+
     def generate(self, ast):
         self.visit(ast)
+        emitter = CEmitter()
+        self.globals = [emitter.lower(code) for code in self.code]
+        self.function = self.globals[-1]
 
     def visit_Program(self, node):
-        self.declare_function('main', [], 'int')
+        self.declare_function('main', [], IntType)
         for stmt in node.stmts:
-            self.visit(stmt)
-        self.append('return 0;')
+            yield stmt
+        self.append(Return(Const('0', IntType)))
 
     def visit_StmtList(self, node):
         for stmt in node.stmts:
-            self.visit(stmt)
+            yield stmt
 
     def visit_VarDecl(self, node):
-        self.visit(node.dtype)
-        ctype = self.typeof(node)
-        varname = node.name.name if hasattr(node.name, 'name') else node.name
-        if ctype == 'char*':
-            self.function.locals.append(f"{ctype} {varname} = NULL;")
-        else:
-            self.function.locals.append(f"{ctype} {varname};")
-        node.attrs['gen_location'] = varname
+        yield node.dtype
+        var = Var(self.new_varname(node.name.name if hasattr(node.name, 'name') else node.name),
+                  self.irtype(node))
+        self.function.locals.append(var)
+        node.gen_location = var
 
     def visit_Type(self, node):
         pass
 
     def visit_Literal(self, node):
         value = getattr(node, 'valor', None) if hasattr(node, 'valor') else getattr(node, 'value', None)
-        uchuck_type = node.attrs['uchuck_type']
+        uchuck_type = node.uchuck_type
 
         if uchuck_type == IntType or uchuck_type == FloatType:
-            temp = str(value)
+            temp = Const(str(value), uchuck_type)
         elif uchuck_type == StringType:
-            temp = self.new_temporary('char*')
-
+            temp = self.new_temporary(StringType)
             # Remove aspas externas se houver (ex: '"x"' vira 'x')
             if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
-                value_inner = value[1:-1]
-            else:
-                value_inner = value
-
-            # CASO ESPECIAL: apenas uma quebra de linha
-            if value_inner == '\\n' or value_inner == '\n':
-                c_value = '\\n' if value_inner == '\\n' else '\n'
-            else:
-                # Faz escape duplo: unicode_escape cobre multiline e \n, replace cobre aspas duplas
-                c_value = (
-                    value_inner.encode('unicode_escape').decode('ascii')
-                    .replace('"', '\\"')
-                )
-            self.append(f'{temp} = strdup("{c_value}");')
+                value = value[1:-1]
+            self.append(StringConst(temp, value))
         else:
             raise RuntimeError("Unsupported literal type")
-        node.attrs['gen_location'] = temp
-
-
-
-    def visit_BinaryOp(self, node):
-        self.visit(node.left)
-        lvalue = node.left.attrs['gen_location']
-        self.visit(node.right)
-        rvalue = node.right.attrs['gen_location']
-        result = self.new_temporary(self.typeof(node))
-        op = getattr(node, 'op', getattr(node, 'operator', None))
-        if op == '+' and self.typeof(node) == 'char*':
-            temp_len = self.new_temporary('int')
-            self.append(f'{temp_len} = strlen({lvalue}) + strlen({rvalue});')
-            self.append(f'{result} = malloc({temp_len} + 1);')
-            self.append(f'strcpy({result}, {lvalue});')
-            self.append(f'strcat({result}, {rvalue});')
-        else:
-            self.append(f"{result} = {lvalue} {op} {rvalue};")
-        node.attrs['gen_location'] = result
-
-
-
-
+        node.gen_location = temp
 
     def visit_Location(self, node):
-        node.attrs['gen_location'] = node.name
+        decl = node.defn
+        if decl is None:
+            node.gen_location = Var(node.name, node.uchuck_type)
+        else:
+            node.gen_location = decl.gen_location
 
     def visit_BinaryOp(self, node):
-        self.visit(node.left)
-        lvalue = node.left.attrs['gen_location']
-        self.visit(node.right)
-        rvalue = node.right.attrs['gen_location']
-        result = self.new_temporary(self.typeof(node))
+        yield node.left
+        lvalue = node.left.gen_location
+        yield node.right
+        rvalue = node.right.gen_location
+        type = self.irtype(node)
+        result = self.new_temporary(type)
         op = getattr(node, 'op', getattr(node, 'operator', None))
-        
-        # Correto para concatenação de strings (char*) usando malloc, strcpy, strcat
-        if op == '+' and self.typeof(node) == 'char*':
-            temp_len = self.new_temporary('int')
-            self.append(f'{temp_len} = strlen({lvalue}) + strlen({rvalue});')
-            self.append(f'{result} = malloc({temp_len} + 1);')
-            self.append(f'strcpy({result}, {lvalue});')
-            self.append(f'strcat({result}, {rvalue});')
+        if op == '+' and type == StringType:
+            self.append(Concat(result, lvalue, rvalue, self.new_temporary(IntType)))
         else:
-            self.append(f"{result} = {lvalue} {op} {rvalue};")
-        node.attrs['gen_location'] = result
-
-
+            self.append(BinOp(op, type, result, lvalue, rvalue))
+        node.gen_location = result
 
     def visit_UnaryOp(self, node):
-        self.visit(node.operand)
-        val = node.operand.attrs['gen_location']
-        result = self.new_temporary(self.typeof(node))
-        self.append(f"{result} = {node.op}{val};")
-        node.attrs['gen_location'] = result
+        yield node.operand
+        val = node.operand.gen_location
+        type = self.irtype(node)
+        result = self.new_temporary(type)
+        self.append(UnOp(node.op, type, result, val))
+        node.gen_location = result
 
     def visit_ChuckOp(self, node):
-        self.visit(node.location)
-        varname = node.location.attrs['gen_location']
-        self.visit(node.expression)
-        value = node.expression.attrs['gen_location']
-        if self.typeof(node.location) == 'char*':
-            self.append(f'{varname} = strcpy(realloc({varname}, strlen({value})+1), {value});')
-        else:
-            self.append(f'{varname} = {value};')
-        node.attrs['gen_location'] = varname
+        yield node.location
+        varname = node.location.gen_location
+        yield node.expression
+        value = node.expression.gen_location
+        self.append(Move(self.irtype(node.location), varname, value))
+        node.gen_location = varname
 
     def visit_ExpressionAsStatement(self, node):
         if node.expression:
-            self.visit(node.expression)
+            yield node.expression
 
     def visit_IfStatement(self, node):
-        self.visit(node.test)
-        cond = node.test.attrs['gen_location']
+        yield node.test
+        cond = node.test.gen_location
         label_else = self.new_label()
         label_end = self.new_label()
-        self.append(f'if (!{cond}) goto {label_else};')
-        self.visit(node.consequence)
-        self.append(f'goto {label_end};')
-        self.append(f'{label_else}: ;')
+        self.append(BranchFalse(cond, label_else))
+        yield node.consequence
+        self.append(Jump(label_end))
+        self.append(Label(label_else, empty=True))
         if hasattr(node, 'alternative') and node.alternative:
-            self.visit(node.alternative)
-        self.append(f'{label_end}: ;')
+            yield node.alternative
+        self.append(Label(label_end, empty=True))
 
     def visit_WhileStatement(self, node):
         start_label = self.new_label()
         end_label = self.new_label()
-        self.append(f"{start_label}:")
-        self.visit(node.test)
-        cond = node.test.attrs['gen_location']
-        self.append(f"if (!{cond}) goto {end_label};")
+        self.append(Label(start_label))
+        yield node.test
+        cond = node.test.gen_location
+        self.append(BranchFalse(cond, end_label))
         # Salva labels de break/continue atuais (caso de laço aninhado)
         old_break = getattr(self, '_break_label', None)
         old_continue = getattr(self, '_continue_label', None)
         self._break_label = end_label
         self._continue_label = start_label
-        self.visit(node.body)
+        yield node.body
         self._break_label = old_break
         self._continue_label = old_continue
-        self.append(f"goto {start_label};")
-        self.append(f"{end_label}:")
+        self.append(Jump(start_label))
+        self.append(Label(end_label))
 
     def visit_BreakStatement(self, node):
-        # Gera goto para o label de saída do laço mais próximo
+        # Salta para o label de saída do laço mais próximo
         if hasattr(self, '_break_label') and self._break_label:
-            self.append(f"goto {self._break_label};")
+            self.append(Jump(self._break_label))
 
     def visit_ContinueStatement(self, node):
-        # Gera goto para o label de início do laço mais próximo
+        # Salta para o label de início do laço mais próximo
         if hasattr(self, '_continue_label') and self._continue_label:
-            self.append(f"goto {self._continue_label};")
+            self.append(Jump(self._continue_label))
 
     def visit_ExprList(self, node):
         last = None
         for expr in node.exprs:
-            self.visit(expr)
-            last = expr.attrs.get('gen_location')
-        node.attrs['gen_location'] = last
+            yield expr
+            last = expr.gen_location
+        node.gen_location = last
 
     def visit_PrintStatement(self, node):
         exprs = node.expression.exprs if hasattr(node.expression, 'exprs') else [node.expression]
         for expr in exprs:
             # Checa se é string "\n" para imprimir direto um ENTER
-            if hasattr(expr, 'attrs') and expr.attrs.get('uchuck_type', None) == StringType:
+            if expr.uchuck_type == StringType:
                 val = getattr(expr, 'valor', None) if hasattr(expr, 'valor') else getattr(expr, 'value', None)
                 if val == '"\\n"' or val == '"\n"' or val == '\n' or val == '\\n':
-                    self.append('printf("\\n");')
+                    self.append(PrintNewline())
                     continue
-            self.visit(expr)
-            val = expr.attrs['gen_location']
-            ctype = self.typeof(expr)
-            if ctype == "int":
-                self.append(f'printf("%d\\n", {val});')
-            elif ctype == "double":
-                self.append(f'printf("%f\\n", {val});')
-            elif ctype == "char*":
-                self.append(f'printf("%s\\n", {val});')
-
-
+            yield expr
+            self.append(Print(self.irtype(expr), expr.gen_location))
@@ -0,0 +1,44 @@
+"""Line table of a source text, shared by the lexer and the AST.
+
+Kept apart from analisador_lexico so that code that only needs columns
+(e.g. an AST read back by cache_ast) does not load the lexer.
+"""
+from array import array
+from bisect import bisect_right
+
+
+class LineTable:
+    """Offsets where each line of a source text starts.
+
+    The lexer fills it incrementally as it consumes newlines, so the
+    column of a token is found with a binary search instead of scanning
+    the text backwards.
+    """
+    __slots__ = ("starts",)
+
+    def __init__(self):
+        self.starts = array('q', [0])
+
+    def add_newlines(self, value, index=0):
+        """Record every newline of `value`, a piece of the source that
+        starts at offset `index`."""
+        pos = value.find('\n')
+        while pos >= 0:
+            self.starts.append(index + pos + 1)
+            pos = value.find('\n', pos + 1)
+
+    def discard_before(self, index):
+        """Forget the lines that end before `index` (their columns can no
+        longer be asked for)."""
+        k = bisect_right(self.starts, index) - 1
+        if k > 0:
+            del self.starts[:k]
+
+    def column(self, index):
+        """Column (starting at 1) of the character at `index`."""
+        starts = self.starts
+        last = starts[-1]
+        # Caso comum: o token está na última linha já vista pelo lexer
+        if index >= last:
+            return index - last + 1
+        return index - starts[bisect_right(starts, index) - 1] + 1
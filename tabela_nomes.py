@@ -0,0 +1,42 @@
+"""Names of one compilation, shared by the parser, the AST and the phases
+after it.
+
+The lexer slices a new str out of the source for every token, so a
+program that uses a variable a thousand times would keep a thousand
+copies of its name. The parser passes every identifier through
+NameTable.intern and every literal text through NameTable.constant, and
+the AST keeps only the canonical strs: equal names are the same object,
+so the dicts of SymbolTable and CodeGenerator compare them by identity
+and reuse their cached hash.
+
+The names are not numbered. A lookup in a dict keyed by an interned
+str costs the same as one keyed by an int (both compare by identity
+with a cached hash). Keying SymbolTable by ids would add a str -> id
+lookup for each use, about twice the cost of a resolution, unless
+the AST also carried the ids. CodeGenerator.varnames holds the names
+of the C variables it generates, not identifiers of the source.
+"""
+
+
+class NameTable:
+    """Identifiers of a compilation plus a pool of the text of the
+    literals."""
+    __slots__ = ("names", "constants")
+
+    def __init__(self):
+        self.names = {}
+        self.constants = {}
+
+    def intern(self, name):
+        """Canonical str of the identifier `name`."""
+        return self.names.setdefault(name, name)
+
+    def constant(self, text):
+        """Canonical str of the text of a literal."""
+        return self.constants.setdefault(text, text)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names